@@ -0,0 +1,98 @@
+"""
+Requests sent and client CPU time when several bots of one process fetch
+the same board at once against a local stand-in server, each on its own
+versus through BoardCache (threads) and AsyncBoardCache (asyncio).
+
+    python benchmarks/bench_board_cache.py [--bots 1 4 16 64] [--rounds 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from time import process_time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.standin_server import sample_board, serve
+from game.api import Api
+from game.async_api import AsyncApi, AsyncHttpTransport
+from game.board_cache import AsyncBoardCache, BoardCache
+from game.transport import make_transport
+
+
+def threaded(url: str, bots: int, rounds: int, cached: bool):
+    """
+    Every bot fetches the board once a round, all of them at the same time
+    """
+    apis = [Api(url, make_transport()) for _ in range(bots)]
+    # Every round is a new tick, so nothing stays fresh from one to the next
+    cache = BoardCache(apis[0].boards_get, max_age=0) if cached else None
+    barrier = threading.Barrier(bots)
+
+    def bot(api):
+        for _ in range(rounds):
+            barrier.wait()
+            if cache is not None:
+                cache.get(1)
+            else:
+                api.boards_get(1)
+
+    threads = [threading.Thread(target=bot, args=(api,)) for api in apis]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for api in apis:
+        api.close()
+
+
+async def gathered(url: str, bots: int, rounds: int, cached: bool):
+    api = AsyncApi(url, AsyncHttpTransport())
+    cache = AsyncBoardCache(api.boards_get, max_age=0) if cached else None
+    for _ in range(rounds):
+        if cache is not None:
+            await asyncio.gather(*(cache.get(1) for _ in range(bots)))
+        else:
+            await asyncio.gather(*(api.boards_get(1) for _ in range(bots)))
+    await api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    server, url = serve(sample_board())
+    print(
+        "{:>8} {:>6} {:>8} {:>10} {:>12}".format(
+            "client", "bots", "cached", "requests", "client cpu"
+        )
+    )
+    for bots in args.bots:
+        for client in ("threads", "asyncio"):
+            for cached in (False, True):
+                before = server.requests
+                start = process_time()
+                if client == "threads":
+                    threaded(url, bots, args.rounds, cached)
+                else:
+                    asyncio.run(gathered(url, bots, args.rounds, cached))
+                # The stand-in runs in this process too, so its share of the
+                # CPU time is counted; it answers fewer requests when cached
+                cpu = process_time() - start
+                print(
+                    "{:>8} {:>6} {:>8} {:>10} {:>10.0f}ms".format(
+                        client,
+                        bots,
+                        "yes" if cached else "no",
+                        server.requests - before,
+                        cpu * 1e3,
+                    )
+                )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Decoding a stream of snapshots of one board where only a few objects change
+per tick: a fresh object graph every tick (codec.board_from_dict) versus
+BoardState.board_from_dict, which reuses the unchanged objects.
+
+    python benchmarks/bench_board_state.py [--objects 1000] [--ticks 200]
+"""
+import argparse
+import copy
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.board_state import BoardState
+
+
+def snapshots(objects: int, ticks: int):
+    """
+    Successive payloads: every tick one bot moves and one diamond is
+    collected and replaced elsewhere
+    """
+    side = int((objects * 2) ** 0.5) + 1
+    raw = board_json(width=side, height=side, diamonds=objects - 21, bots=8)
+    rng = random.Random(0)
+    next_id = 10 ** 6
+    frames = [raw]
+    for tick in range(ticks):
+        raw = copy.copy(raw)
+        items = list(raw["gameObjects"])
+        bots = [i for i, o in enumerate(items) if o["type"] == "BotGameObject"]
+        i = bots[tick % len(bots)]
+        bot = copy.deepcopy(items[i])
+        bot["position"]["x"] = (bot["position"]["x"] + 1) % side
+        bot["properties"]["millisecondsLeft"] -= 100
+        items[i] = bot
+        diamonds = [i for i, o in enumerate(items) if o["type"] == "DiamondGameObject"]
+        del items[rng.choice(diamonds)]
+        next_id += 1
+        items.append(
+            {
+                "id": next_id,
+                "position": {"x": rng.randrange(side), "y": rng.randrange(side)},
+                "type": "DiamondGameObject",
+                "properties": {"points": 1},
+            }
+        )
+        raw["gameObjects"] = items
+        frames.append(raw)
+    return frames
+
+
+def run(name, decode, frames):
+    gc.collect()
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+    # Memory is measured in a first pass, time in a second one, untraced
+    tracemalloc.start()
+    for raw in frames:
+        decode(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+    start = perf_counter()
+    for raw in frames:
+        decode(raw)
+    untraced = perf_counter() - start
+    print(
+        "{:<24}{:>10.1f}{:>14.0f}{:>8}".format(
+            name, untraced / len(frames) * 1e6, peak / 1024, collections
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    frames = snapshots(args.objects, args.ticks)
+    print("{:<24}{:>10}{:>14}{:>8}".format("", "us/tick", "peak KiB", "gc runs"))
+    run("fresh object graph", codec.board_from_dict, frames)
+    state = BoardState()
+    run("BoardState (reuse)", state.board_from_dict, frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Decode + construct time of a board response: json.loads, decode.decode and
+dacite.from_dict (the old path) versus game.codec.parse_board.
+
+    python benchmarks/bench_decode.py [--objects 1000] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_bytes
+from dacite import from_dict
+from decode import decode
+from game import codec
+from game.models import Board
+
+
+def legacy(content: bytes) -> Board:
+    return from_dict(Board, decode(codec.unwrap(json.loads(content))))
+
+
+def best_of(func, content: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func(content)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bots = 8
+    side = int((args.objects * 2) ** 0.5) + 1
+    content = board_bytes(
+        width=side,
+        height=side,
+        diamonds=args.objects - bots * 2 - 5,
+        bots=bots,
+        teleporters=2,
+    )
+    assert legacy(content) == codec.parse_board(content)
+
+    old = best_of(legacy, content, args.repeat)
+    new = best_of(codec.parse_board, content, args.repeat)
+    print("objects: {}, json backend: {}".format(args.objects, codec.JSON_BACKEND))
+    print("decode + dacite: {:8.2f} ms".format(old * 1e3))
+    print("codec:           {:8.2f} ms".format(new * 1e3))
+    print("speedup:         {:8.1f}x".format(old / new))
+
+
+if __name__ == "__main__":
+    main()
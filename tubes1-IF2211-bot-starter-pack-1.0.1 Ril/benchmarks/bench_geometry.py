@@ -0,0 +1,69 @@
+"""
+Building the per-tick distance matrix with plain lists versus NumPy, by
+number of objects on the board, to find where NumPy starts to pay off.
+
+    python benchmarks/bench_geometry.py [--objects 10 20 40 80 160 320]
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.geometry import DistanceMatrix, np
+
+
+def per_call(function, seconds: float = 0.2) -> float:
+    calls = 0
+    start = perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = perf_counter() - start
+        if elapsed > seconds:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--objects", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320]
+    )
+    parser.add_argument("--teleporters", type=int, default=1)
+    args = parser.parse_args()
+    if np is None:
+        print("NumPy is not installed, only the list backend can run")
+
+    print("{:>8} {:>12} {:>12} {:>8}".format("objects", "python", "numpy", "speedup"))
+    for objects in args.objects:
+        side = max(8, int((objects * 3) ** 0.5))
+        bots = max(2, objects // 10)
+        board = codec.board_from_dict(
+            board_json(
+                width=side,
+                height=side,
+                diamonds=max(1, objects - 2 * bots),
+                bots=bots,
+                teleporters=args.teleporters,
+                button=False,
+            )
+        )
+        bot = board.bots[0]
+        count = len(DistanceMatrix(board, bot, "python").objects)
+        python = per_call(lambda: DistanceMatrix(board, bot, "python"))
+        if np is None:
+            print("{:>8} {:>10.1f}us".format(count, python * 1e6))
+            continue
+        numpy = per_call(lambda: DistanceMatrix(board, bot, "numpy"))
+        print(
+            "{:>8} {:>10.1f}us {:>10.1f}us {:>7.1f}x".format(
+                count, python * 1e6, numpy * 1e6, python / numpy
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
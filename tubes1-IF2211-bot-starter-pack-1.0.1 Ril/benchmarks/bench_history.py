@@ -0,0 +1,116 @@
+"""
+Cost of keeping the bot history up to date and of predicting where every bot
+goes next, by number of bots, and how often the predicted next cell of the
+other bots is right in a simulated game.
+
+    python benchmarks/bench_history.py [--bots 4 16 64 256] [--ahead 5]
+"""
+import argparse
+import os
+import random
+import sys
+from dataclasses import replace
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.history import History
+from game.logic.kece import GreedyDiamondBot
+from game.logic.route import RoutePlannerBot
+from game.models import BOT, Position
+from game.simulator import Simulator
+
+
+class Observer(GreedyDiamondBot):
+    """
+    GreedyDiamondBot that checks the predicted next cell of the other bots
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.history = History()
+        self.predicted = {}
+        self.right = 0
+        self.total = 0
+
+    def next_move(self, board_bot, board):
+        history = self.history
+        history.update(board)
+        predicted = {}
+        for bot in board.bots:
+            if bot.id == board_bot.id:
+                continue
+            expected = self.predicted.get(bot.id)
+            if expected is not None:
+                self.total += 1
+                self.right += expected == bot.position
+            predicted[bot.id] = history.predict(bot, 1)[0]
+        self.predicted = predicted
+        return super().next_move(board_bot, board)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=[4, 16, 64, 256])
+    parser.add_argument("--ahead", type=int, default=5, help="Ticks predicted")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--games", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        "{:>6} {:>8} {:>14} {:>16}".format(
+            "bots", "board", "update/tick", "predict/bot"
+        )
+    )
+    for bots in args.bots:
+        side = max(15, int((bots * 12) ** 0.5))
+        board = codec.board_from_dict(
+            board_json(width=side, height=side, diamonds=bots, bots=bots)
+        )
+        rng = random.Random(0)
+        boards = []
+        for _ in range(args.ticks):
+            objects = []
+            for obj in board.game_objects:
+                if obj.type == BOT:
+                    x = min(side - 1, max(0, obj.position.x + rng.choice((-1, 0, 1))))
+                    obj = replace(obj, position=Position(x=x, y=obj.position.y))
+                objects.append(obj)
+            board = replace(board, game_objects=objects)
+            boards.append(board)
+
+        history = History()
+        start = perf_counter()
+        for board in boards:
+            history.update(board)
+        update = (perf_counter() - start) / len(boards)
+
+        start = perf_counter()
+        for bot in board.bots:
+            history.predict(bot, args.ahead)
+        predict = (perf_counter() - start) / len(board.bots)
+        print(
+            "{:>6} {:>8} {:>12.1f}us {:>14.1f}us".format(
+                bots, "{}x{}".format(side, side), update * 1e6, predict * 1e6
+            )
+        )
+
+    right = total = 0
+    for seed in range(args.games):
+        observer = Observer()
+        Simulator(seed=seed).play(
+            {
+                "Observer": observer,
+                "Kece": GreedyDiamondBot(),
+                "Route": RoutePlannerBot(),
+            }
+        )
+        right += observer.right
+        total += observer.total
+    print("next cell predicted right: {:.1%} of {} moves".format(right / total, total))
+
+
+if __name__ == "__main__":
+    main()
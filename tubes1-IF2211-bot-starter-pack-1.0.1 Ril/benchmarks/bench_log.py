@@ -0,0 +1,80 @@
+"""
+Cost to the calling thread of logging one request line: print as the API
+client used to, versus game.log with the level off, on to the console, and
+on to a binary trace file. Output goes to os.devnull, so this is the cost
+of the call and not of the terminal.
+
+    python benchmarks/bench_log.py [--calls 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game.log import DEBUG, OFF, Logger, read_trace
+
+BODY = b'{"direction": "NORTH"}'
+
+
+def per_call(function, calls: int) -> float:
+    start = perf_counter()
+    for _ in range(calls):
+        function()
+    return (perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+
+    def printed():
+        print(
+            ">>> {} {} {}".format("POST", "/bots/abc/move", BODY.decode()),
+            file=devnull,
+        )
+
+    def logged(log):
+        def call():
+            if log.level <= DEBUG:
+                log.debug(
+                    "request", method="POST", endpoint="/bots/abc/move", body=BODY
+                )
+
+        return call
+
+    off = Logger()
+    off.configure(OFF, stream=devnull)
+    console = Logger(capacity=args.calls)
+    console.configure(DEBUG, stream=devnull)
+    trace_path = os.path.join(tempfile.mkdtemp(), "bench.trace")
+    trace = Logger(capacity=args.calls)
+    trace.configure(OFF, stream=devnull, trace=trace_path)
+
+    cases = [
+        ("print", printed),
+        ("log, level off", logged(off)),
+        ("log, debug to console", logged(console)),
+        ("log, debug to trace", logged(trace)),
+    ]
+    print("{:<24}{:>14}".format("", "ns per call"))
+    for label, function in cases:
+        print("{:<24}{:>14.0f}".format(label, per_call(function, args.calls) * 1e9))
+
+    for log in (console, trace):
+        log.close()
+    records = sum(1 for _ in read_trace(trace_path))
+    print(
+        "trace file: {} records, {:.1f} bytes each".format(
+            records, os.path.getsize(trace_path) / max(1, records)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Iterations per second of MonteCarloBot's search by board size, to size the
+hardware for a given move delay, and a simulated game against
+GreedyDiamondBot to see how much of the tree is kept between ticks.
+
+    python benchmarks/bench_mcts.py [--sizes 15 30 60] [--budget 0.05]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.logic.kece import GreedyDiamondBot
+from game.logic.mcts import MonteCarloBot
+from game.simulator import Simulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--budget", type=float, default=0.05, help="Seconds per tick")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--horizon", type=int, nargs="+", default=[15, 30])
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>9} {:>8} {:>14} {:>14}".format(
+            "board", "diamonds", "horizon", "iterations/s", "per tick"
+        )
+    )
+    for size in args.sizes:
+        diamonds = max(8, size * size // 12)
+        board = codec.board_from_dict(
+            board_json(width=size, height=size, diamonds=diamonds, bots=4)
+        )
+        bot = board.bots[0]
+        for horizon in args.horizon:
+            logic = MonteCarloBot(time_budget=args.budget, horizon=horizon)
+            for _ in range(args.ticks):
+                # The same board every tick, so nothing is kept between them
+                logic.root = None
+                logic.next_move(bot, board)
+            print(
+                "{:>8} {:>9} {:>8} {:>14.0f} {:>14.0f}".format(
+                    "{}x{}".format(size, size),
+                    diamonds,
+                    horizon,
+                    logic.iterations_per_second,
+                    logic.iterations / logic.ticks,
+                )
+            )
+
+    logic = MonteCarloBot(time_budget=args.budget / 5)
+    scores = Simulator(seed=0).play({"MCTS": logic, "Kece": GreedyDiamondBot()})
+    print("game against Kece: {}".format(scores))
+    print(logic.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Cost of distance fields: a cache miss runs a breadth-first search over the
+whole board, a hit is a dict lookup. Also replays the boards of a simulated
+game to see how often fields towards diamonds and bases are reused.
+
+    python benchmarks/bench_pathfinding.py [--sizes 15 50 100]
+"""
+import argparse
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.logic.kece import GreedyDiamondBot
+from game.models import Position
+from game.pathfinding import PathFinder
+from game.simulator import Simulator
+from game.util import get_direction
+
+
+def per_call(function, calls: int) -> float:
+    start = perf_counter()
+    for _ in range(calls):
+        function()
+    return (perf_counter() - start) / calls
+
+
+def grid(size: int) -> None:
+    board = codec.board_from_dict(
+        board_json(width=size, height=size, diamonds=size * 2, bots=8)
+    )
+    bot = board.bots[0]
+    finder = PathFinder(cache_size=1 << 16)
+    finder.update(board, bot)
+    rng = random.Random(0)
+    targets = [
+        Position(x=rng.randrange(size), y=rng.randrange(size)) for _ in range(200)
+    ]
+    position = bot.position
+
+    start = perf_counter()
+    for target in targets:
+        finder.distance(position, target)
+    miss = (perf_counter() - start) / len(targets)
+    hit = per_call(lambda: finder.distance(position, targets[7]), 20000)
+    step = per_call(lambda: finder.next_step(position, targets[7]), 20000)
+    naive = per_call(
+        lambda: get_direction(position.x, position.y, targets[7].x, targets[7].y),
+        20000,
+    )
+    print(
+        "{:>4}x{:<4} field {:9.1f}us  distance {:5.2f}us  next_step {:5.2f}us"
+        "  get_direction {:5.2f}us".format(
+            size, size, miss * 1e6, hit * 1e6, step * 1e6, naive * 1e6
+        )
+    )
+
+
+def game(avoid_bots: bool, avoid_radius=None) -> None:
+    boards = []
+
+    class Watched(GreedyDiamondBot):
+        def next_move(self, board_bot, board):
+            boards.append((board, board_bot))
+            return super().next_move(board_bot, board)
+
+    Simulator(seed=0).play({"A": Watched(), "B": GreedyDiamondBot()})
+    finder = PathFinder()
+    start = perf_counter()
+    for board, bot in boards:
+        finder.update(board, bot, avoid_bots, avoid_radius)
+        finder.distance(bot.position, bot.properties.base)
+        for diamond in board.diamonds:
+            finder.distance(bot.position, diamond.position)
+    elapsed = perf_counter() - start
+    print(
+        "game, avoid_bots={:<5} avoid_radius={:<4}  {:7.1f}us/tick"
+        "  hit rate {:.0%}".format(
+            str(avoid_bots),
+            str(avoid_radius),
+            elapsed / len(boards) * 1e6,
+            finder.hits / (finder.hits + finder.misses),
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50, 100])
+    args = parser.parse_args()
+    for size in args.sizes:
+        grid(size)
+    game(avoid_bots=False)
+    game(avoid_bots=True)
+    game(avoid_bots=True, avoid_radius=2)
+
+
+if __name__ == "__main__":
+    main()
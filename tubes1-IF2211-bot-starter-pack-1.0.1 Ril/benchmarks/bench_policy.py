@@ -0,0 +1,119 @@
+"""
+Cost of PolicyBot's move table over simulated games, by board size and
+backend: building the whole table, patching it around the bots that moved
+and the diamonds collected, and looking a move up, next to GreedyDiamondBot deciding from scratch.
+Every move of the table is also checked against GreedyDiamondBot's on the
+same board.
+
+    python benchmarks/bench_policy.py [--sizes 15 30 60] [--seconds 20]
+"""
+import argparse
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game.board_state import BoardChanges
+from game.logic.kece import GreedyDiamondBot
+from game.logic.policy import PolicyBot, PolicyTable, np
+from game.simulator import Simulator, SimulatorConfig
+
+
+class TimedPolicy(PolicyBot):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.reference = GreedyDiamondBot()
+        self.reference.board_state = self.board_state
+        self.build = []
+        self.patch = []
+        self.lookup = []
+        self.kece = []
+        self.mismatches = 0
+
+    def next_move(self, board_bot, board):
+        table = self.table
+        builds = table.builds
+        changes = self.board_state.update(board)
+        start = perf_counter()
+        table.update(board, board_bot, changes)
+        seed = random.random()
+        random.seed(seed)
+        updated = perf_counter()
+        move = table.move(board_bot.position, board_bot.properties.diamonds, board)
+        looked_up = perf_counter()
+        (self.build if table.builds > builds else self.patch).append(updated - start)
+        self.lookup.append(looked_up - updated)
+
+        random.seed(seed)
+        start = perf_counter()
+        expected = self.reference.next_move(board_bot, board)
+        self.kece.append(perf_counter() - start)
+        if tuple(expected) != tuple(move):
+            self.mismatches += 1
+        self._last = (board_bot, move, board)
+        return move
+
+
+def mean_ms(values) -> str:
+    return "{:.3f}".format(sum(values) / len(values) * 1e3) if values else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--bots", type=int, default=4)
+    parser.add_argument("--seconds", type=int, default=20)
+    args = parser.parse_args()
+    backends = ["python"] + (["numpy"] if np is not None else [])
+    if np is None:
+        print("NumPy is not installed, only the list backend can run")
+
+    print(
+        "{:>6} {:>8} {:>10} {:>10} {:>8} {:>10} {:>10} {:>11}".format(
+            "size",
+            "backend",
+            "build ms",
+            "patch ms",
+            "patched",
+            "lookup us",
+            "kece ms",
+            "mismatches",
+        )
+    )
+    for size in args.sizes:
+        for backend in backends:
+            simulator = Simulator(
+                SimulatorConfig(width=size, height=size, seconds=args.seconds), seed=1
+            )
+            policy = TimedPolicy(backend)
+            controllers = {"policy": policy}
+            for i in range(args.bots - 1):
+                controllers["kece{}".format(i)] = GreedyDiamondBot()
+            simulator.play(controllers)
+
+            # A full build on the last board of the game, whatever it held
+            bot, _, board = policy._last
+            table = PolicyTable(policy, backend)
+            start = perf_counter()
+            table.update(board, bot, BoardChanges(reset=True))
+            policy.build.append(perf_counter() - start)
+
+            ticks = len(policy.build) + len(policy.patch)
+            print(
+                "{:>6} {:>8} {:>10} {:>10} {:>7.0%} {:>10.2f} {:>10} {:>11}".format(
+                    size,
+                    backend,
+                    mean_ms(policy.build),
+                    mean_ms(policy.patch),
+                    len(policy.patch) / ticks,
+                    sum(policy.lookup) / len(policy.lookup) * 1e6,
+                    mean_ms(policy.kece),
+                    policy.mismatches,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
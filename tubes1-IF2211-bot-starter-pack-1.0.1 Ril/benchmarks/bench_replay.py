@@ -0,0 +1,83 @@
+"""
+Cost of recording a game tick by tick and speed of replaying it.
+
+Plays a few games in the simulator, then times Recorder.record over the
+boards the controller saw and reads the recording back.
+
+    python benchmarks/bench_replay.py [--games 5] [--width 15] [--height 15]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game.logic.kece import GreedyDiamondBot
+from game.replay import Recorder, read, replay
+from game.simulator import Simulator, SimulatorConfig
+
+
+def decisions(seed: int, width: int, height: int):
+    """
+    (board, move) of every decision of one bot in a simulated game
+    """
+    seen = []
+
+    class Watched(GreedyDiamondBot):
+        def next_move(self, board_bot, board):
+            move = super().next_move(board_bot, board)
+            seen.append((board, move))
+            return move
+
+    simulator = Simulator(SimulatorConfig(width=width, height=height), seed=seed)
+    simulator.play({"A": Watched(), "B": GreedyDiamondBot()})
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--width", type=int, default=15)
+    parser.add_argument("--height", type=int, default=15)
+    args = parser.parse_args()
+
+    games = [decisions(seed, args.width, args.height) for seed in range(args.games)]
+    ticks = sum(len(game) for game in games)
+    path = os.path.join(tempfile.mkdtemp(), "games.rec")
+
+    best = float("inf")
+    for _ in range(5):
+        if os.path.exists(path):
+            os.remove(path)
+        start = perf_counter()
+        for game in games:
+            with Recorder(path, "A", "Kece") as recorder:
+                for board, move in game:
+                    recorder.record(board, move, 0.0)
+        best = min(best, perf_counter() - start)
+    size = os.path.getsize(path)
+    print(
+        "record   {:8.1f}us/tick  {:8.1f} bytes/tick".format(
+            best / ticks * 1e6, size / ticks
+        )
+    )
+
+    start = perf_counter()
+    recordings = read(path)
+    elapsed = perf_counter() - start
+    print("read     {:8.1f}us/tick".format(elapsed / ticks * 1e6))
+
+    replayed = 0
+    elapsed = 0.0
+    for recording in recordings:
+        result = replay(recording, GreedyDiamondBot())
+        replayed += result.ticks
+        elapsed += result.elapsed
+    print("replay   {:8.0f} ticks/s".format(replayed / elapsed))
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
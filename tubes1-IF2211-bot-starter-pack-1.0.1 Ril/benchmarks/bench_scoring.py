@@ -0,0 +1,106 @@
+"""
+GreedyDiamondBot's diamond scoring one diamond at a time versus DiamondBatch
+scoring all of them at once, with and without packing the board first, and
+the spatial index search next_move uses, by number of diamonds. Every batch
+query is also checked to pick the same diamond as the per-diamond scan.
+
+    python benchmarks/bench_scoring.py [--diamonds 50 500 5000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game.codec import board_from_dict
+from game.logic.kece import GreedyDiamondBot
+from game.models import Position
+from game.scoring import DiamondBatch, np
+
+
+def timed(func, positions) -> float:
+    start = perf_counter()
+    for position in positions:
+        func(position)
+    return (perf_counter() - start) / len(positions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diamonds", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    backends = ["python"] + (["numpy"] if np is not None else [])
+    if np is None:
+        print("NumPy is not installed, only the list backend can run")
+
+    logic = GreedyDiamondBot()
+    header = ["diamonds", "scan"] + ["{} +pack".format(b) for b in backends]
+    header += backends + ["index"]
+    print("".join("{:>14}".format(h) for h in header) + "  (us per query)")
+    for diamonds in args.diamonds:
+        bots = max(4, diamonds // 50)
+        side = int(((diamonds + bots * 2) * 3) ** 0.5) + 1
+        board = board_from_dict(
+            board_json(width=side, height=side, diamonds=diamonds, bots=bots)
+        )
+        rng = random.Random(1)
+        positions = [
+            Position(x=rng.randrange(side), y=rng.randrange(side))
+            for _ in range(args.queries)
+        ]
+        # The enemies find_best_diamond sees are the bots within the danger
+        # radius; take a few bots anywhere so some diamonds are unsafe
+        enemies = board.bots[:3]
+        candidates = board.diamonds
+        batches = {b: DiamondBatch(candidates, b) for b in backends}
+        index = board.spatial
+
+        def scan(p):
+            # find_best_diamond before batching: score_diamond per diamond
+            best, best_score = None, float("inf")
+            for diamond in candidates:
+                score = logic.score_diamond(
+                    diamond, logic.manhattan_distance(p, diamond.position), enemies
+                )
+                if score is not None and score < best_score:
+                    best, best_score = diamond, score
+            return best
+
+        expected = [scan(p) for p in positions]
+        for batch in batches.values():
+            picked = [batch.best(p, enemies, logic.safe_distance) for p in positions]
+            assert picked == expected, "{} picked other diamonds".format(batch.backend)
+
+        row = [timed(scan, positions)]
+        for b in backends:
+            row.append(
+                timed(
+                    lambda p: DiamondBatch(candidates, b).best(
+                        p, enemies, logic.safe_distance
+                    ),
+                    positions,
+                )
+            )
+        for b in backends:
+            batch = batches[b]
+            row.append(
+                timed(lambda p: batch.best(p, enemies, logic.safe_distance), positions)
+            )
+        row.append(
+            timed(
+                lambda p: logic.find_best_diamond(p, candidates, enemies, index),
+                positions,
+            )
+        )
+        print(
+            "{:>14}".format(diamonds)
+            + "".join("{:>14.1f}".format(seconds * 1e6) for seconds in row)
+        )
+
+
+if __name__ == "__main__":
+    main()
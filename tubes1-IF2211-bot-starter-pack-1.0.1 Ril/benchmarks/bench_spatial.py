@@ -0,0 +1,98 @@
+"""
+Linear scans versus the spatial index on large synthetic boards: enemies
+within the danger radius, GreedyDiamondBot.find_best_diamond and the
+k nearest diamonds weighted by points.
+
+    python benchmarks/bench_spatial.py [--objects 10000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game.codec import board_from_dict
+from game.logic.kece import GreedyDiamondBot
+from game.models import BOT, Position
+from game.spatial import SpatialIndex
+
+
+def distance(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def timed(func, positions) -> float:
+    start = perf_counter()
+    for position in positions:
+        func(position)
+    return (perf_counter() - start) / len(positions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    bots = max(4, args.objects // 100)
+    side = int((args.objects * 4) ** 0.5) + 1
+    board = board_from_dict(
+        board_json(
+            width=side,
+            height=side,
+            diamonds=args.objects - bots * 2 - 5,
+            bots=bots,
+            teleporters=2,
+        )
+    )
+    rng = random.Random(1)
+    positions = [
+        Position(x=rng.randrange(side), y=rng.randrange(side))
+        for _ in range(args.queries)
+    ]
+    logic = GreedyDiamondBot()
+    diamonds = board.diamonds
+
+    start = perf_counter()
+    index = SpatialIndex(board.width, board.height, board.game_objects)
+    build = perf_counter() - start
+
+    cases = [
+        (
+            "enemies within 3",
+            lambda p: [o for o in board.bots if distance(p, o.position) <= 3],
+            lambda p: index.within(p, 3, BOT),
+        ),
+        (
+            "find_best_diamond",
+            lambda p: logic.find_best_diamond(p, diamonds, []),
+            lambda p: logic.find_best_diamond(p, diamonds, [], index),
+        ),
+        (
+            "5 nearest by points",
+            lambda p: sorted(
+                diamonds,
+                key=lambda d: distance(p, d.position) / max(d.properties.points, 1),
+            )[:5],
+            lambda p: index.nearest(p, 5, weighted=True),
+        ),
+    ]
+    print(
+        "{}x{} board, {} objects, index build {:.2f} ms".format(
+            side, side, len(board.game_objects), build * 1e3
+        )
+    )
+    print("{:<22}{:>12}{:>12}{:>10}".format("query", "linear us", "index us", "speedup"))
+    for name, linear, indexed in cases:
+        old = timed(linear, positions)
+        new = timed(indexed, positions)
+        print(
+            "{:<22}{:>12.1f}{:>12.1f}{:>9.1f}x".format(name, old * 1e6, new * 1e6, old / new)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Startup time of the bot: a fresh interpreter running main.py up to argument
+parsing, and importing each registered logic controller on its own, with
+the heavy modules each one ends up loading.
+
+    python benchmarks/bench_startup.py [--runs 10] [--main main.py]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from game.logic.registry import names
+
+# Modules worth knowing about when they are loaded at startup
+HEAVY = ("colorama", "requests", "numpy", "orjson", "game.simulator", "game.replay")
+
+
+def wall(command, runs: int) -> float:
+    """
+    Median seconds of running a command to completion
+    """
+    samples = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run(
+            command,
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        samples.append(perf_counter() - start)
+    return statistics.median(samples)
+
+
+def loaded(command):
+    """
+    The HEAVY modules a command imports
+    """
+    result = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    return [name for name in HEAVY if name in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--main", default="main.py", help="Bot script to start")
+    args = parser.parse_args()
+
+    cases = [("python -c pass", [sys.executable, "-c", "pass"])]
+    cases.append(("{} --help".format(args.main), [sys.executable, args.main, "--help"]))
+    for name in names():
+        cases.append(
+            (
+                "load {}".format(name),
+                [
+                    sys.executable,
+                    "-c",
+                    "from game.logic.registry import load; load({!r})".format(name),
+                ],
+            )
+        )
+    print("{:<24}{:>10}  {}".format("", "median ms", "loads"))
+    for label, command in cases:
+        print(
+            "{:<24}{:>10.1f}  {}".format(
+                label,
+                wall(command, args.runs) * 1e3,
+                ", ".join(loaded(command)) or "-",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Cost and worth of sharing the diamonds within a team (game.team).
+
+Per tick cost: a coordinated team of every --sizes plays a simulated game,
+and every bot times publishing its slot, reading its teammates and solving
+the assignment, in microseconds, next to the whole next_move of the bots
+of the team and of the bots choosing alone.
+
+Worth: over --games seeds, a coordinated team plays against a team of the
+same size choosing alone, on the same board. Both are scored, and a tick
+counts as a duplicate for every bot of a team after a diamond some
+teammate is also after.
+
+    python benchmarks/bench_team.py [--sizes 2 4 8] [--games 5]
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game.logic.kece import GreedyDiamondBot
+from game.simulator import Simulator, SimulatorConfig
+from game.team import Team
+
+
+class TimedTeam(Team):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.timings = {"publish": [], "members": [], "choose": []}
+
+    def _timed(self, name, function, *args):
+        start = perf_counter()
+        result = function(*args)
+        self.timings[name].append(perf_counter() - start)
+        return result
+
+    def publish(self, *args):
+        return self._timed("publish", super().publish, *args)
+
+    def members(self):
+        return self._timed("members", super().members)
+
+    def choose(self, *args):
+        return self._timed("choose", super().choose, *args)
+
+
+class Tally:
+    """
+    Duplicate targets of a team, tick by tick
+    """
+
+    def __init__(self):
+        self.board = None
+        self.targets = []
+        self.duplicates = 0
+
+    def add(self, board, target):
+        if board is not self.board:
+            self.flush()
+            self.board = board
+        if target is not None:
+            self.targets.append((target.x, target.y))
+
+    def flush(self):
+        seen = {}
+        for target in self.targets:
+            seen[target] = seen.get(target, 0) + 1
+        self.duplicates += sum(count for count in seen.values() if count > 1)
+        self.targets = []
+
+
+class Player(GreedyDiamondBot):
+    def __init__(self, tally: Tally):
+        super().__init__()
+        self.tally = tally
+        self.chosen = None
+
+    def find_best_diamond(self, *args):
+        self.chosen = super().find_best_diamond(*args)
+        return self.chosen
+
+    def next_move(self, board_bot, board):
+        self.chosen = None
+        move = super().next_move(board_bot, board)
+        if self.team is not None:
+            target = self.team.target
+        else:
+            target = self.chosen.position if self.chosen is not None else None
+        self.tally.add(board, target)
+        return move
+
+
+def mean_us(values) -> str:
+    return "{:.1f}".format(sum(values) / len(values) * 1e6) if values else "-"
+
+
+def play(size: int, seed: int, seconds: int, board: int, timed: bool = False):
+    """
+    :return: scores and duplicates of both teams, the teams of the
+        coordinated bots and the seconds of every next_move of both teams
+    """
+    # Room for two teams of size bots, keeping the density of a 15x15 board
+    side = max(15, int(15 * (size / 2) ** 0.5))
+    simulator = Simulator(
+        SimulatorConfig(width=side, height=side, seconds=seconds), seed=seed
+    )
+    together, alone = Tally(), Tally()
+    decisions = {"team": [], "alone": []}
+    controllers = {}
+    teams = []
+    for i in range(size):
+        player = Player(together)
+        player.team = (TimedTeam if timed else Team)("bench", board)
+        teams.append(player.team)
+        controllers["team{}".format(i)] = player
+        controllers["alone{}".format(i)] = Player(alone)
+    scores = simulator.play(
+        controllers,
+        lambda name, seconds: decisions[name.rstrip("0123456789")].append(seconds),
+    )
+    together.flush()
+    alone.flush()
+    for team in teams:
+        team.close()
+
+    def total(prefix):
+        return sum(score for name, score in scores.items() if name.startswith(prefix))
+
+    return (
+        (total("team"), together.duplicates),
+        (total("alone"), alone.duplicates),
+        teams,
+        decisions,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--seconds", type=int, default=60)
+    args = parser.parse_args()
+    # Segments of this run only, apart from any running team
+    board = os.getpid()
+
+    print("Per tick, in microseconds")
+    print(
+        "{:>6} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "team", "publish", "members", "choose", "next_move", "alone"
+        )
+    )
+    for size in args.sizes:
+        _, _, teams, decisions = play(size, 0, args.seconds, board, timed=True)
+        timings = {name: [] for name in teams[0].timings}
+        for team in teams:
+            for name, values in team.timings.items():
+                timings[name] += values
+        print(
+            "{:>6} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+                size,
+                mean_us(timings["publish"]),
+                mean_us(timings["members"]),
+                mean_us(timings["choose"]),
+                mean_us(decisions["team"]),
+                mean_us(decisions["alone"]),
+            )
+        )
+
+    print()
+    print("Over {} games".format(args.games))
+    print(
+        "{:>6} {:>12} {:>12} {:>14} {:>14}".format(
+            "team", "score", "score alone", "duplicates", "dup. alone"
+        )
+    )
+    for size in args.sizes:
+        results = [
+            play(size, seed, args.seconds, board)[:2] for seed in range(args.games)
+        ]
+        print(
+            "{:>6} {:>12} {:>12} {:>14} {:>14}".format(
+                size,
+                sum(together[0] for together, _ in results),
+                sum(alone[0] for _, alone in results),
+                sum(together[1] for together, _ in results),
+                sum(alone[1] for _, alone in results),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Keeping the threat field up to date: building it again for every board
+versus re-stamping only the bots that moved, by number of bots, and the cost
+of reading the threat of a cell.
+
+    python benchmarks/bench_threat.py [--bots 4 16 64 256] [--moving 2]
+"""
+import argparse
+import os
+import random
+import sys
+from dataclasses import replace
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.synthetic import board_json
+from game import codec
+from game.models import Position
+from game.threat import ThreatField
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=[4, 16, 64, 256])
+    parser.add_argument("--moving", type=int, default=2, help="Bots moved per tick")
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        "{:>6} {:>8} {:>12} {:>14} {:>8} {:>10}".format(
+            "bots", "board", "rebuild", "incremental", "speedup", "at()"
+        )
+    )
+    for bots in args.bots:
+        side = max(15, int((bots * 12) ** 0.5))
+        board = codec.board_from_dict(
+            board_json(width=side, height=side, diamonds=bots, bots=bots)
+        )
+        rng = random.Random(0)
+        objects = list(board.game_objects)
+        robots = [i for i, obj in enumerate(objects) if obj.type == "BotGameObject"]
+        # The bots moved on every tick, as (index, moved object)
+        ticks = []
+        for _ in range(args.ticks):
+            moved = []
+            for i in rng.sample(robots, min(args.moving, len(robots))):
+                obj = objects[i]
+                p = obj.position
+                x = min(side - 1, max(0, p.x + rng.choice((-1, 1))))
+                objects[i] = replace(obj, position=Position(x=x, y=p.y))
+                moved.append(objects[i])
+            ticks.append((list(objects), moved))
+
+        start = perf_counter()
+        for snapshot, _ in ticks:
+            ThreatField(side, side, snapshot)
+        rebuild = (perf_counter() - start) / len(ticks)
+
+        field = ThreatField(side, side, board.game_objects)
+        start = perf_counter()
+        for _, moved in ticks:
+            for obj in moved:
+                field.add(obj)
+        incremental = (perf_counter() - start) / len(ticks)
+
+        cells = [
+            Position(x=rng.randrange(side), y=rng.randrange(side)) for _ in range(1000)
+        ]
+        start = perf_counter()
+        for cell in cells:
+            field.at(cell)
+        read = (perf_counter() - start) / len(cells)
+        print(
+            "{:>6} {:>8} {:>10.1f}us {:>12.1f}us {:>7.1f}x {:>8.2f}us".format(
+                bots,
+                "{}x{}".format(side, side),
+                rebuild * 1e6,
+                incremental * 1e6,
+                rebuild / incremental,
+                read * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
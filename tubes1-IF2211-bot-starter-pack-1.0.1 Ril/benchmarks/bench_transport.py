@@ -0,0 +1,69 @@
+"""
+Round-trip latency of a bots_move style request against a local stand-in
+server: one-off module level requests calls (the old Api._req) versus the
+pooled keep-alive transports.
+
+    python benchmarks/bench_transport.py [--requests 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.standin_server import sample_board, serve
+from game.transport import TRANSPORTS, make_transport
+
+
+def _legacy(url: str, body: dict):
+    import requests
+
+    headers = {"Content-Type": "application/json"}
+    return requests.post(url, headers=headers, data=json.dumps(body))
+
+
+def _time(func, n: int):
+    samples = []
+    for _ in range(n):
+        start = perf_counter()
+        res = func()
+        samples.append(perf_counter() - start)
+        assert res.status_code == 200
+    samples.sort()
+    return (
+        statistics.mean(samples) * 1e6,
+        samples[len(samples) // 2] * 1e6,
+        samples[int(len(samples) * 0.95)] * 1e6,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = serve(sample_board())
+    url = base_url + "/bots/token/move"
+    body = {"direction": "NORTH"}
+    encoded = json.dumps(body).encode()
+
+    cases = {"requests (one-off)": lambda: _legacy(url, body)}
+    for name in TRANSPORTS:
+        transport = make_transport(name)
+        cases[name + " (pooled)"] = (
+            lambda t=transport: t.request("post", url, encoded)
+        )
+
+    print("{:<24}{:>12}{:>12}{:>12}".format("backend", "mean us", "p50 us", "p95 us"))
+    for name, func in cases.items():
+        func()
+        mean, p50, p95 = _time(func, args.requests)
+        print("{:<24}{:>12.0f}{:>12.0f}{:>12.0f}".format(name, mean, p50, p95))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
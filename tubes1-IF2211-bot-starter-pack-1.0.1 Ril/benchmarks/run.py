@@ -0,0 +1,181 @@
+"""
+The hot paths timed one at a time on synthetic boards, compared against a
+baseline recorded earlier on the same machine.
+
+Every case is timed on every board: decoding the payload keys, building the
+Board with dacite and with game.codec, the Board.bots, diamonds and get_bot
+lookups (warm, and cold right after the indexes are dropped) and
+GreedyDiamondBot.next_move, plus util.get_direction once. A case is timed as
+the best of --repeat runs, each long enough to be measured, so other load on
+the machine mostly shows up as noise in the slower runs.
+
+    python benchmarks/run.py --save              record the baseline
+    python benchmarks/run.py                     compare against it
+
+Boards are WIDTHxHEIGHT:DIAMONDS:BOTS:TELEPORTERS. The run fails when a
+case got slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dacite import from_dict
+
+from benchmarks.synthetic import board_json
+from decode import decode
+from game import codec
+from game.logic.kece import GreedyDiamondBot
+from game.models import Board, Bot
+from game.util import get_direction
+
+DEFAULT_BOARDS = ["15x15:20:4:1", "50x50:200:16:2", "100x100:1000:64:4"]
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+DEFAULT_THRESHOLD = 0.25
+
+
+def parse_board(spec: str) -> dict:
+    """
+    :param spec: WIDTHxHEIGHT:DIAMONDS:BOTS:TELEPORTERS, the last three optional
+    """
+    size, *counts = spec.split(":")
+    width, _, height = size.partition("x")
+    names = ("diamonds", "bots", "teleporters")
+    options = {"width": int(width), "height": int(height or width)}
+    options.update({name: int(count) for name, count in zip(names, counts)})
+    return options
+
+
+def cases(raw: dict) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    (name, function) of every case timed on one board payload
+    """
+    decoded = decode(raw)
+    board = codec.board_from_dict(raw)
+    board_bot = board.bots[0]
+    bot = Bot(name=board_bot.properties.name, email="", id="")
+    logic = GreedyDiamondBot()
+
+    def cold(lookup):
+        def run():
+            board.reindex()
+            return lookup()
+
+        return run
+
+    def next_move():
+        return logic.next_move(board_bot, board)
+
+    return [
+        ("decode.decode", lambda: decode(raw)),
+        ("dacite.from_dict(Board)", lambda: from_dict(Board, decoded)),
+        ("codec.board_from_dict", lambda: codec.board_from_dict(raw)),
+        ("Board.bots", lambda: board.bots),
+        ("Board.bots cold", cold(lambda: board.bots)),
+        ("Board.diamonds", lambda: board.diamonds),
+        ("Board.diamonds cold", cold(lambda: board.diamonds)),
+        ("Board.get_bot", lambda: board.get_bot(bot)),
+        ("Board.get_bot cold", cold(lambda: board.get_bot(bot))),
+        ("GreedyDiamondBot.next_move", next_move),
+        # Indexes, the spatial one included, built again every call
+        ("GreedyDiamondBot.next_move cold", cold(next_move)),
+    ]
+
+
+def per_call(function: Callable[[], object], repeat: int) -> float:
+    """
+    Best seconds per call over repeat runs of at least 0.2 seconds
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(boards: List[str], repeat: int, only: str) -> Dict[str, float]:
+    results = {}
+    all_cases = [
+        ("util.get_direction", lambda: get_direction(3, 4, 10, 12), None),
+    ]
+    for spec in boards:
+        raw = board_json(**parse_board(spec))
+        all_cases += [(name, function, spec) for name, function in cases(raw)]
+    for name, function, spec in all_cases:
+        key = name if spec is None else "{} [{}]".format(name, spec)
+        if only and only not in key:
+            continue
+        results[key] = per_call(function, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", nargs="+", default=DEFAULT_BOARDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="", help="Run the cases containing this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="Record this run as the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative slowdown against the baseline. Default: {}".format(
+            DEFAULT_THRESHOLD
+        ),
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    results = run(args.boards, args.repeat, args.only)
+    regressions = []
+    print("{:<52}{:>14}{:>14}{:>9}".format("", "us per call", "baseline", "change"))
+    for key, seconds in results.items():
+        before = baseline.get(key)
+        line = "{:<52}{:>14.2f}".format(key, seconds * 1e6)
+        if before:
+            change = seconds / before - 1
+            line += "{:>14.2f}{:>+8.0%}".format(before * 1e6, change)
+            if change > args.threshold:
+                regressions.append(key)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "processor": platform.processor(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print("Baseline written to {}".format(args.baseline))
+    elif not baseline:
+        print("No baseline at {}, record one with --save".format(args.baseline))
+    if regressions:
+        print(
+            "{} cases slower than the baseline by more than {:.0%}".format(
+                len(regressions), args.threshold
+            )
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+A tiny local stand-in for the game server, used by the benchmarks.
+It answers every request with a fixed board payload over HTTP/1.1 keep-alive.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+def sample_board(board_id: int = 1) -> dict:
+    return {
+        "id": board_id,
+        "width": 15,
+        "height": 15,
+        "features": [],
+        "minimumDelayBetweenMoves": 100,
+        "gameObjects": [
+            {
+                "id": 1,
+                "position": {"x": 1, "y": 1},
+                "type": "BotGameObject",
+                "properties": {
+                    "name": "stima",
+                    "diamonds": 0,
+                    "score": 0,
+                    "inventorySize": 5,
+                    "canTackle": True,
+                    "millisecondsLeft": 60000,
+                    "base": {"x": 1, "y": 1},
+                },
+            }
+        ]
+        + [
+            {
+                "id": 10 + i,
+                "position": {"x": i % 15, "y": i // 15},
+                "type": "DiamondGameObject",
+                "properties": {"points": 1 + i % 2},
+            }
+            for i in range(20)
+        ],
+    }
+
+
+def serve(payload: dict) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start a stand-in server in a daemon thread
+    :param payload: dict returned as {"data": payload} for every request
+    :return: (server, base url); server.requests counts what it answered
+    """
+    body = json.dumps({"data": payload}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Node answers with Nagle disabled, so should the stand-in
+        disable_nagle_algorithm = True
+
+        def _answer(self):
+            with self.server.lock:
+                self.server.requests += 1
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _answer
+        do_POST = _answer
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+        requests = 0
+        lock = threading.Lock()
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:{}/api".format(server.server_address[1])
@@ -0,0 +1,127 @@
+"""
+Generator for synthetic board payloads in the camelCase shape the game
+server sends, for benchmarking the hot paths on boards of any size.
+"""
+import json
+import random
+from typing import Optional
+
+
+def board_json(
+    width: int = 15,
+    height: int = 15,
+    diamonds: int = 20,
+    bots: int = 4,
+    teleporters: int = 1,
+    button: bool = True,
+    seed: Optional[int] = 0,
+    board_id: int = 1,
+) -> dict:
+    """
+    Build a board payload
+    :param teleporters: number of teleporter pairs
+    :return: dict as returned in the "data" field of GET /boards/{id}
+    """
+    rng = random.Random(seed)
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    needed = diamonds + bots * 2 + teleporters * 2 + int(button)
+    if needed > len(cells):
+        raise ValueError("Board too small for {} objects".format(needed))
+    free = iter(rng.sample(cells, needed))
+    objects = []
+    next_id = iter(range(1, needed + 1))
+
+    for i in range(bots):
+        bx, by = next(free)
+        x, y = next(free)
+        name = "bot{}".format(i)
+        objects.append(
+            {
+                "id": next(next_id),
+                "position": {"x": bx, "y": by},
+                "type": "BaseGameObject",
+                "properties": {"name": name},
+            }
+        )
+        objects.append(
+            {
+                "id": next(next_id),
+                "position": {"x": x, "y": y},
+                "type": "BotGameObject",
+                "properties": {
+                    "diamonds": rng.randint(0, 4),
+                    "score": rng.randint(0, 30),
+                    "name": name,
+                    "inventorySize": 5,
+                    "canTackle": True,
+                    "millisecondsLeft": 45000,
+                    "timeJoined": "2024-03-01T10:00:00.000Z",
+                    "base": {"x": bx, "y": by},
+                },
+            }
+        )
+    for i in range(teleporters):
+        pair_id = str(1000 + i)
+        for _ in range(2):
+            x, y = next(free)
+            objects.append(
+                {
+                    "id": next(next_id),
+                    "position": {"x": x, "y": y},
+                    "type": "TeleportGameObject",
+                    "properties": {"pairId": pair_id},
+                }
+            )
+    if button:
+        x, y = next(free)
+        objects.append(
+            {
+                "id": next(next_id),
+                "position": {"x": x, "y": y},
+                "type": "DiamondButtonGameObject",
+                "properties": {},
+            }
+        )
+    for _ in range(diamonds):
+        x, y = next(free)
+        objects.append(
+            {
+                "id": next(next_id),
+                "position": {"x": x, "y": y},
+                "type": "DiamondGameObject",
+                "properties": {"points": 2 if rng.random() < 0.2 else 1},
+            }
+        )
+
+    return {
+        "id": board_id,
+        "width": width,
+        "height": height,
+        "features": [
+            {
+                "name": "DiamondButtonFeature",
+                "config": None,
+            },
+            {
+                "name": "TeleportFeature",
+                "config": {"pairs": teleporters},
+            },
+            {
+                "name": "DiamondsFeature",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": 0.2,
+                },
+            },
+        ],
+        "minimumDelayBetweenMoves": 100,
+        "gameObjects": objects,
+    }
+
+
+def board_bytes(**options) -> bytes:
+    """
+    Board payload wrapped and encoded the way the server sends it
+    """
+    return json.dumps({"data": board_json(**options)}).encode()
@@ -1,5 +1,9 @@
 import re
 
+# The server only ever sends a handful of distinct keys, so every conversion
+# is remembered instead of running the regular expressions again
+_SNAKE_CASE_KEYS = {}
+
 
 def _unpack(data):
     if isinstance(data, dict):
@@ -17,13 +21,25 @@ def _snake_case(value):
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
 
 
+def snake_case(value):
+    """
+    Memoised version of _snake_case
+    :param value: string
+    :return: string
+    """
+    converted = _SNAKE_CASE_KEYS.get(value)
+    if converted is None:
+        converted = _SNAKE_CASE_KEYS[value] = _snake_case(value)
+    return converted
+
+
 def _keys_to_snake_case(content):
     """
     Convert all keys for given dict to snake case
     :param content: dict
     :return: dict
     """
-    return {_snake_case(key): value for key, value in content.items()}
+    return {snake_case(key): value for key, value in content.items()}
 
 
 def decode_keys(data):
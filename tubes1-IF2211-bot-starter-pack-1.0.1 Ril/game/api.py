@@ -1,44 +1,96 @@
 import json
 from dataclasses import dataclass
+from time import perf_counter
 from typing import List, Optional, Tuple, Union
 
-import requests
-from colorama import Back, Fore, Style, init
-from dacite import from_dict
-from decode import decode
+from game.board_state import BoardState
+from game.codec import (
+    board_from_dict,
+    boards_from_list,
+    bot_from_dict,
+    loads,
+    unwrap,
+)
+from game.log import DEBUG, INFO, log
+from game.metrics import metrics
 from game.models import Board, Bot
-from requests import Response
+from game.transport import HttpResponse, Transport, make_transport
+
+DIRECTIONS = ("NORTH", "SOUTH", "EAST", "WEST")
+# Move bodies never change, so encode them once instead of on every tick
+_MOVE_BODIES = {
+    direction: json.dumps({"direction": direction}).encode()
+    for direction in DIRECTIONS
+}
 
 
 @dataclass
 class Api:
     url: str
+    transport: Optional[Transport] = None
+    # When set, boards are decoded incrementally against the last snapshot
+    board_state: Optional[BoardState] = None
+
+    def __post_init__(self):
+        if self.transport is None:
+            self.transport = make_transport()
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
-    def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
-            )
-        )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
+    def _board(self, data: dict) -> Board:
+        timing = metrics.enabled
+        if timing:
+            start = perf_counter()
+        if self.board_state is not None:
+            board = self.board_state.board_from_dict(data)
+        else:
+            board = board_from_dict(data)
+        if timing:
+            metrics.observe("construct", perf_counter() - start)
+        return board
+
+    @staticmethod
+    def _encode_body(body: Union[dict, bytes, None]) -> Optional[bytes]:
+        if isinstance(body, dict):
+            return json.dumps(body).encode() if body else None
+        return body
+
+    @staticmethod
+    def _log_request(endpoint: str, method: str, body: Union[dict, bytes]) -> None:
+        # The writer thread formats the fields, bytes included
+        log.debug("request", method=method.upper(), endpoint=endpoint, body=body)
+
+    @staticmethod
+    def _log_response(res: HttpResponse) -> None:
         if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+            log.debug("response", status=res.status_code)
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            log.info("response", status=res.status_code, text=res.text)
+
+    def _req(
+        self, endpoint: str, method: str, body: Union[dict, bytes]
+    ) -> HttpResponse:
+        # Only called when someone listens, so no fields are built otherwise
+        if log.level <= DEBUG:
+            self._log_request(endpoint, method, body)
+        timing = metrics.enabled
+        if timing:
+            start = perf_counter()
+        res = self.transport.request(
+            method, self._get_url(endpoint), self._encode_body(body)
+        )
+        if timing:
+            metrics.observe("http", perf_counter() - start)
+        if log.level <= INFO:
+            self._log_response(res)
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
         response = self._req("/bots/{}".format(bot_token), "get", {})
         data, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            return bot_from_dict(data)
         return None
 
     def bots_register(
@@ -51,14 +103,14 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            return bot_from_dict(resp)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return boards_from_list(resp)
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
@@ -75,18 +127,18 @@ class Api:
         response = self._req("/boards/{}".format(board_id), "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._board(resp)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
         response = self._req(
             "/bots/{}/move".format(bot_token),
             "post",
-            {"direction": direction},
+            _MOVE_BODIES.get(direction) or {"direction": direction},
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._board(resp)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -101,13 +153,16 @@ class Api:
         except:
             return None
 
+    def close(self) -> None:
+        self.transport.close()
+
+    @staticmethod
     def _return_response_and_status(
-        self, response: Response
+        response: HttpResponse,
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
-
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
-
-        return decode(response_data), response.status_code
+        if not metrics.enabled:
+            return unwrap(loads(response.content)), response.status_code
+        start = perf_counter()
+        data = loads(response.content)
+        metrics.observe("decode", perf_counter() - start)
+        return unwrap(data), response.status_code
@@ -0,0 +1,264 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from game.api import _MOVE_BODIES, Api
+from game.codec import board_from_dict, boards_from_list, bot_from_dict
+from game.log import DEBUG, INFO, log
+from game.models import Board, Bot
+from game.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    JSON_HEADERS,
+    HttpResponse,
+)
+
+DEFAULT_ASYNC_POOL_SIZE = 512
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHttpTransport:
+    """
+    Non-blocking HTTP/1.1 keep-alive client on top of asyncio streams.
+    Idle connections are pooled per host and shared by every coroutine
+    running on the same event loop.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = DEFAULT_ASYNC_POOL_SIZE,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self._idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+        self._limits: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self._headers = "".join(
+            "{}: {}\r\n".format(k, v) for k, v in JSON_HEADERS.items()
+        )
+
+    @staticmethod
+    def _key(url: str) -> Tuple[Tuple[str, str, int], str]:
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        port = parts.port or (443 if https else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (parts.scheme, parts.hostname, port), path
+
+    async def _open(self, key: Tuple[str, str, int]) -> Tuple[_Connection, bool]:
+        """
+        :return: a connection, and whether it came from the idle pool
+        """
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=scheme == "https"),
+            self.connect_timeout,
+        )
+        return conn, False
+
+    async def _exchange(
+        self, conn: _Connection, head: bytes, body: Optional[bytes]
+    ) -> Tuple[HttpResponse, bool]:
+        reader, writer = conn
+        writer.write(head + body if body else head)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        status = int(status_line.split()[1])
+        length = None
+        chunked = False
+        keep_alive = status_line.startswith(b"HTTP/1.1")
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = value.lower() == b"chunked"
+            elif name == b"connection":
+                keep_alive = value.lower() == b"keep-alive"
+
+        if chunked:
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            content = b"".join(parts)
+        elif length is not None:
+            content = await reader.readexactly(length)
+        else:
+            content = await reader.read()
+            keep_alive = False
+        return HttpResponse(status, content), keep_alive
+
+    async def request(
+        self, method: str, url: str, body: Optional[bytes] = None
+    ) -> HttpResponse:
+        key, path = self._key(url)
+        method = method.upper()
+        head = (
+            "{} {} HTTP/1.1\r\nHost: {}:{}\r\n{}Content-Length: {}\r\n\r\n".format(
+                method, path, key[1], key[2], self._headers, len(body or b"")
+            ).encode()
+        )
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.pool_size)
+
+        async with limit:
+            attempt = 0
+            while True:
+                reused = False
+                conn = None
+                sent = False
+                try:
+                    conn, reused = await self._open(key)
+                    sent = True
+                    res, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, head, body), self.read_timeout
+                    )
+                    if keep_alive:
+                        self._idle.setdefault(key, []).append(conn)
+                    else:
+                        conn[1].close()
+                    return res
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        ValueError, IndexError) as e:
+                    if conn is not None:
+                        conn[1].close()
+                    stale = reused and isinstance(
+                        e, (ConnectionError, asyncio.IncompleteReadError)
+                    )
+                    if attempt >= self.retries or not (
+                        not sent or method == "GET" or stale
+                    ):
+                        raise
+                    attempt += 1
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+@dataclass
+class AsyncApi:
+    """
+    Coroutine version of Api. Every method mirrors its blocking counterpart
+    and returns the same models.
+    """
+
+    url: str
+    transport: Optional[AsyncHttpTransport] = None
+
+    def __post_init__(self):
+        if self.transport is None:
+            self.transport = AsyncHttpTransport()
+
+    def _get_url(self, endpoint: str) -> str:
+        return "{}{}".format(self.url, endpoint)
+
+    async def _req(
+        self, endpoint: str, method: str, body: Union[dict, bytes]
+    ) -> HttpResponse:
+        if log.level <= DEBUG:
+            Api._log_request(endpoint, method, body)
+        res = await self.transport.request(
+            method, self._get_url(endpoint), Api._encode_body(body)
+        )
+        if log.level <= INFO:
+            Api._log_response(res)
+        return res
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        response = await self._req("/bots/{}".format(bot_token), "get", {})
+        data, status = Api._return_response_and_status(response)
+        if status == 200:
+            return bot_from_dict(data)
+        return None
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        response = await self._req(
+            "/bots",
+            "post",
+            {"email": email, "name": name, "password": password, "team": team},
+        )
+        resp, status = Api._return_response_and_status(response)
+        if status == 200:
+            return bot_from_dict(resp)
+        return None
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        response = await self._req("/boards", "get", {})
+        resp, status = Api._return_response_and_status(response)
+        if status == 200:
+            return boards_from_list(resp)
+        return None
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        response = await self._req(
+            f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
+        )
+        resp, status = Api._return_response_and_status(response)
+        return status == 200
+
+    async def boards_get(self, board_id: str) -> Optional[Board]:
+        response = await self._req("/boards/{}".format(board_id), "get", {})
+        resp, status = Api._return_response_and_status(response)
+        if status == 200:
+            return board_from_dict(resp)
+        return None
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        response = await self._req(
+            "/bots/{}/move".format(bot_token),
+            "post",
+            _MOVE_BODIES.get(direction) or {"direction": direction},
+        )
+        resp, status = Api._return_response_and_status(response)
+        if status == 200:
+            return board_from_dict(resp)
+        return None
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        try:
+            response = await self._req(
+                "/bots/recover", "post", {"email": email, "password": password}
+            )
+            resp, status = Api._return_response_and_status(response)
+            if status == 201:
+                return resp["id"]
+            return None
+        except:
+            return None
+
+    async def close(self) -> None:
+        await self.transport.close()
@@ -0,0 +1,186 @@
+"""
+One board fetch shared by every bot of the process that sits on the board.
+
+When several of our bots play on the same board, each asking for it would
+cost one request and one decode per bot for what is the same snapshot.
+BoardCache (threads) and AsyncBoardCache (asyncio) keep the latest snapshot
+of every board and coalesce concurrent requests: the first caller fetches,
+the others wait for it and get the same decoded Board, and a failed fetch
+fails for all of them.
+
+A snapshot stays fresh for FRESH_TICKS of the board's
+minimum_delay_between_moves, unless max_age says otherwise, and any newer
+board a bot already holds (the answer to its move) can be offered to the
+cache so the others see it without a request. Snapshots are stamped with
+the time their request was sent: a late answer never replaces a board
+asked for after it.
+
+Bots must not modify a shared Board; controllers only ever read it, and
+BoardState swaps in equal objects only.
+"""
+import asyncio
+import threading
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from game.models import Board
+
+# Share of a tick a snapshot is served for. Every bot moves at most once a
+# tick, so half of one keeps snapshots at most half a move behind
+FRESH_TICKS = 0.5
+
+
+class _Snapshots:
+    def __init__(self, max_age: Optional[float] = None):
+        """
+        :param max_age: seconds a snapshot is fresh, by default FRESH_TICKS
+            of the board's move delay
+        """
+        self.max_age = max_age
+        # Board and the time its request was sent
+        self._boards: Dict[int, Tuple[Board, float]] = {}
+        self.fetches = 0
+        self.hits = 0
+        self.shared = 0
+
+    def _fresh(self, board_id: int) -> Optional[Board]:
+        entry = self._boards.get(board_id)
+        if entry is None:
+            return None
+        board, sent = entry
+        max_age = self.max_age
+        if max_age is None:
+            max_age = FRESH_TICKS * (board.minimum_delay_between_moves or 0) / 1000
+        if perf_counter() - sent >= max_age:
+            return None
+        return board
+
+    def offer(self, board_id: int, board: Optional[Board], sent: float) -> None:
+        """
+        Keep a snapshot obtained otherwise, e.g. the answer to a move
+        :param sent: perf_counter() when the request for it was sent
+        """
+        self._store(board_id, board, sent)
+
+    def _store(self, board_id: int, board: Optional[Board], sent: float) -> None:
+        if board is None:
+            return
+        entry = self._boards.get(board_id)
+        if entry is None or entry[1] <= sent:
+            self._boards[board_id] = (board, sent)
+
+    def forget(self, board_id: int) -> None:
+        self._boards.pop(board_id, None)
+
+    def summary(self) -> str:
+        asked = self.fetches + self.hits + self.shared
+        return "{} boards asked for, {} fetched, {} cached, {} shared".format(
+            asked, self.fetches, self.hits, self.shared
+        )
+
+
+class _Flight:
+    __slots__ = ("done", "board", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.board: Optional[Board] = None
+        self.error: Optional[BaseException] = None
+
+
+class BoardCache(_Snapshots):
+    def __init__(
+        self,
+        fetch: Callable[[int], Optional[Board]],
+        max_age: Optional[float] = None,
+    ):
+        """
+        :param fetch: fetches a board by id, e.g. Api.boards_get
+        """
+        super().__init__(max_age)
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self._flights: Dict[int, _Flight] = {}
+
+    def get(self, board_id: int) -> Optional[Board]:
+        with self._lock:
+            board = self._fresh(board_id)
+            if board is not None:
+                self.hits += 1
+                return board
+            flight = self._flights.get(board_id)
+            leader = flight is None
+            if leader:
+                flight = self._flights[board_id] = _Flight()
+                self.fetches += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.board
+
+        sent = perf_counter()
+        try:
+            flight.board = self.fetch(board_id)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[board_id]
+                self._store(board_id, flight.board, sent)
+            flight.done.set()
+        return flight.board
+
+    def offer(self, board_id: int, board: Optional[Board], sent: float) -> None:
+        with self._lock:
+            self._store(board_id, board, sent)
+
+
+class AsyncBoardCache(_Snapshots):
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[Optional[Board]]],
+        max_age: Optional[float] = None,
+    ):
+        """
+        :param fetch: coroutine function fetching a board by id, e.g.
+            AsyncApi.boards_get
+        """
+        super().__init__(max_age)
+        self.fetch = fetch
+        self._flights: Dict[int, asyncio.Future] = {}
+
+    async def get(self, board_id: int) -> Optional[Board]:
+        board = self._fresh(board_id)
+        if board is not None:
+            self.hits += 1
+            return board
+        flight = self._flights.get(board_id)
+        if flight is not None:
+            self.shared += 1
+            # Shielded so a waiter being cancelled does not cancel the fetch
+            return await asyncio.shield(flight)
+
+        flight = self._flights[board_id] = asyncio.get_running_loop().create_future()
+        self.fetches += 1
+        sent = perf_counter()
+        try:
+            board = await self.fetch(board_id)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                flight.cancel()
+            else:
+                flight.set_exception(e)
+                # Retrieved here, so nobody waiting is not an error
+                flight.exception()
+            raise
+        else:
+            self._store(board_id, board, sent)
+            flight.set_result(board)
+        finally:
+            del self._flights[board_id]
+        return board
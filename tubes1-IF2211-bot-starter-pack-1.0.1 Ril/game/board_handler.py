@@ -1,14 +1,19 @@
 from dataclasses import dataclass
-from typing import Union, List
+from typing import Union, List, Optional
 from game.api import Api
+from game.board_cache import BoardCache
 from game.models import Board
 
 @dataclass
 class BoardHandler:
     api: Api
+    # Shared by the handlers of bots on the same board, to fetch it once
+    cache: Optional[BoardCache] = None
 
     def list_boards(self) -> List[Board]:
         return self.api.boards_list()
 
     def get_board(self, board_id: int) -> Board:
+        if self.cache is not None:
+            return self.cache.get(board_id)
         return self.api.boards_get(board_id)
@@ -0,0 +1,241 @@
+"""
+Incremental tracking of a board across ticks.
+
+Every response carries the whole board. BoardState diffs each new snapshot
+against the previous one by GameObject.id, hands back the previous instance
+for every object that did not change and reports what did, so controllers
+and indexes can update instead of starting from scratch.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from game import codec
+from game.history import History
+from game.models import BOT, DIAMOND, DIAMOND_BUTTON, Board, GameObject, Position
+
+
+@dataclass
+class BoardChanges:
+    # Objects that appeared or disappeared, as seen on the new/old board
+    added: List[GameObject] = field(default_factory=list)
+    removed: List[GameObject] = field(default_factory=list)
+    # (object, previous position) for every object that changed cell
+    moved: List[Tuple[GameObject, Position]] = field(default_factory=list)
+    # (previous, current) for every object whose properties changed
+    updated: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    # True when the snapshot cannot be diffed against the previous one:
+    # first board, another board, or all diamonds regenerated at once
+    reset: bool = False
+
+    @property
+    def spawned(self) -> List[GameObject]:
+        return [obj for obj in self.added if obj.type == DIAMOND]
+
+    @property
+    def collected(self) -> List[GameObject]:
+        return [obj for obj in self.removed if obj.type == DIAMOND]
+
+    @property
+    def bots_moved(self) -> List[Tuple[GameObject, Position]]:
+        return [(obj, old) for obj, old in self.moved if obj.type == BOT]
+
+    @property
+    def inventory(self) -> List[Tuple[GameObject, int, int]]:
+        """
+        (bot, previous diamonds, current diamonds) for every bot whose
+        inventory changed
+        """
+        changes = []
+        for old, new in self.updated:
+            if new.type == BOT and old.properties and new.properties:
+                if old.properties.diamonds != new.properties.diamonds:
+                    changes.append(
+                        (new, old.properties.diamonds, new.properties.diamonds)
+                    )
+        return changes
+
+    @property
+    def empty(self) -> bool:
+        return not (
+            self.added or self.removed or self.moved or self.updated or self.reset
+        )
+
+    def cells(self) -> Set[Tuple[int, int]]:
+        """
+        Every cell whose content changed
+        """
+        touched = set()
+        for obj in self.added:
+            touched.add((obj.position.x, obj.position.y))
+        for obj in self.removed:
+            touched.add((obj.position.x, obj.position.y))
+        for obj, old in self.moved:
+            touched.add((old.x, old.y))
+            touched.add((obj.position.x, obj.position.y))
+        for _, obj in self.updated:
+            touched.add((obj.position.x, obj.position.y))
+        return touched
+
+
+class BoardState:
+    def __init__(self):
+        self.board: Optional[Board] = None
+        self.changes: BoardChanges = BoardChanges(reset=True)
+        self.ticks = 0
+        # Recent positions of every bot, for predicting where they go
+        self.history = History()
+        self._raw: Dict[int, dict] = {}
+
+    def update(self, board: Board) -> BoardChanges:
+        """
+        Diff a new snapshot against the previous one. Objects that did not
+        change are replaced in board.game_objects by their previous instance.
+        :param board: the latest board
+        :return: BoardChanges
+        """
+        if board is self.board:
+            return self.changes
+        previous = self.board
+        self.board = board
+        self.ticks += 1
+
+        if (
+            previous is None
+            or previous.id != board.id
+            or previous.width != board.width
+            or previous.height != board.height
+        ):
+            self.changes = BoardChanges(added=list(board.game_objects or ()), reset=True)
+            self.history.update(board)
+            return self.changes
+
+        changes = BoardChanges()
+        previous._index()
+        old_by_id = previous._by_id
+        objects = board.game_objects or []
+        matched = 0
+        reused = False
+        for i, obj in enumerate(objects):
+            old = old_by_id.get(obj.id)
+            if old is obj:
+                matched += 1
+                continue
+            if old is None:
+                changes.added.append(obj)
+                continue
+            matched += 1
+            if old == obj:
+                objects[i] = old
+                reused = True
+            else:
+                if old.position != obj.position:
+                    changes.moved.append((obj, old.position))
+                if old.properties != obj.properties or old.type != obj.type:
+                    changes.updated.append((old, obj))
+        if matched < len(old_by_id):
+            ids = {obj.id for obj in objects}
+            changes.removed = [
+                obj for obj in previous.game_objects if obj.id not in ids
+            ]
+        if reused:
+            board.reindex()
+
+        collected = changes.collected
+        if (
+            collected
+            and len(collected) == len(previous.diamonds)
+            and changes.spawned
+        ) or any(obj.type == DIAMOND_BUTTON for obj, _ in changes.moved):
+            # The diamond button was pressed or the diamonds were regenerated
+            changes.reset = True
+
+        self._carry_index(previous, board, changes)
+        self._carry_threat(previous, board, changes)
+        self.history.update(board)
+        self.changes = changes
+        return changes
+
+    def _carry_index(
+        self, previous: Board, board: Board, changes: BoardChanges
+    ) -> None:
+        """
+        Move the spatial index of the previous board to the new one,
+        applying the changes instead of rebuilding it
+        """
+        index = previous._spatial
+        if index is None or board._spatial is not None:
+            return
+        previous._spatial = None
+        for obj in changes.removed:
+            index.remove(obj)
+        for old, new in changes.updated:
+            index.remove(old)
+            index.add(new)
+        updated = {new.id for _, new in changes.updated}
+        for obj, old_position in changes.moved:
+            if obj.id not in updated:
+                index.remove(obj, old_position)
+                index.add(obj)
+        for obj in changes.added:
+            index.add(obj)
+        board._spatial = index
+
+    def _carry_threat(
+        self, previous: Board, board: Board, changes: BoardChanges
+    ) -> None:
+        """
+        Move the threat field of the previous board to the new one,
+        re-stamping only the bots that changed
+        """
+        threat = previous._threat
+        if threat is None or board._threat is not None:
+            return
+        previous._threat = None
+        for obj in changes.removed:
+            if obj.type == BOT:
+                threat.remove(obj)
+        for obj in changes.added:
+            if obj.type == BOT:
+                threat.add(obj)
+        stamped = set()
+        for _, new in changes.updated:
+            if new.type == BOT:
+                threat.add(new)
+                stamped.add(new.id)
+        for obj, _ in changes.moved:
+            if obj.type == BOT and obj.id not in stamped:
+                threat.add(obj)
+        board._threat = threat
+
+    def board_from_dict(self, raw: dict) -> Board:
+        """
+        Build a Board from a raw payload, reusing the previous model object
+        for every game object whose payload did not change, then diff it
+        :param raw: camelCase board payload
+        :return: Board
+        """
+        previous = self.board
+        raw_objects = raw.get("gameObjects")
+        if previous is None or previous.id != raw.get("id") or raw_objects is None:
+            board = codec.board_from_dict(raw)
+        else:
+            old_by_id = {obj.id: obj for obj in previous.game_objects or ()}
+            old_raw = self._raw
+            game_objects = []
+            for item in raw_objects:
+                old = old_by_id.get(item.get("id"))
+                if old is not None and old_raw.get(old.id) == item:
+                    game_objects.append(old)
+                else:
+                    game_objects.append(None)
+            fresh = codec.board_from_dict(
+                {**raw, "gameObjects": [
+                    item for item, obj in zip(raw_objects, game_objects) if obj is None
+                ]}
+            )
+            built = iter(fresh.game_objects)
+            fresh.game_objects = [obj or next(built) for obj in game_objects]
+            board = fresh
+        self._raw = {item.get("id"): item for item in raw_objects or ()}
+        self.update(board)
+        return board
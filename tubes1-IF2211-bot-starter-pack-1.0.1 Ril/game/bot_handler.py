@@ -3,7 +3,6 @@ import json
 from dataclasses import dataclass
 from typing import Optional
 
-import requests
 from game.api import Api
 from game.models import Board, Bot
 
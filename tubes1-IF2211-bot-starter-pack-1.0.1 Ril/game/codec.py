@@ -0,0 +1,245 @@
+"""
+Single pass decoding of server responses straight into game.models.
+
+The server sends camelCase JSON. The generic path (decode.decode followed by
+dacite.from_dict) rewrites every key with regular expressions and then walks
+the tree again with reflection. Here each payload is parsed once and the
+models are built directly from the raw dicts, using a fixed key table.
+Payloads of an unexpected shape fall back to the generic path.
+"""
+from typing import List, Optional, Union
+
+from decode import decode, snake_case
+from game.models import (
+    Base,
+    Board,
+    Bot,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+try:
+    import orjson
+
+    def loads(content: Union[bytes, str]):
+        return orjson.loads(content)
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value)
+
+    JSON_BACKEND = "orjson"
+except ImportError:
+    import json
+
+    def loads(content: Union[bytes, str]):
+        return json.loads(content)
+
+    def dumps(value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    JSON_BACKEND = "json"
+
+_CONFIG_KEYS = {
+    snake_case(key): key
+    for key in (
+        "generationRatio",
+        "minRatioForGeneration",
+        "redRatio",
+        "seconds",
+        "pairs",
+        "inventorySize",
+        "canTackle",
+    )
+}
+
+
+def unwrap(payload: Union[dict, list]) -> Union[dict, list]:
+    """
+    Return the "data" member of a response if there is one
+    :param payload: parsed response body
+    :return: dict or list
+    """
+    data = payload.get("data") if isinstance(payload, dict) else payload
+    return data if data else payload
+
+
+def _properties(raw: Optional[dict]) -> Optional[Properties]:
+    if raw is None:
+        return None
+    get = raw.get
+    base = get("base")
+    return Properties(
+        points=get("points"),
+        pair_id=get("pairId"),
+        diamonds=get("diamonds"),
+        score=get("score"),
+        name=get("name"),
+        inventory_size=get("inventorySize"),
+        can_tackle=get("canTackle"),
+        milliseconds_left=get("millisecondsLeft"),
+        time_joined=get("timeJoined"),
+        base=Base(y=base["y"], x=base["x"]) if base else None,
+    )
+
+
+def _game_object(raw: dict) -> GameObject:
+    position = raw["position"]
+    return GameObject(
+        id=raw["id"],
+        position=Position(y=position["y"], x=position["x"]),
+        type=raw["type"],
+        properties=_properties(raw.get("properties")),
+    )
+
+
+def _feature(raw: dict) -> Feature:
+    config = raw.get("config")
+    if config is not None:
+        config = Config(
+            **{
+                field: config[key]
+                for field, key in _CONFIG_KEYS.items()
+                if key in config
+            }
+        )
+    return Feature(name=raw["name"], config=config)
+
+
+def _board(raw: dict) -> Board:
+    game_objects = raw.get("gameObjects")
+    return Board(
+        id=raw["id"],
+        width=raw["width"],
+        height=raw["height"],
+        features=[_feature(feature) for feature in raw["features"]],
+        minimum_delay_between_moves=raw["minimumDelayBetweenMoves"],
+        game_objects=(
+            [_game_object(obj) for obj in game_objects]
+            if game_objects is not None
+            else None
+        ),
+    )
+
+
+def _generic(model, raw: dict):
+    from dacite import from_dict
+
+    return from_dict(model, decode(raw))
+
+
+def board_from_dict(raw: dict) -> Board:
+    """
+    Build a Board from a raw camelCase board payload
+    :param raw: dict
+    :return: Board
+    """
+    try:
+        return _board(raw)
+    except (KeyError, TypeError, AttributeError):
+        return _generic(Board, raw)
+
+
+def boards_from_list(raw: List[dict]) -> List[Board]:
+    return [board_from_dict(board) for board in raw]
+
+
+def bot_from_dict(raw: dict) -> Bot:
+    """
+    Build a Bot from a raw camelCase bot payload
+    :param raw: dict
+    :return: Bot
+    """
+    try:
+        return Bot(name=raw["name"], email=raw["email"], id=raw["id"])
+    except (KeyError, TypeError):
+        return _generic(Bot, raw)
+
+
+###############################################################################
+#
+# Encoding models back into camelCase payloads
+#
+###############################################################################
+# (Properties field, payload key) of every property but the base
+PROPERTY_KEYS = (
+    ("points", "points"),
+    ("pair_id", "pairId"),
+    ("diamonds", "diamonds"),
+    ("score", "score"),
+    ("name", "name"),
+    ("inventory_size", "inventorySize"),
+    ("can_tackle", "canTackle"),
+    ("milliseconds_left", "millisecondsLeft"),
+    ("time_joined", "timeJoined"),
+)
+
+
+def _properties_to_dict(props: Properties) -> dict:
+    raw = {}
+    for field, key in PROPERTY_KEYS:
+        value = getattr(props, field)
+        if value is not None:
+            raw[key] = value
+    if props.base is not None:
+        raw["base"] = {"x": props.base.x, "y": props.base.y}
+    return raw
+
+
+def game_object_to_dict(obj: GameObject) -> dict:
+    """
+    Raw payload of a game object, leaving out unset properties
+    :param obj: GameObject
+    :return: dict
+    """
+    position = obj.position
+    raw = {
+        "id": obj.id,
+        "position": {"x": position.x, "y": position.y},
+        "type": obj.type,
+    }
+    if obj.properties is not None:
+        raw["properties"] = _properties_to_dict(obj.properties)
+    return raw
+
+
+def feature_to_dict(feature: Feature) -> dict:
+    raw = {"name": feature.name}
+    if feature.config is not None:
+        raw["config"] = {
+            key: getattr(feature.config, field)
+            for field, key in _CONFIG_KEYS.items()
+            if getattr(feature.config, field) is not None
+        }
+    return raw
+
+
+def board_to_dict(board: Board) -> dict:
+    """
+    Raw payload of a board, the inverse of board_from_dict
+    :param board: Board
+    :return: dict
+    """
+    return {
+        "id": board.id,
+        "width": board.width,
+        "height": board.height,
+        "features": [feature_to_dict(feature) for feature in board.features],
+        "minimumDelayBetweenMoves": board.minimum_delay_between_moves,
+        "gameObjects": (
+            [game_object_to_dict(obj) for obj in board.game_objects]
+            if board.game_objects is not None
+            else None
+        ),
+    }
+
+
+def parse_board(content: Union[bytes, str]) -> Board:
+    """
+    Decode a board straight from a response body
+    :param content: bytes
+    :return: Board
+    """
+    return board_from_dict(unwrap(loads(content)))
@@ -0,0 +1,124 @@
+"""
+A fast forward model of the game rules for one bot, for search.
+
+ForwardModel freezes a board as seen by one bot and applies that bot's
+moves to a small tuple state, following the rules of game.simulator: a move
+into another bot tackles it when we can tackle (taking what fits of its
+diamonds and sending it home) and is refused otherwise, entering a
+teleporter lands on its pair, a diamond is taken when it fits in the
+inventory, and standing on our base delivers what we carry. The other bots
+stand still (a tackled one just leaves the board) and no diamonds appear,
+so the model is only good for the next few dozen moves; pressing the
+diamond button does nothing.
+
+A state is (cell, carried, delivered, taken, tackled): our cell as
+y * width + x, the points we carry, the points delivered since the model
+was made, and bitmasks of the diamonds taken and the bots tackled.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from game.models import BOT, GameObject, Board
+from game.geometry import teleporter_pairs
+
+MOVES = ((1, 0), (0, 1), (-1, 0), (0, -1))
+DEFAULT_INVENTORY_SIZE = 5
+
+State = Tuple[int, int, int, int, int]
+
+
+class ForwardModel:
+    def __init__(self, board: Board, bot: GameObject):
+        """
+        :param board: board to freeze
+        :param bot: the bot whose moves are modelled
+        """
+        width = self.width = board.width
+        self.height = board.height
+        props = bot.properties
+        self.capacity = props.inventory_size or DEFAULT_INVENTORY_SIZE
+        self.can_tackle = props.can_tackle is not False
+        base = props.base
+        self.base = base.y * width + base.x if base is not None else -1
+
+        self.diamonds: List[Tuple[int, int]] = []
+        self.diamond_at: Dict[int, int] = {}
+        for diamond in board.diamonds:
+            cell = diamond.position.y * width + diamond.position.x
+            points = diamond.properties.points if diamond.properties else 1
+            self.diamond_at.setdefault(cell, len(self.diamonds))
+            self.diamonds.append((cell, points or 1))
+
+        # (cell, carried) of every other bot
+        self.enemies: List[Tuple[int, int]] = []
+        self.enemy_at: Dict[int, int] = {}
+        for other in board.objects_of_type(BOT):
+            if other.id == bot.id:
+                continue
+            cell = other.position.y * width + other.position.x
+            carried = other.properties.diamonds if other.properties else 0
+            self.enemy_at.setdefault(cell, len(self.enemies))
+            self.enemies.append((cell, carried or 0))
+
+        self.teleports: Dict[int, int] = {}
+        for p, q in teleporter_pairs(board):
+            a, b = p.y * width + p.x, q.y * width + q.x
+            self.teleports[a] = b
+            self.teleports[b] = a
+
+        position = bot.position
+        self.start: State = (
+            position.y * width + position.x,
+            props.diamonds or 0,
+            0,
+            0,
+            0,
+        )
+
+    def step(self, state: State, move: Tuple[int, int]) -> Optional[State]:
+        """
+        State after one move, None if the move is not allowed
+        """
+        cell, carried, delivered, taken, tackled = state
+        width = self.width
+        x, y = cell % width + move[0], cell // width + move[1]
+        if not (0 <= x < width and 0 <= y < self.height):
+            return None
+        cell = y * width + x
+
+        enemy = self.enemy_at.get(cell)
+        if enemy is not None and not tackled >> enemy & 1:
+            if not self.can_tackle:
+                return None
+            carried += min(self.enemies[enemy][1], self.capacity - carried)
+            tackled |= 1 << enemy
+        landed = self.teleports.get(cell)
+        if landed is None:
+            diamond = self.diamond_at.get(cell)
+            if diamond is not None and not taken >> diamond & 1:
+                points = self.diamonds[diamond][1]
+                if carried + points <= self.capacity:
+                    carried += points
+                    taken |= 1 << diamond
+        else:
+            cell = landed
+        if cell == self.base:
+            delivered += carried
+            carried = 0
+        return cell, carried, delivered, taken, tackled
+
+    def moves(self, state: State) -> List[Tuple[Tuple[int, int], State]]:
+        """
+        (move, next state) of every allowed move
+        """
+        result = []
+        for move in MOVES:
+            after = self.step(state, move)
+            if after is not None:
+                result.append((move, after))
+        return result
+
+    def position(self, state: State) -> Tuple[int, int]:
+        """
+        (x, y) of our bot in a state
+        """
+        return state[0] % self.width, state[0] // self.width
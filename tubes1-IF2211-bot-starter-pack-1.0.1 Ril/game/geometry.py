@@ -0,0 +1,214 @@
+"""
+Distances between everything a controller scores, built once per tick.
+
+DistanceMatrix holds the number of moves between every pair of our bot, the
+bases, the diamonds and the enemy bots, taking the shorter of walking
+directly and walking through teleporters. Like Manhattan distance, it does
+not see detours around teleporter cells or other bots; game.pathfinding
+does. With NumPy installed large
+boards are built with array operations; small boards, and installs without
+NumPy, use plain lists, which are faster below NUMPY_MIN_OBJECTS objects.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from game.models import TELEPORTER, Board, GameObject, Position
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GROUPS = ("bot", "bases", "diamonds", "enemies")
+# Below this many objects the list backend builds the matrix faster than NumPy
+# (benchmarks/bench_geometry.py puts the crossover at 5-7)
+NUMPY_MIN_OBJECTS = 8
+_INFINITY = 1 << 30
+
+
+def teleporter_pairs(board: Board) -> List[Tuple[Position, Position]]:
+    """
+    Positions of both ends of every complete teleporter pair
+    :param board: Board
+    :return: list of (Position, Position)
+    """
+    pairs: Dict[str, List[GameObject]] = {}
+    for teleporter in board.objects_of_type(TELEPORTER):
+        props = teleporter.properties
+        if props is not None and props.pair_id is not None:
+            pairs.setdefault(props.pair_id, []).append(teleporter)
+    return [
+        (pair[0].position, pair[1].position)
+        for pair in pairs.values()
+        if len(pair) == 2
+    ]
+
+
+class Portals:
+    """
+    Shortcuts through the teleporters. Entering one end of a pair lands on
+    the other end within the same move, and a path may chain several pairs.
+    """
+
+    def __init__(self, pairs: Sequence[Tuple[Position, Position]]):
+        ends: List[Position] = []
+        for p, q in pairs:
+            ends.extend((p, q))
+        self.ends = ends
+        count = len(ends)
+        # standing[w][v]: moves from standing on end w to standing on end v
+        standing = [
+            [0 if w == v else _INFINITY for v in range(count)] for w in range(count)
+        ]
+        for w in range(count):
+            for z in range(count):
+                # Entering z lands on its pair, index z ^ 1
+                moves = _enter(ends[w], ends[z])
+                if moves < standing[w][z ^ 1]:
+                    standing[w][z ^ 1] = moves
+        for k in range(count):
+            for w in range(count):
+                for v in range(count):
+                    moves = standing[w][k] + standing[k][v]
+                    if moves < standing[w][v]:
+                        standing[w][v] = moves
+        # after[z][w]: moves from entering end z to standing on end w
+        self.after = [standing[z ^ 1] for z in range(count)]
+
+    def distance(self, a: Position, b: Position) -> int:
+        """
+        Moves from a to b, walking directly or through any teleporters
+        """
+        best = abs(a.x - b.x) + abs(a.y - b.y)
+        ends = self.ends
+        if not ends:
+            return best
+        to_b = [abs(end.x - b.x) + abs(end.y - b.y) for end in ends]
+        for z, end in enumerate(ends):
+            enter = _enter(a, end)
+            for w, moves in enumerate(self.after[z]):
+                via = enter + moves + to_b[w]
+                if via < best:
+                    best = via
+        return best
+
+
+def _enter(a: Position, end: Position) -> int:
+    """
+    Moves to enter a teleporter, stepping off and back on when already on it
+    """
+    moves = abs(a.x - end.x) + abs(a.y - end.y)
+    return moves if moves else 2
+
+
+class DistanceMatrix:
+    def __init__(self, board: Board, bot: GameObject, backend: Optional[str] = None):
+        """
+        :param board: latest board
+        :param bot: our bot, the first row and column
+        :param backend: "numpy" or "python", by default picked by board size
+        """
+        enemies = [other for other in board.bots if other.id != bot.id]
+        bases = board.bases
+        diamonds = board.diamonds
+        self.objects: List[GameObject] = [bot, *bases, *diamonds, *enemies]
+        bounds = {}
+        start = 0
+        for group, count in zip(GROUPS, (1, len(bases), len(diamonds), len(enemies))):
+            bounds[group] = slice(start, start + count)
+            start += count
+        self._bounds = bounds
+        self._rows: Optional[Dict[int, int]] = None
+
+        self.portals = Portals(teleporter_pairs(board))
+        if backend is None:
+            backend = (
+                "numpy"
+                if np is not None and len(self.objects) >= NUMPY_MIN_OBJECTS
+                else "python"
+            )
+        elif backend == "numpy" and np is None:
+            raise ImportError("The numpy backend needs NumPy installed")
+        self.backend = backend
+        xs = [obj.position.x for obj in self.objects]
+        ys = [obj.position.y for obj in self.objects]
+        build = _numpy_matrix if backend == "numpy" else _python_matrix
+        self.matrix = build(xs, ys, self.portals)
+
+    def slice(self, group: str) -> slice:
+        """
+        Rows and columns of one of GROUPS
+        """
+        return self._bounds[group]
+
+    def group(self, group: str) -> List[GameObject]:
+        return self.objects[self._bounds[group]]
+
+    def block(self, rows: str, columns: str):
+        """
+        Distances from every object of one group to every object of another,
+        e.g. block("enemies", "diamonds")
+        :return: 2D array, or list of lists with the python backend
+        """
+        r = self._bounds[rows]
+        c = self._bounds[columns]
+        if self.backend == "numpy":
+            return self.matrix[r, c]
+        return [row[c] for row in self.matrix[r]]
+
+    def from_bot(self, group: str):
+        """
+        Distances from our bot to every object of a group
+        :return: 1D array, or list with the python backend
+        """
+        return self.matrix[0][self._bounds[group]]
+
+    def index(self, obj: GameObject) -> int:
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = {other.id: i for i, other in enumerate(self.objects)}
+        return rows[obj.id]
+
+    def distance(self, a: GameObject, b: GameObject) -> int:
+        return int(self.matrix[self.index(a)][self.index(b)])
+
+
+def _python_matrix(xs: List[int], ys: List[int], portals: Portals) -> List[List[int]]:
+    ends = portals.ends
+    points = list(zip(xs, ys))
+    # Moves from every object to enter every end, and from every end to
+    # every object
+    enter = [[abs(x - end.x) + abs(y - end.y) or 2 for x, y in points] for end in ends]
+    leave = [[abs(x - end.x) + abs(y - end.y) for x, y in points] for end in ends]
+    matrix = []
+    for i, (x, y) in enumerate(points):
+        row = [abs(x - other_x) + abs(y - other_y) for other_x, other_y in points]
+        for w, to_objects in enumerate(leave):
+            # Cheapest way for object i to end up standing on end w
+            start = min(enter[z][i] + portals.after[z][w] for z in range(len(ends)))
+            if start < _INFINITY:
+                row = [
+                    direct if direct <= start + moves else start + moves
+                    for direct, moves in zip(row, to_objects)
+                ]
+        matrix.append(row)
+    return matrix
+
+
+def _numpy_matrix(xs: List[int], ys: List[int], portals: Portals):
+    x = np.array(xs, dtype=np.int64)
+    y = np.array(ys, dtype=np.int64)
+    matrix = np.abs(x[:, None] - x[None, :]) + np.abs(y[:, None] - y[None, :])
+    ends = portals.ends
+    if ends:
+        end_x = np.array([end.x for end in ends], dtype=np.int64)
+        end_y = np.array([end.y for end in ends], dtype=np.int64)
+        leave = np.abs(end_x[:, None] - x[None, :]) + np.abs(
+            end_y[:, None] - y[None, :]
+        )
+        enter = np.where(leave == 0, 2, leave)
+        after = np.array(portals.after, dtype=np.int64)
+        # start[i, w]: cheapest way for object i to end up standing on end w
+        start = (enter.T[:, :, None] + after[None, :, :]).min(axis=1)
+        for w in range(len(ends)):
+            np.minimum(matrix, start[:, w, None] + leave[None, w, :], out=matrix)
+    return matrix
@@ -0,0 +1,206 @@
+"""
+What every bot did over the last ticks, and where it is likely headed.
+
+History keeps one fixed-size ring buffer per bot holding its position,
+score and inventory at each of the last ticks, so memory stays constant per
+bot however long the game runs. Tracks are dropped when their bot leaves
+the board.
+
+The predictor is deliberately cheap. A bot's target is its base when its
+inventory is full, otherwise whichever of its base (when it carries
+anything) and the diamonds nearest to it that still fit it has closed in on
+the most over the last LOOKBACK ticks, the nearest one winning when it has
+not moved. Its next positions are then the greedy steps of
+game.util.get_direction towards that target, the way the simple bots move.
+"""
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from game.models import BOT, DIAMOND, Board, GameObject, Position
+from game.util import get_direction
+
+DEFAULT_SIZE = 16
+LOOKBACK = 4
+# Diamonds nearest to a bot that are considered as its target
+CANDIDATES = 4
+DEFAULT_INVENTORY_SIZE = 5
+_FIELDS = 4
+
+
+class Track:
+    """
+    Ring buffer of (x, y, score, diamonds) of one bot, one entry per tick
+    """
+
+    __slots__ = ("size", "count", "tick", "_data", "_head")
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self.size = size
+        self.count = 0
+        # Tick of the newest entry
+        self.tick = -1
+        self._data = array("i", bytes(4 * _FIELDS * size))
+        self._head = 0
+
+    def append(self, tick: int, x: int, y: int, score: int, diamonds: int) -> None:
+        head = self._head
+        i = head * _FIELDS
+        data = self._data
+        data[i] = x
+        data[i + 1] = y
+        data[i + 2] = score
+        data[i + 3] = diamonds
+        self._head = (head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.tick = tick
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, age: int = 0) -> Tuple[int, int, int, int]:
+        """
+        (x, y, score, diamonds) age ticks ago, 0 being the newest
+        """
+        if not 0 <= age < self.count:
+            raise IndexError("No entry {} ticks ago".format(age))
+        i = (self._head - 1 - age) % self.size * _FIELDS
+        return tuple(self._data[i : i + _FIELDS])
+
+    def position(self, age: int = 0) -> Position:
+        x, y, _, _ = self.get(age)
+        return Position(x=x, y=y)
+
+    def positions(self, ticks: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        (x, y) of the last ticks, oldest first
+        """
+        ticks = self.count if ticks is None else min(ticks, self.count)
+        return [self.get(age)[:2] for age in range(ticks - 1, -1, -1)]
+
+    def velocity(self, ticks: int = LOOKBACK) -> Tuple[float, float]:
+        """
+        Average (dx, dy) per tick over the last ticks
+        """
+        ticks = min(ticks, self.count - 1)
+        if ticks <= 0:
+            return 0.0, 0.0
+        x, y, _, _ = self.get(0)
+        old_x, old_y, _, _ = self.get(ticks)
+        return (x - old_x) / ticks, (y - old_y) / ticks
+
+
+class History:
+    def __init__(self, size: int = DEFAULT_SIZE):
+        """
+        :param size: ticks kept per bot
+        """
+        self.size = size
+        self.tick = 0
+        self.board: Optional[Board] = None
+        self._tracks: Dict[int, Track] = {}
+        self._targets: Dict[int, Optional[Position]] = {}
+
+    def update(self, board: Board) -> None:
+        """
+        Add the bots of a new board, once per board
+        """
+        if board is self.board:
+            return
+        if self.board is not None and self.board.id != board.id:
+            self._tracks.clear()
+        self.board = board
+        self.tick += 1
+        self._targets.clear()
+        tracks = self._tracks
+        seen = set()
+        for bot in board.objects_of_type(BOT):
+            track = tracks.get(bot.id)
+            if track is None:
+                track = tracks[bot.id] = Track(self.size)
+            props = bot.properties
+            track.append(
+                self.tick,
+                bot.position.x,
+                bot.position.y,
+                (props.score or 0) if props else 0,
+                (props.diamonds or 0) if props else 0,
+            )
+            seen.add(bot.id)
+        if len(tracks) > len(seen):
+            for bot_id in [bot_id for bot_id in tracks if bot_id not in seen]:
+                del tracks[bot_id]
+
+    def track(self, bot_id: int) -> Optional[Track]:
+        return self._tracks.get(bot_id)
+
+    ###########################################################################
+    #
+    # Prediction
+    #
+    ###########################################################################
+    def target(self, bot: GameObject) -> Optional[Position]:
+        """
+        Where a bot on the latest board is most likely headed
+        :return: Position of a diamond or of its base, None if unknown
+        """
+        if bot.id in self._targets:
+            return self._targets[bot.id]
+        target = self._targets[bot.id] = self._guess_target(bot)
+        return target
+
+    def _guess_target(self, bot: GameObject) -> Optional[Position]:
+        props = bot.properties
+        base = props.base if props else None
+        carried = (props.diamonds or 0) if props else 0
+        capacity = (props.inventory_size if props else None) or DEFAULT_INVENTORY_SIZE
+        if base is not None and carried >= capacity:
+            return base
+
+        position = bot.position
+        candidates = [
+            diamond.position
+            for diamond in self.board.spatial.nearest(position, CANDIDATES, DIAMOND)
+            if not diamond.properties
+            or (diamond.properties.points or 1) <= capacity - carried
+        ]
+        if base is not None and carried:
+            candidates.append(base)
+        if not candidates:
+            return base
+
+        track = self._tracks.get(bot.id)
+        lookback = min(LOOKBACK, len(track) - 1) if track is not None else 0
+        old = track.position(lookback) if lookback > 0 else position
+
+        def closing_in(target: Position) -> Tuple[int, int]:
+            now = _distance(position, target)
+            return _distance(old, target) - now, -now
+
+        return max(candidates, key=closing_in)
+
+    def predict(self, bot: GameObject, ticks: int) -> List[Position]:
+        """
+        Likely positions of a bot over the next ticks
+        :return: one Position per tick, the next one first
+        """
+        target = self.target(bot)
+        x, y = bot.position.x, bot.position.y
+        positions = []
+        for _ in range(ticks):
+            if target is not None:
+                dx, dy = get_direction(x, y, target.x, target.y)
+                x, y = x + dx, y + dy
+            positions.append(Position(x=x, y=y))
+        return positions
+
+    def approaching(self, bot: GameObject, position: Position) -> bool:
+        """
+        Whether a bot's next move is likely to bring it closer to position
+        """
+        return _distance(self.predict(bot, 1)[0], position) < _distance(
+            bot.position, position
+        )
+
+
+def _distance(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
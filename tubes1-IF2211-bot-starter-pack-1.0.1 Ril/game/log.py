@@ -0,0 +1,301 @@
+"""
+Leveled, structured logging off the hot path.
+
+A record is an event name and keyword fields, e.g.
+log.debug("request", method="GET", endpoint="/boards/1"). Calling log only
+stamps the time and appends a tuple to a bounded ring buffer; a background
+thread formats the records and writes them to the sinks, so the game loop
+never waits on the terminal or the disk. When the writer falls behind, the
+oldest records are dropped (and counted) rather than blocking.
+
+log.level is the lowest level any sink wants. Hot call sites check it before
+building the fields, the way game.metrics is checked before reading the
+clock, so with logging off they pay one comparison and nothing else, and no
+thread is ever started.
+
+Sinks are the console (text or JSON lines) and binary trace files, one per
+bot if wanted. A trace file starts with TRACE_MAGIC, then holds one record
+after the other: a TRACE_HEADER struct (time, level, length) and that many
+bytes of JSON [event, fields]. read_trace() reads one back.
+"""
+import atexit
+import json
+import struct
+import sys
+import threading
+from collections import deque
+from time import localtime, strftime, time
+from typing import IO, Iterator, List, Optional, Tuple
+
+from game.style import Fore, Style
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+NAMES = {level: name.upper() for name, level in LEVELS.items()}
+
+DEFAULT_CAPACITY = 4096
+# Seconds between two rounds of the writer, unless the buffer fills up
+FLUSH_INTERVAL = 0.1
+TRACE_MAGIC = b"DTRACE1\n"
+TRACE_HEADER = struct.Struct("<dBI")
+
+Record = Tuple[float, int, str, dict]
+
+
+###############################################################################
+#
+# Sinks, only ever called from the writer thread
+#
+###############################################################################
+class Console:
+    COLOURS = {
+        DEBUG: "",
+        INFO: Fore.BLUE,
+        WARNING: Fore.YELLOW + Style.BRIGHT,
+        ERROR: Fore.RED + Style.BRIGHT,
+    }
+
+    def __init__(self, level: int = INFO, format: str = "text", stream=None):
+        """
+        :param format: "text" or "json"
+        :param stream: defaults to sys.stdout at the time of writing
+        """
+        if format not in ("text", "json"):
+            raise ValueError("Unknown log format {}".format(format))
+        self.level = level
+        self.format = format
+        self.stream = stream
+
+    def write(self, records: List[Record]) -> None:
+        stream = self.stream or sys.stdout
+        lines = []
+        for record in records:
+            if record[1] >= self.level:
+                lines.append(
+                    self._json(record) if self.format == "json" else self._text(record)
+                )
+        if lines:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+    def _text(self, record: Record) -> str:
+        created, level, event, fields = record
+        return "{}.{:03d} {}{:<7}{} {} {}".format(
+            strftime("%H:%M:%S", localtime(created)),
+            int(created % 1 * 1000),
+            self.COLOURS[level],
+            NAMES[level],
+            Style.RESET_ALL,
+            event,
+            " ".join(
+                "{}={}".format(key, _text(value)) for key, value in fields.items()
+            ),
+        ).rstrip()
+
+    @staticmethod
+    def _json(record: Record) -> str:
+        created, level, event, fields = record
+        return json.dumps(
+            {"time": created, "level": NAMES[level], "event": event, **fields},
+            default=_text,
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class Trace:
+    def __init__(self, path: str, level: int = DEBUG, bot: Optional[str] = None):
+        """
+        :param bot: only records with this bot field, all records if None
+        """
+        self.path = path
+        self.level = level
+        self.bot = bot
+        self._file: Optional[IO[bytes]] = None
+
+    def write(self, records: List[Record]) -> None:
+        chunks = []
+        for created, level, event, fields in records:
+            if level < self.level or (
+                self.bot is not None and fields.get("bot") != self.bot
+            ):
+                continue
+            payload = json.dumps([event, fields], default=_text).encode()
+            chunks.append(TRACE_HEADER.pack(created, level, len(payload)))
+            chunks.append(payload)
+        if chunks:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+                if not self._file.tell():
+                    self._file.write(TRACE_MAGIC)
+            self._file.write(b"".join(chunks))
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _text(value) -> str:
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    return str(value)
+
+
+def read_trace(path: str) -> Iterator[Record]:
+    """
+    Records of a trace file, oldest first
+    """
+    with open(path, "rb") as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError("{} is not a trace file".format(path))
+        while True:
+            header = f.read(TRACE_HEADER.size)
+            if len(header) < TRACE_HEADER.size:
+                return
+            created, level, length = TRACE_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Cut short by a crash
+                return
+            event, fields = json.loads(payload)
+            yield created, level, event, fields
+
+
+###############################################################################
+#
+# Logger
+#
+###############################################################################
+class Logger:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.sinks = [Console(WARNING)]
+        self.level = WARNING
+        self.dropped = 0
+        self._buffer: deque = deque(maxlen=capacity)
+        self._wake_at = capacity // 2
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def configure(
+        self,
+        level: int = INFO,
+        format: str = "text",
+        stream=None,
+        trace: Optional[str] = None,
+        trace_level: int = DEBUG,
+    ) -> None:
+        """
+        Replace the sinks with a console sink and an optional trace file
+        """
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = [Console(level, format, stream)]
+        if trace:
+            self.sinks.append(Trace(trace, trace_level))
+        self._update_level()
+
+    def add_trace(self, path: str, level: int = DEBUG, bot: Optional[str] = None):
+        """
+        Also write records, or only those of one bot, to a trace file
+        """
+        self.sinks.append(Trace(path, level, bot))
+        self._update_level()
+
+    def _update_level(self) -> None:
+        self.level = min((sink.level for sink in self.sinks), default=OFF)
+
+    def debug(self, event: str, **fields) -> None:
+        if self.level <= DEBUG:
+            self._emit(DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        if self.level <= INFO:
+            self._emit(INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        if self.level <= WARNING:
+            self._emit(WARNING, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        if self.level <= ERROR:
+            self._emit(ERROR, event, fields)
+
+    def _emit(self, level: int, event: str, fields: dict) -> None:
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append((time(), level, event, fields))
+        if self._thread is None:
+            self._start()
+        elif len(buffer) >= self._wake_at:
+            # Otherwise the writer picks the records up on its next round,
+            # sparing the caller a thread switch per record
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    ###########################################################################
+    #
+    # Writer thread
+    #
+    ###########################################################################
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._lock:
+            buffer = self._buffer
+            records = []
+            while buffer:
+                records.append(buffer.popleft())
+            if not records:
+                return
+            for sink in self.sinks:
+                try:
+                    sink.write(records)
+                except Exception:
+                    # A broken sink must not take the writer down
+                    pass
+
+    def flush(self) -> None:
+        """
+        Write every pending record now, from the calling thread
+        """
+        self._drain()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        if self.dropped:
+            self._buffer.append(
+                (time(), WARNING, "log_dropped", {"records": self.dropped})
+            )
+            self.dropped = 0
+        self._drain()
+        for sink in self.sinks:
+            sink.close()
+
+
+log = Logger()
@@ -1,33 +1,61 @@
 import random
 from typing import Optional, List, Tuple
 
+from game.board_state import BoardState
+from game.history import History
+from game.log import log
 from game.logic.base import BaseLogic
-from game.models import GameObject, Board, Position
+from game.models import BOT, DIAMOND, GameObject, Board, Position
+from game.params import Param
+from game.spatial import SpatialIndex
 from ..util import get_direction
 
 
 class GreedyDiamondBot(BaseLogic):
-    def _init_(self):
+    # Constants tune.py may search, passed as keyword arguments
+    PARAMS = (
+        Param("danger_radius", 3, 1, 6, "Radius to detect enemies"),
+        Param("safe_distance", 2, 0, 4, "Minimum safe distance from enemies"),
+        Param("return_at", 4, 1, 5, "Diamonds carried before heading home"),
+        Param("high_value_factor", 0.7, 0.3, 1.0, "Score factor of diamonds worth 2+"),
+        Param("unsafe_factor", 2.0, 1.0, 4.0, "Score factor of diamonds near enemies"),
+        Param("explore_chance", 0.7, 0.0, 1.0, "Chance to explore towards the centre"),
+    )
+
+    def __init__(self, danger_radius: int = 3, safe_distance: int = 2,
+                 return_at: int = 4, high_value_factor: float = 0.7,
+                 unsafe_factor: float = 2.0, explore_chance: float = 0.7):
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
         self.goal_position: Optional[Position] = None
         self.target_diamond: Optional[GameObject] = None
-        self.danger_radius = 3  # Radius to detect enemies
-        self.safe_distance = 2  # Minimum safe distance from enemies
+        self.danger_radius = danger_radius  # Radius to detect enemies
+        self.safe_distance = safe_distance  # Minimum safe distance from enemies
+        self.return_at = return_at
+        self.high_value_factor = high_value_factor
+        self.unsafe_factor = unsafe_factor
+        self.explore_chance = explore_chance
+        self.board_state = BoardState()  # Carries the spatial index across ticks
+        self.team = None  # game.team.Team of the bots to share the diamonds with
         
     def next_move(self, board_bot: GameObject, board: Board):
         try:
+            self.board_state.update(board)
+            if self.team is not None:
+                # Not after any diamond until Priority 4 picks one
+                self.team.publish(board_bot)
             props = board_bot.properties
             current_position = board_bot.position
             
             # Priority 1: Avoid enemies - check for nearby threats
             enemies = self.get_enemies(board, board_bot)
             if enemies:
-                danger_move = self.avoid_enemies(current_position, enemies)
+                danger_move = self.avoid_enemies(current_position, enemies,
+                                                 self.board_state.history)
                 if danger_move:
                     return danger_move
             
             # Priority 2: If carrying 4+ diamonds, return to base (reduced from 5)
-            if props.diamonds >= 4:
+            if props.diamonds >= self.return_at:
                 base = props.base
                 if base and not self.is_at_position(current_position, base):
                     delta_x, delta_y = get_direction(
@@ -48,8 +76,18 @@ class GreedyDiamondBot(BaseLogic):
             
             if diamonds:
                 # Find best diamond with improved scoring
-                best_diamond = self.find_best_diamond(current_position, diamonds, enemies)
+                # Diamonds that no longer fit in the inventory are skipped
+                room = (props.inventory_size or 5) - props.diamonds
+                best_diamond = None
+                if self.team is not None:
+                    # Our share of the diamonds, if teammates are after some
+                    best_diamond = self.team.choose(self, board_bot, board)
+                if best_diamond is None:
+                    best_diamond = self.find_best_diamond(current_position, diamonds, enemies,
+                                                          board.spatial, room)
                 if best_diamond:
+                    if self.team is not None:
+                        self.team.publish(board_bot, best_diamond.position)
                     delta_x, delta_y = get_direction(
                         current_position.x,
                         current_position.y,
@@ -75,27 +113,29 @@ class GreedyDiamondBot(BaseLogic):
             
         except Exception as e:
             # Fallback to safe random movement
-            print(f"Error in GreedyDiamondBot: {e}")
+            log.error("next_move_failed", logic="GreedyDiamondBot", error=repr(e))
             return self.get_safe_random_move()
     
     def get_enemies(self, board: Board, bot: GameObject) -> List[GameObject]:
-        """Get all enemy bots on the board"""
-        enemies = []
-        try:
-            for game_object in board.game_objects:
-                # Check if it's a bot and not our bot
-                if (hasattr(game_object, 'type') and 'Bot' in game_object.type and 
-                    game_object.id != bot.id):
-                    # Check if enemy is within danger radius
-                    distance = self.manhattan_distance(bot.position, game_object.position)
-                    if distance <= self.danger_radius:
-                        enemies.append(game_object)
-        except:
-            pass
-        return enemies
+        """Get all enemy bots within the danger radius"""
+        teammates = self.team.members() if self.team is not None else ()
+        return [
+            enemy
+            for enemy in board.spatial.within(bot.position, self.danger_radius, BOT)
+            if enemy.id != bot.id and enemy.id not in teammates
+        ]
     
-    def avoid_enemies(self, current_pos: Position, enemies: List[GameObject]) -> Optional[Tuple[int, int]]:
+    def avoid_enemies(self, current_pos: Position, enemies: List[GameObject],
+                      history: Optional[History] = None) -> Optional[Tuple[int, int]]:
         """Calculate move to avoid enemies"""
+        if history is not None:
+            # Only flee from bots that are next to us or heading our way,
+            # not from every bot passing by
+            enemies = [
+                enemy for enemy in enemies
+                if self.manhattan_distance(current_pos, enemy.position) <= 1
+                or history.approaching(enemy, current_pos)
+            ]
         if not enemies:
             return None
         
@@ -129,66 +169,78 @@ class GreedyDiamondBot(BaseLogic):
     
     def get_diamonds(self, board: Board) -> List[GameObject]:
         """Get all diamonds on the board"""
-        diamonds = []
-        try:
-            for game_object in board.game_objects:
-                if hasattr(game_object, 'type') and game_object.type == "DiamondGameObject":
-                    diamonds.append(game_object)
-                elif "Diamond" in str(type(game_object)):
-                    diamonds.append(game_object)
-        except:
-            pass
-        return diamonds
+        return board.diamonds
     
     def find_best_diamond(self, current_pos: Position, diamonds: List[GameObject], 
-                         enemies: List[GameObject]) -> Optional[GameObject]:
+                         enemies: List[GameObject],
+                         index: Optional[SpatialIndex] = None,
+                         room: Optional[int] = None) -> Optional[GameObject]:
         """Find the best diamond using improved greedy algorithm"""
         if not diamonds:
             return None
-            
-        best_diamond = None
-        best_score = float('inf')
         
-        for diamond in diamonds:
-            try:
-                # Calculate Manhattan distance
-                distance = self.manhattan_distance(current_pos, diamond.position)
-                
-                # Get diamond points if available
-                diamond_points = 1
-                if hasattr(diamond, 'properties') and hasattr(diamond.properties, 'points'):
-                    diamond_points = diamond.properties.points
-                
-                # Check if diamond is safe from enemies
-                diamond_safe = True
-                for enemy in enemies:
-                    enemy_to_diamond_dist = self.manhattan_distance(enemy.position, diamond.position)
-                    if enemy_to_diamond_dist <= self.safe_distance:
-                        diamond_safe = False
-                        break
-                
-                # Calculate score: lower is better
-                if diamond_points > 0:
-                    score = distance / diamond_points
-                else:
-                    score = distance
-                
-                # Penalty for unsafe diamonds
-                if not diamond_safe:
-                    score *= 2  # Make unsafe diamonds less attractive
-                
-                # Bonus for high-value diamonds
-                if diamond_points >= 2:
-                    score *= 0.7  # Make high-value diamonds more attractive
-                
-                if score < best_score:
-                    best_score = score
-                    best_diamond = diamond
-                    
-            except Exception:
-                continue
+        if index is not None:
+            # Best-first search outwards from our position, pruned by the
+            # lowest score any diamond at that distance could still reach
+            max_points = index.max_points(DIAMOND)
+            min_factor = (min(1.0, self.high_value_factor / max_points)
+                          if max_points >= 2 else 1.0)
+            return index.best(
+                current_pos,
+                DIAMOND,
+                lambda diamond, distance: self.score_diamond(diamond, distance, enemies,
+                                                             room),
+                min_factor,
+            )
+            
+        # Without an index every diamond is scored, all at once. Imported
+        # here since it may load NumPy, which next_move never needs
+        from game.scoring import DiamondBatch
+
+        batch = DiamondBatch(diamonds, unsafe_factor=self.unsafe_factor,
+                             high_value_factor=self.high_value_factor)
+        return batch.best(current_pos, enemies, self.safe_distance, room)
+    
+    def score_diamond(self, diamond: GameObject, distance: int,
+                      enemies: List[GameObject],
+                      room: Optional[int] = None) -> Optional[float]:
+        """Score a diamond at the given distance, lower is better"""
+        try:
+            # Get diamond points if available
+            diamond_points = 1
+            if hasattr(diamond, 'properties') and hasattr(diamond.properties, 'points'):
+                diamond_points = diamond.properties.points
+            
+            # Skip diamonds we have no room for
+            if room is not None and diamond_points > room:
+                return None
+            
+            # Check if diamond is safe from enemies
+            diamond_safe = True
+            for enemy in enemies:
+                enemy_to_diamond_dist = self.manhattan_distance(enemy.position, diamond.position)
+                if enemy_to_diamond_dist <= self.safe_distance:
+                    diamond_safe = False
+                    break
+            
+            # Calculate score: lower is better
+            if diamond_points > 0:
+                score = distance / diamond_points
+            else:
+                score = distance
+            
+            # Penalty for unsafe diamonds
+            if not diamond_safe:
+                score *= self.unsafe_factor  # Make unsafe diamonds less attractive
+            
+            # Bonus for high-value diamonds
+            if diamond_points >= 2:
+                score *= self.high_value_factor  # Make high-value diamonds more attractive
+            
+            return score
                 
-        return best_diamond
+        except Exception:
+            return None
     
     def is_at_position(self, pos1: Position, pos2: Position) -> bool:
         """Check if two positions are the same"""
@@ -220,7 +272,7 @@ class GreedyDiamondBot(BaseLogic):
         board_center_y = board.height // 2 if hasattr(board, 'height') else 10
         
         # Move towards center with some randomness
-        if random.random() < 0.7:  # 70% chance to move towards center
+        if random.random() < self.explore_chance:  # 70% chance by default to move towards center
             delta_x, delta_y = get_direction(
                 current_pos.x,
                 current_pos.y,
@@ -0,0 +1,287 @@
+"""
+Monte Carlo tree search over our own moves.
+
+MonteCarloBot plays the next moves out in game.forward.ForwardModel. Below
+the tree, rollouts follow a greedy rule like GreedyDiamondBot's: head for
+the diamond with the fewest moves per point that still fits, and home once
+the inventory is nearly full. A playout is worth the points it delivers,
+discounted per move, plus part of what it still carries when the horizon is
+reached before the end of the game, less the threat (game.threat) of every
+cell it walks through times what it carries there.
+
+The search runs until the deadline of the tick, a fraction of
+minimum_delay_between_moves, and plays the most visited move. The subtree
+under that move is kept, and searched on at the next tick when we stand
+where the model said we would with the diamonds it expected.
+"""
+import math
+import random
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+
+from game.forward import ForwardModel, State
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.params import Param
+from game.util import get_direction
+
+DEFAULT_BUDGET_FRACTION = 0.25
+DEFAULT_HORIZON = 30
+DEFAULT_EXPLORATION = 0.5
+DISCOUNT = 0.97
+# Share of the value of a point that is still carried at the horizon
+CARRY_VALUE = 0.5
+# Points expected to be lost per point carried and unit of threat
+RISK = 0.1
+
+
+class _Node:
+    __slots__ = ("children", "visits", "total")
+
+    def __init__(self):
+        # Move -> child, None until the node is expanded
+        self.children: Optional[Dict[Tuple[int, int], "_Node"]] = None
+        self.visits = 0
+        # Sum of the discounted returns from this node's state onwards,
+        # including the move that led here
+        self.total = 0.0
+
+
+class MonteCarloBot(BaseLogic):
+    # Constants tune.py may search, passed as keyword arguments
+    PARAMS = (
+        Param("horizon", DEFAULT_HORIZON, 10, 60, "Moves played out"),
+        Param("exploration", DEFAULT_EXPLORATION, 0.1, 2.0, "UCT constant"),
+    )
+
+    def __init__(
+        self,
+        budget_fraction: float = DEFAULT_BUDGET_FRACTION,
+        time_budget: Optional[float] = None,
+        horizon: int = DEFAULT_HORIZON,
+        exploration: float = DEFAULT_EXPLORATION,
+    ):
+        """
+        :param budget_fraction: share of minimum_delay_between_moves to search
+        :param time_budget: seconds to search per tick, instead of the fraction
+        :param horizon: moves played out from the current position
+        :param exploration: UCT exploration constant
+        """
+        self.budget_fraction = budget_fraction
+        self.time_budget = time_budget
+        self.horizon = horizon
+        self.exploration = exploration
+        self.root: Optional[_Node] = None
+        # (cell, carried) and diamond cells the kept subtree starts from
+        self.expected: Optional[Tuple[int, int]] = None
+        self.expected_diamonds: frozenset = frozenset()
+        self.iterations = 0
+        self.search_seconds = 0.0
+        self.ticks = 0
+        self.reused = 0
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        start = perf_counter()
+        deadline = start + self._budget(board)
+        model = ForwardModel(board, board_bot)
+        self._model = model
+        self._threat = board.threat
+        self._bot = board_bot
+        self._risk: Dict[int, float] = {}
+        self.ticks += 1
+
+        root = self.root
+        if (
+            root is None
+            or self.expected != model.start[:2]
+            or self.expected_diamonds != _diamond_cells(model, 0)
+        ):
+            root = _Node()
+        else:
+            self.reused += 1
+
+        moves_left = self._moves_left(board, board_bot)
+        horizon = self.horizon if moves_left is None else min(self.horizon, moves_left)
+        iterations = 0
+        while True:
+            self._iterate(root, horizon, moves_left)
+            iterations += 1
+            if perf_counter() >= deadline:
+                break
+        self.iterations += iterations
+        self.search_seconds += perf_counter() - start
+
+        if not root.children:
+            # Out of moves or boxed in: any move, the server refuses bad ones
+            self.root = None
+            return 1, 0
+        move = max(
+            root.children,
+            key=lambda m: (root.children[m].visits, root.children[m].total),
+        )
+        after = model.step(model.start, move)
+        self.root = root.children[move]
+        self.expected = after[:2]
+        self.expected_diamonds = _diamond_cells(model, after[3])
+        return move
+
+    ###########################################################################
+    #
+    # Search
+    #
+    ###########################################################################
+    def _iterate(self, root: _Node, horizon: int, moves_left: Optional[int]) -> None:
+        """
+        One selection, expansion, rollout and backup
+        """
+        model = self._model
+        state = model.start
+        node = root
+        path = [root]
+        rewards = []
+        depth = 0
+        while depth < horizon:
+            if node.children is None:
+                node.children = {move: _Node() for move, _ in model.moves(state)}
+            if not node.children:
+                break
+            move = self._select(node)
+            after = model.step(state, move)
+            if after is None:
+                # Kept from an earlier tick, but no longer allowed
+                del node.children[move]
+                continue
+            rewards.append(self._reward(state, after))
+            state = after
+            node = node.children[move]
+            path.append(node)
+            depth += 1
+            if node.visits == 0:
+                break
+
+        ends = moves_left is not None and moves_left <= horizon
+        value = self._rollout(state, horizon - depth, ends)
+        root.visits += 1
+        for node, reward in zip(reversed(path[1:]), reversed(rewards)):
+            value = reward + DISCOUNT * value
+            node.visits += 1
+            node.total += value
+
+    def _select(self, node: _Node) -> Tuple[int, int]:
+        """
+        UCT, trying every move once first
+        """
+        children = node.children
+        unvisited = [move for move, child in children.items() if child.visits == 0]
+        if unvisited:
+            return random.choice(unvisited)
+        log_visits = math.log(max(1, node.visits))
+        exploration = self.exploration
+        return max(
+            children,
+            key=lambda move: children[move].total / children[move].visits
+            + exploration * math.sqrt(log_visits / children[move].visits),
+        )
+
+    def _rollout(self, state: State, steps: int, ends: bool) -> float:
+        """
+        Discounted return of playing greedy moves from a state
+        :param ends: the game ends after these steps, so what is still
+            carried is worth nothing
+        """
+        model = self._model
+        value = 0.0
+        discount = 1.0
+        for _ in range(steps):
+            after = model.step(state, self._greedy(state))
+            if after is None:
+                # Refused, e.g. into a bot we cannot tackle: any other move
+                choices = model.moves(state)
+                if not choices:
+                    break
+                after = random.choice(choices)[1]
+            value += discount * self._reward(state, after)
+            discount *= DISCOUNT
+            state = after
+        if not ends:
+            value += discount * CARRY_VALUE * state[1] / model.capacity
+        return value
+
+    def _greedy(self, state: State) -> Tuple[int, int]:
+        model = self._model
+        cell, carried, _, taken, _ = state
+        width = model.width
+        x, y = cell % width, cell // width
+        target = model.base
+        if carried < model.capacity - 1:
+            best = math.inf
+            room = model.capacity - carried
+            for i, (diamond, points) in enumerate(model.diamonds):
+                if points > room or taken >> i & 1:
+                    continue
+                score = (abs(diamond % width - x) + abs(diamond // width - y)) / points
+                if score < best:
+                    best, target = score, diamond
+        if target < 0:
+            return random.choice(((1, 0), (0, 1), (-1, 0), (0, -1)))
+        return get_direction(x, y, target % width, target // width)
+
+    def _reward(self, state: State, after: State) -> float:
+        """
+        Points delivered by a move, less the points expected to be lost to a
+        tackle where it ends, as a share of the inventory
+        """
+        gained = after[2] - state[2]
+        if after[1]:
+            gained -= RISK * after[1] * self._risk_at(after[0])
+        return gained / self._model.capacity
+
+    def _risk_at(self, cell: int) -> float:
+        risk = self._risk.get(cell)
+        if risk is None:
+            width = self._model.width
+            risk = self._risk[cell] = self._threat.at(
+                Position(x=cell % width, y=cell // width), self._bot
+            )
+        return risk
+
+    ###########################################################################
+    #
+    # Budget and stats
+    #
+    ###########################################################################
+    def _budget(self, board: Board) -> float:
+        if self.time_budget is not None:
+            return self.time_budget
+        return self.budget_fraction * (board.minimum_delay_between_moves or 0) / 1000
+
+    @staticmethod
+    def _moves_left(board: Board, board_bot: GameObject) -> Optional[int]:
+        left = board_bot.properties.milliseconds_left
+        delay = board.minimum_delay_between_moves
+        if left is None or not delay:
+            return None
+        return max(0, left // delay - 1)
+
+    @property
+    def iterations_per_second(self) -> float:
+        if not self.search_seconds:
+            return 0.0
+        return self.iterations / self.search_seconds
+
+    def summary(self) -> str:
+        return "{} searches, {:.0f} iterations/s, {:.0f} iterations per move, subtree kept {:.0%} of moves".format(
+            self.ticks,
+            self.iterations_per_second,
+            self.iterations / max(1, self.ticks),
+            self.reused / max(1, self.ticks),
+        )
+
+
+def _diamond_cells(model: ForwardModel, taken: int) -> frozenset:
+    """
+    Cells of the diamonds still on the board after the ones in taken
+    """
+    return frozenset(
+        cell for i, (cell, _) in enumerate(model.diamonds) if not taken >> i & 1
+    )
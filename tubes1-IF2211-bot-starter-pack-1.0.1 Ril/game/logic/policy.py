@@ -0,0 +1,849 @@
+"""
+GreedyDiamondBot answering from a move table built once per board.
+
+On a given board, GreedyDiamondBot's move only depends on the cell our bot
+stands on and the diamonds it carries. PolicyTable holds that move for
+every (x, y, diamonds) of the board, so next_move is a single lookup, and
+fallback_move() has an answer ready for the cell the last move leads to
+when the next board is late.
+
+Away from the other bots, the move of a cell comes from the diamond that
+scores best from it. For all cells at once that is a Manhattan distance
+transform per diamond value, two sweeps along the rows and two along the
+columns. Cells within danger_radius of another bot also depend on the bots
+they flee from and the diamonds those make unsafe, so they are scored
+against every diamond. Both run on NumPy arrays when NumPy is installed,
+and otherwise cell by cell, the latter through GreedyDiamondBot's own
+methods.
+
+From one board to the next only what the diff touches is rebuilt. The
+cells around the bots that moved (or whose predicted next cell changed)
+are worked out again, and so are the cells that were heading for a
+diamond just collected; the rest is kept. When diamonds appear or the
+last diamond of a value goes, the table is built again. Moves
+GreedyDiamondBot picks at random, stepping off the base and exploring,
+are stored as codes and drawn when looked up, through the same methods.
+
+Keeping the table current costs more than deciding. GreedyDiamondBot
+decides from scratch in 0.03-0.05 ms. With NumPy, building takes
+0.9-2.2 ms and patching 0.7-1.5 ms on boards from 15x15 to 60x60, and
+over 90% of the ticks are patched. Without NumPy, building takes 3-29 ms
+and patching 2.6-6 ms (benchmarks/bench_policy.py). The play loops call
+prepare() as soon as the answer to a move arrives, within the delay the
+next move has to wait out anyway, so next_move itself is the lookup,
+about 3 us, and fallback_move() has a move ready when a board is late.
+The work per tick is no less than GreedyDiamondBot's; it only moves off
+the decision.
+"""
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from game.board_state import BoardChanges
+from game.geometry import teleporter_pairs
+from game.log import log
+from game.logic.kece import GreedyDiamondBot
+from game.models import BOT, DIAMOND, Board, GameObject, Position
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Codes 0 to 4 index MOVES, the others are drawn when looked up
+MOVES = ((1, 0), (0, 1), (-1, 0), (0, -1), (0, 0))
+AWAY = 5
+EXPLORE = 6
+_CODES = {move: code for code, move in enumerate(MOVES)}
+DEFAULT_INVENTORY_SIZE = 5
+# Diamonds scored at once per chunk of cells, bounding the score matrix
+CHUNK = 1 << 18
+_INF = 1 << 62
+
+Cell = Tuple[int, int]
+# Cell of the best diamond among those of the first `level` values, or None
+BestFunction = Callable[[int], Optional[Cell]]
+
+
+def _toward(x: int, y: int, tx: int, ty: int) -> int:
+    """
+    Code of game.util.get_direction from (x, y) to (tx, ty)
+    """
+    if tx != x:
+        return 0 if tx > x else 2
+    if ty != y:
+        return 1 if ty > y else 3
+    return 4
+
+
+def _points(diamond: GameObject) -> Optional[int]:
+    # Like score_diamond: 1 without properties, never chosen if unknown
+    return diamond.properties.points if diamond.properties is not None else 1
+
+
+def _score(distance: int, points: int, high_value_factor: float) -> float:
+    # The operations of score_diamond in the same order, so scores tie alike
+    score = distance / points if points > 0 else distance
+    if points >= 2:
+        score *= high_value_factor
+    return score
+
+
+def _sweep(keys: List[int], width: int, height: int, step: int) -> None:
+    """
+    Manhattan distance transform in place: every key becomes the lowest
+    key + step * distance over all cells
+    """
+    size = width * height
+    for row in range(0, size, width):
+        for cell in range(row + 1, row + width):
+            key = keys[cell - 1] + step
+            if key < keys[cell]:
+                keys[cell] = key
+        for cell in range(row + width - 2, row - 1, -1):
+            key = keys[cell + 1] + step
+            if key < keys[cell]:
+                keys[cell] = key
+    for cell in range(width, size):
+        key = keys[cell - width] + step
+        if key < keys[cell]:
+            keys[cell] = key
+    for cell in range(size - width - 1, -1, -1):
+        key = keys[cell + width] + step
+        if key < keys[cell]:
+            keys[cell] = key
+
+
+def _sweep_numpy(keys, step: int):
+    """
+    _sweep on a (height, width) array. Each pass is a running minimum of
+    key - step * index, so it needs no loop over the cells
+    """
+    height, width = keys.shape
+    along = np.arange(width, dtype=np.int64) * step
+    keys = np.minimum.accumulate(keys - along, axis=1) + along
+    keys = np.minimum.accumulate((keys + along)[:, ::-1], axis=1)[:, ::-1] - along
+    down = (np.arange(height, dtype=np.int64) * step)[:, None]
+    keys = np.minimum.accumulate(keys - down, axis=0) + down
+    return np.minimum.accumulate((keys + down)[::-1], axis=0)[::-1] - down
+
+
+def _toward_numpy(xs, ys, txs, tys):
+    codes = np.full(len(xs), 4, dtype=np.uint8)
+    codes[tys > ys] = 1
+    codes[tys < ys] = 3
+    codes[txs > xs] = 0
+    codes[txs < xs] = 2
+    return codes
+
+
+def _pack(diamonds: List[GameObject]) -> tuple:
+    """
+    Arrays of the x, y and points of diamonds
+    """
+    return (
+        np.array([diamond.position.x for diamond in diamonds], dtype=np.int64),
+        np.array([diamond.position.y for diamond in diamonds], dtype=np.int64),
+        np.array([_points(diamond) for diamond in diamonds], dtype=np.int64),
+    )
+
+
+def _collected(changes: BoardChanges) -> Optional[List[GameObject]]:
+    """
+    Diamonds taken off the board, or None when diamonds also appeared or
+    changed
+    """
+    if (
+        any(obj.type == DIAMOND for obj in changes.added)
+        or any(obj.type == DIAMOND for obj, _ in changes.moved)
+        or any(new.type == DIAMOND for _, new in changes.updated)
+    ):
+        return None
+    return changes.collected
+
+
+class PolicyTable:
+    def __init__(self, logic: GreedyDiamondBot, backend: Optional[str] = None):
+        """
+        :param logic: the controller whose moves are tabled, for its
+            parameters, methods and board state
+        :param backend: "numpy" or "python", by default NumPy if installed
+        """
+        if backend == "numpy" and np is None:
+            raise ImportError("The numpy backend needs NumPy installed")
+        self.logic = logic
+        self.backend = backend
+        self.board: Optional[Board] = None
+        self.width = 0
+        self.height = 0
+        self.size = DEFAULT_INVENTORY_SIZE
+        self.base: Optional[Cell] = None
+        # moves[diamonds][y * width + x] is a move code
+        self.moves: List[bytearray] = []
+        # The same without the other bots, what cells go back to when the
+        # bots around them leave
+        self._free: List[bytearray] = []
+        # Distinct points of the diamonds, lowest first, and for every
+        # inventory the number of them that still fit
+        self._values: List[int] = []
+        self._levels: List[int] = []
+        # x, y and points arrays of the diamonds in rank order, for NumPy
+        self._packed: Optional[tuple] = None
+        # _targets[level - 1][cell] is the cell of the diamond a free cell
+        # heads for at that level, -1 if none or not looked for
+        self._targets: list = []
+        self._contested: Set[int] = set()
+        # Bot id -> (x, y, predicted x, predicted y) of every other bot
+        self._bots: Dict[int, Tuple[int, int, int, int]] = {}
+        self.builds = 0
+        self.patches = 0
+        self.kept = 0
+        self.cells = 0
+
+    ###########################################################################
+    #
+    # Updates
+    #
+    ###########################################################################
+    def update(self, board: Board, bot: GameObject, changes: BoardChanges) -> None:
+        """
+        Bring the table up to date with a board
+        :param bot: our bot on that board
+        :param changes: the diff of board against the last board given
+        """
+        if board is self.board:
+            return
+        props = bot.properties
+        size = props.inventory_size or DEFAULT_INVENTORY_SIZE
+        base = (props.base.x, props.base.y) if props.base else None
+        bots = self._other_bots(board, bot)
+        collected = None
+        if not (
+            self.board is None
+            or changes.reset
+            or board.width != self.width
+            or board.height != self.height
+            or size != self.size
+            or base != self.base
+        ):
+            collected = _collected(changes)
+        touched = None
+        if collected:
+            touched = self._uncollect(board, collected)
+            if touched is None:
+                collected = None
+        if collected is None:
+            self.width, self.height = board.width, board.height
+            self.size, self.base = size, base
+            self._build(board, bot, bots)
+        else:
+            self._patch(board, bot, bots, touched)
+        self.board = board
+        self._bots = bots
+
+    def _other_bots(
+        self, board: Board, bot: GameObject
+    ) -> Dict[int, Tuple[int, int, int, int]]:
+        history = self.logic.board_state.history
+        bots = {}
+        for other in board.bots:
+            if other.id != bot.id:
+                ahead = history.predict(other, 1)[0]
+                bots[other.id] = (other.position.x, other.position.y, ahead.x, ahead.y)
+        return bots
+
+    def _around(self, x: int, y: int) -> Iterator[int]:
+        """
+        Cells within danger_radius of (x, y)
+        """
+        radius = self.logic.danger_radius
+        width, height = self.width, self.height
+        for cy in range(max(0, y - radius), min(height, y + radius + 1)):
+            reach = radius - abs(cy - y)
+            row = cy * width
+            yield from range(row + max(0, x - reach), row + min(width, x + reach + 1))
+
+    def _build(
+        self, board: Board, bot: GameObject, bots: Dict[int, Tuple[int, int, int, int]]
+    ) -> None:
+        diamonds = self._ranked(board)
+        self._values = sorted({_points(diamond) for diamond in diamonds})
+        self._levels = [
+            bisect_right(self._values, self.size - carried)
+            for carried in range(self.size + 1)
+        ]
+        backend = self._backend()
+        if backend == "numpy":
+            self._packed = _pack(diamonds)
+            self._free = self._free_numpy(diamonds)
+        else:
+            self._free = self._free_python(diamonds)
+        self.moves = [bytearray(moves) for moves in self._free]
+        self._contested = set()
+        for x, y, _, _ in bots.values():
+            self._contested.update(self._around(x, y))
+        self._work_out(board, bot, bots, sorted(self._contested), backend)
+        self.builds += 1
+
+    def _patch(
+        self,
+        board: Board,
+        bot: GameObject,
+        bots: Dict[int, Tuple[int, int, int, int]],
+        touched: Optional[Set[int]] = None,
+    ) -> None:
+        """
+        Work out again the cells around the bots that changed
+        :param touched: cells whose free moves changed, if diamonds were
+            collected
+        """
+        previous = self._bots
+        dirty = set(touched or ())
+        for bot_id in previous.keys() | bots.keys():
+            before, now = previous.get(bot_id), bots.get(bot_id)
+            if before != now:
+                for state in (before, now):
+                    if state is not None:
+                        dirty.update(self._around(state[0], state[1]))
+        contested = set()
+        for x, y, _, _ in bots.values():
+            contested.update(self._around(x, y))
+        if touched is not None:
+            # Contested cells may have been heading for the diamonds gone too
+            dirty |= contested
+        if not dirty:
+            self.kept += 1
+            return
+        self._contested = contested
+        for cell in dirty - contested:
+            for moves, free in zip(self.moves, self._free):
+                moves[cell] = free[cell]
+        cells = sorted(dirty & contested)
+        if cells:
+            self._work_out(board, bot, bots, cells, self._backend())
+        self.patches += 1
+
+    def _uncollect(
+        self, board: Board, collected: List[GameObject]
+    ) -> Optional[Set[int]]:
+        """
+        Work out again the free moves of the cells that were heading for
+        diamonds taken off the board; the others still head for theirs
+        :return: those cells, or None when the table has to be built again
+        """
+        diamonds = self._ranked(board)
+        if sorted({_points(diamond) for diamond in diamonds}) != self._values:
+            # The last diamond of a value is gone, and with it a level
+            return None
+        gone = [
+            diamond.position.y * self.width + diamond.position.x
+            for diamond in collected
+        ]
+        if self._backend() == "numpy":
+            self._packed = _pack(diamonds)
+            heading = np.zeros(self.width * self.height, dtype=bool)
+            for targets in self._targets:
+                heading |= np.isin(targets, gone)
+            cells = np.flatnonzero(heading)
+            if len(cells):
+                self._free_cells_numpy(cells)
+            return set(cells.tolist())
+
+        gone = set(gone)
+        cells = {
+            cell
+            for targets in self._targets
+            for cell, target in enumerate(targets)
+            if target in gone
+        }
+        index = board.spatial
+        for cell in cells:
+            y, x = divmod(cell, self.width)
+            best = self._searcher(Position(x=x, y=y), board.diamonds, [], index)
+            self._write(self._free, cell, x, y, self._recorded(cell, best))
+        return cells
+
+    def _recorded(self, cell: int, best: BestFunction) -> BestFunction:
+        """
+        best, noting in _targets the diamond found for the cell
+        """
+        targets = self._targets
+        for level_targets in targets:
+            level_targets[cell] = -1
+        width = self.width
+
+        def recorded(level: int) -> Optional[Cell]:
+            target = best(level)
+            if target is not None:
+                targets[level - 1][cell] = target[1] * width + target[0]
+            return target
+
+        return recorded
+
+    def _backend(self) -> str:
+        if self.backend is not None:
+            return self.backend
+        # NumPy builds faster even on 5x5 boards (benchmarks/bench_policy.py)
+        return "numpy" if np is not None else "python"
+
+    @staticmethod
+    def _ranked(board: Board) -> List[GameObject]:
+        """
+        Diamonds that may be chosen, in the order that breaks ties
+        """
+        index = board.spatial
+        return sorted(
+            (diamond for diamond in board.diamonds if _points(diamond) is not None),
+            key=index.rank,
+        )
+
+    ###########################################################################
+    #
+    # Cells away from the other bots
+    #
+    ###########################################################################
+    def _free_python(self, diamonds: List[GameObject]) -> List[bytearray]:
+        width, height = self.width, self.height
+        step = max(1, len(diamonds))
+        fields = []
+        for value in self._values:
+            keys = [_INF] * (width * height)
+            for rank, diamond in enumerate(diamonds):
+                if _points(diamond) == value:
+                    cell = diamond.position.y * width + diamond.position.x
+                    keys[cell] = min(keys[cell], rank)
+            _sweep(keys, width, height, step)
+            fields.append(keys)
+        values = self._values
+        high_value_factor = self.logic.high_value_factor
+
+        self._targets = [[-1] * (width * height) for _ in values]
+        moves = [bytearray(width * height) for _ in range(self.size + 1)]
+        for cell in range(width * height):
+            y, x = divmod(cell, width)
+
+            def best(level: int) -> Optional[Cell]:
+                top, top_score, top_rank = None, float("inf"), step
+                for value, keys in zip(values[:level], fields):
+                    key = keys[cell]
+                    if key >= _INF:
+                        continue
+                    distance, rank = divmod(key, step)
+                    score = _score(distance, value, high_value_factor)
+                    if score < top_score or (score == top_score and rank < top_rank):
+                        top, top_score, top_rank = rank, score, rank
+                if top is None:
+                    return None
+                position = diamonds[top].position
+                return position.x, position.y
+
+            self._write(moves, cell, x, y, self._recorded(cell, best))
+        return moves
+
+    def _free_numpy(self, diamonds: List[GameObject]) -> List[bytearray]:
+        width, height = self.width, self.height
+        cells = width * height
+        step = max(1, len(diamonds))
+        dxs, dys, points = self._packed
+        ranks = np.arange(len(diamonds), dtype=np.int64)
+        xs = np.tile(np.arange(width, dtype=np.int64), height)
+        ys = np.repeat(np.arange(height, dtype=np.int64), width)
+
+        # Best diamond of every cell among the first level values, folded in
+        # one value at a time
+        targets = [None]
+        best_score = np.full(cells, np.inf)
+        best_rank = np.full(cells, step, dtype=np.int64)
+        for value in self._values:
+            keys = np.full(cells, _INF, dtype=np.int64)
+            of_value = points == value
+            np.minimum.at(keys, dys[of_value] * width + dxs[of_value], ranks[of_value])
+            keys = _sweep_numpy(keys.reshape(height, width), step).ravel()
+            found = keys < _INF
+            distance, rank = np.divmod(keys, step)
+            score = distance / value if value > 0 else distance.astype(np.float64)
+            if value >= 2:
+                score = score * self.logic.high_value_factor
+            better = found & (
+                (score < best_score) | ((score == best_score) & (rank < best_rank))
+            )
+            best_score = np.where(better, score, best_score)
+            best_rank = np.where(better, rank, best_rank)
+            has = best_rank < step
+            chosen = np.where(has, best_rank, 0)
+            targets.append(
+                (
+                    _toward_numpy(xs, ys, dxs[chosen], dys[chosen]),
+                    has,
+                    np.where(has, dys[chosen] * width + dxs[chosen], -1),
+                )
+            )
+        self._targets = [target[2] for target in targets[1:]]
+        return [bytearray(codes.tobytes()) for codes in self._assemble(xs, ys, targets)]
+
+    def _free_cells_numpy(self, cells) -> None:
+        """
+        _free_numpy for some cells only, every diamond scored from each
+        """
+        ys, xs = np.divmod(cells, self.width)
+        nobody = np.zeros(0, dtype=np.int64)
+        targets = self._contested_targets(
+            xs, ys, np.zeros((len(cells), 0), dtype=bool), nobody, nobody
+        )
+        for free, codes in zip(self._free, self._assemble(xs, ys, targets)):
+            np.frombuffer(free, dtype=np.uint8)[cells] = codes
+        for level_targets, target in zip(self._targets, targets[1:]):
+            level_targets[cells] = target[2]
+
+    def _assemble(self, xs, ys, targets: list, flee=None) -> list:
+        """
+        Codes of cells for every inventory, following the priorities of
+        GreedyDiamondBot.next_move, as _write does one cell at a time
+        :param targets: (codes towards the best diamond, found, its cell) per
+            level
+        :param flee: codes of the cells to flee from, EXPLORE where not
+        """
+        base = self.base
+        if base is not None:
+            at_base = (xs == base[0]) & (ys == base[1])
+            away = ~at_base
+            to_base = _toward_numpy(
+                xs, ys, np.full(len(xs), base[0]), np.full(len(xs), base[1])
+            )
+        assembled = []
+        for carried, level in enumerate(self._levels):
+            codes = np.full(len(xs), EXPLORE, dtype=np.uint8)
+            if base is not None and carried > 0:
+                codes[away] = to_base[away]
+            if level:
+                target, has = targets[level][:2]
+                codes[has] = target[has]
+            if base is not None and carried > 0:
+                codes[at_base] = AWAY
+            if base is not None and carried >= self.logic.return_at:
+                codes[away] = to_base[away]
+            if flee is not None:
+                fleeing = flee != EXPLORE
+                codes[fleeing] = flee[fleeing]
+            assembled.append(codes)
+        return assembled
+
+    ###########################################################################
+    #
+    # Cells near the other bots
+    #
+    ###########################################################################
+    def _work_out(
+        self,
+        board: Board,
+        bot: GameObject,
+        bots: Dict[int, Tuple[int, int, int, int]],
+        cells: List[int],
+        backend: str,
+    ) -> None:
+        """
+        Work out cells near the other bots, as GreedyDiamondBot does
+        """
+        if not cells:
+            return
+        if backend == "numpy":
+            self._work_out_numpy(board, bot, bots, cells)
+            self.cells += len(cells)
+            return
+        logic = self.logic
+        history = logic.board_state.history
+        index = board.spatial
+        for cell in cells:
+            y, x = divmod(cell, self.width)
+            position = Position(x=x, y=y)
+            enemies = self._enemies(board, bot, position)
+            move = logic.avoid_enemies(position, enemies, history) if enemies else None
+            if move:
+                for moves in self.moves:
+                    moves[cell] = _CODES[move]
+            else:
+                best = self._searcher(position, board.diamonds, enemies, index)
+                self._write(self.moves, cell, x, y, best)
+        self.cells += len(cells)
+
+    def _enemies(
+        self, board: Board, bot: GameObject, position: Position
+    ) -> List[GameObject]:
+        return [
+            enemy
+            for enemy in board.spatial.within(position, self.logic.danger_radius, BOT)
+            if enemy.id != bot.id
+        ]
+
+    def _searcher(
+        self,
+        position: Position,
+        diamonds: List[GameObject],
+        enemies: List[GameObject],
+        index=None,
+    ) -> BestFunction:
+        values = self._values
+
+        def best(level: int) -> Optional[Cell]:
+            diamond = self.logic.find_best_diamond(
+                position, diamonds, enemies, index, values[level - 1]
+            )
+            return (diamond.position.x, diamond.position.y) if diamond else None
+
+        return best
+
+    def _work_out_numpy(
+        self,
+        board: Board,
+        bot: GameObject,
+        bots: Dict[int, Tuple[int, int, int, int]],
+        cells: List[int],
+    ) -> None:
+        """
+        _work_out for all cells at once: avoid_enemies on the bots within the
+        danger radius of every cell, then every diamond scored from every
+        cell with those bots making the diamonds near them unsafe
+        """
+        logic = self.logic
+        cells = np.array(cells, dtype=np.int64)
+        ys, xs = np.divmod(cells, self.width)
+        # In board order, like the enemies GreedyDiamondBot gets, so the
+        # first of equally close bots is the same
+        others = sorted(
+            (other for other in board.bots if other.id != bot.id),
+            key=board.spatial.rank,
+        )
+        states = np.array([bots[other.id] for other in others], dtype=np.int64)
+        exs, eys, axs, ays = states.reshape(-1, 4).T
+        distance = np.abs(xs[:, None] - exs) + np.abs(ys[:, None] - eys)
+        near = distance <= logic.danger_radius
+        # Only bots next to the cell or heading for it are fled from
+        ahead = np.abs(xs[:, None] - axs) + np.abs(ys[:, None] - ays)
+        fled = near & ((distance <= 1) | (ahead < distance))
+        flee = np.full(len(cells), EXPLORE, dtype=np.uint8)
+        if len(others):
+            closest = np.where(fled, distance, _INF).argmin(axis=1)
+            rows = np.arange(len(cells))
+            fleeing = fled.any(axis=1) & (
+                distance[rows, closest] <= logic.safe_distance
+            )
+            fx, fy = exs[closest] - xs, eys[closest] - ys
+            codes = np.where(
+                np.abs(fx) > np.abs(fy),
+                np.where(fx < 0, 0, 2),
+                np.where(fy < 0, 1, np.where(fy > 0, 3, 4)),
+            ).astype(np.uint8)
+            flee[fleeing] = codes[fleeing]
+
+        targets = self._contested_targets(xs, ys, near, exs, eys)
+        for moves, codes in zip(self.moves, self._assemble(xs, ys, targets, flee)):
+            np.frombuffer(moves, dtype=np.uint8)[cells] = codes
+
+    def _contested_targets(self, xs, ys, near, exs, eys) -> list:
+        """
+        Best diamond of every cell for every level, all scored at once
+        :param near: near[c, e] is whether bot e is within the danger radius
+            of cell c
+        :return: (codes towards it, found, its cell) per level, None for
+            level 0
+        """
+        logic = self.logic
+        dxs, dys, points = self._packed
+        targets = [None]
+        if not len(dxs):
+            return targets
+        divisors = np.where(points > 0, points, 1)
+        high_value = points >= 2
+        # near_diamond[d, e]: bot e makes diamond d unsafe for the cells it
+        # is near
+        near_diamond = (
+            np.abs(dxs[:, None] - exs) + np.abs(dys[:, None] - eys)
+            <= logic.safe_distance
+        ).astype(np.int32)
+        near = near.astype(np.int32)
+
+        chosen = {level: [] for level in range(1, len(self._values) + 1)}
+        found = {level: [] for level in chosen}
+        step = max(1, CHUNK // len(dxs))
+        for start in range(0, len(xs), step):
+            cx = xs[start : start + step, None]
+            cy = ys[start : start + step, None]
+            unsafe = (near[start : start + step] @ near_diamond.T) > 0
+            # The operations of score_diamond in the same order
+            scores = (np.abs(cx - dxs) + np.abs(cy - dys)) / divisors
+            scores = np.where(unsafe, scores * logic.unsafe_factor, scores)
+            scores[:, high_value] *= logic.high_value_factor
+            rows = np.arange(len(scores))
+            for level, value in enumerate(self._values, 1):
+                fitting = np.where(points > value, np.inf, scores)
+                # argmin returns the first of equal scores, the lowest rank
+                best = fitting.argmin(axis=1)
+                chosen[level].append(best)
+                found[level].append(fitting[rows, best] != np.inf)
+        for level in chosen:
+            best = np.concatenate(chosen[level])
+            has = np.concatenate(found[level])
+            codes = _toward_numpy(xs, ys, dxs[best], dys[best])
+            cells = np.where(has, dys[best] * self.width + dxs[best], -1)
+            targets.append((codes, has, cells))
+        return targets
+
+    def _write(
+        self,
+        moves: List[bytearray],
+        cell: int,
+        x: int,
+        y: int,
+        best: BestFunction,
+    ) -> None:
+        """
+        Codes of one cell for every inventory, following the priorities of
+        GreedyDiamondBot.next_move
+        """
+        base = self.base
+        at_base = base == (x, y)
+        to_base = _toward(x, y, *base) if base is not None and not at_base else None
+        return_at = self.logic.return_at
+        targets: Dict[int, Optional[Cell]] = {}
+        for carried, level in enumerate(self._levels):
+            if to_base is not None and carried >= return_at:
+                code = to_base
+            elif at_base and carried > 0:
+                code = AWAY
+            else:
+                if level not in targets:
+                    targets[level] = best(level) if level else None
+                target = targets[level]
+                if target is not None:
+                    code = _toward(x, y, *target)
+                elif to_base is not None and carried > 0:
+                    code = to_base
+                else:
+                    code = EXPLORE
+            moves[carried][cell] = code
+
+    ###########################################################################
+    #
+    # Lookup
+    #
+    ###########################################################################
+    def move(self, position: Position, diamonds: int, board: Board) -> Tuple[int, int]:
+        """
+        GreedyDiamondBot's move for our bot on a cell with some diamonds
+        """
+        code = self.moves[min(max(diamonds or 0, 0), self.size)][
+            position.y * self.width + position.x
+        ]
+        return self._play(code, position, board)
+
+    def _play(self, code: int, position: Position, board: Board) -> Tuple[int, int]:
+        if code < AWAY:
+            return MOVES[code]
+        if code == AWAY:
+            base = Position(x=self.base[0], y=self.base[1])
+            return self.logic.move_away_from_base(position, base)
+        return self.logic.get_exploration_move(position, board)
+
+    def move_at(
+        self, board: Board, bot: GameObject, x: int, y: int, diamonds: int, skip=()
+    ) -> Tuple[int, int]:
+        """
+        The move of a cell worked out on its own, leaving some diamonds out
+        :param skip: ids of diamonds taken off the board
+        """
+        position = Position(x=x, y=y)
+        enemies = self._enemies(board, bot, position)
+        move = (
+            self.logic.avoid_enemies(position, enemies, self.logic.board_state.history)
+            if enemies
+            else None
+        )
+        if move:
+            return move
+        remaining = [diamond for diamond in board.diamonds if diamond.id not in skip]
+        moves = [bytearray(1) for _ in self._levels]
+        self._write(moves, 0, x, y, self._searcher(position, remaining, enemies))
+        return self._play(moves[min(max(diamonds, 0), self.size)][0], position, board)
+
+    def summary(self) -> str:
+        return (
+            "Policy table: {} builds, {} patches, {} kept, {} cells worked out".format(
+                self.builds, self.patches, self.kept, self.cells
+            )
+        )
+
+
+class PolicyBot(GreedyDiamondBot):
+    def __init__(self, backend: Optional[str] = None, **params):
+        """
+        :param backend: "numpy" or "python" for building the table, by
+            default NumPy if installed
+        :param params: parameters of GreedyDiamondBot
+        """
+        super().__init__(**params)
+        self.table = PolicyTable(self, backend)
+        self._last: Optional[Tuple[GameObject, Tuple[int, int], Board]] = None
+
+    def prepare(self, board_bot: GameObject, board: Board) -> None:
+        """
+        Bring the table up to date with a board before its move is asked
+        for. The play loops call it as soon as the answer to a move arrives
+        """
+        if self.team is None:
+            self.table.update(board, board_bot, self.board_state.update(board))
+
+    def next_move(self, board_bot: GameObject, board: Board):
+        if self.team is not None:
+            # The table knows nothing of teammates and their targets
+            return super().next_move(board_bot, board)
+        try:
+            if self.table.board is not board:
+                # Not prepared, as in the simulator and replays
+                self.prepare(board_bot, board)
+            move = self.table.move(
+                board_bot.position, board_bot.properties.diamonds, board
+            )
+        except Exception as e:
+            log.error("next_move_failed", logic="PolicyBot", error=repr(e))
+            return self.get_safe_random_move()
+        self._last = (board_bot, move, board)
+        return move
+
+    def fallback_move(self) -> Tuple[int, int]:
+        """
+        Move for the tick after the last one, to play when the board that
+        answers a move is late. It assumes the move went through: our bot
+        stands where the move leads, carrying what it picked up there, and
+        nothing else changed
+        """
+        if self._last is None:
+            return self.get_safe_random_move()
+        board_bot, (dx, dy), board = self._last
+        props = board_bot.properties
+        x, y = board_bot.position.x + dx, board_bot.position.y + dy
+        if not (0 <= x < board.width and 0 <= y < board.height) or not (dx or dy):
+            x, y = board_bot.position.x, board_bot.position.y
+        else:
+            for a, b in teleporter_pairs(board):
+                if (a.x, a.y) == (x, y):
+                    x, y = b.x, b.y
+                    break
+                if (b.x, b.y) == (x, y):
+                    x, y = a.x, a.y
+                    break
+
+        carried = props.diamonds or 0
+        taken = []
+        for obj in board.spatial.at(x, y):
+            points = _points(obj) if obj.type == DIAMOND else None
+            if points is not None and carried + points <= self.table.size:
+                carried += points
+                taken.append(obj.id)
+        if props.base and (props.base.x, props.base.y) == (x, y):
+            carried = 0
+        if taken:
+            # The table would still head for the diamonds just taken
+            return self.table.move_at(board, board_bot, x, y, carried, taken)
+        return self.table.move(Position(x=x, y=y), carried, board)
+
+    def summary(self) -> str:
+        return self.table.summary()
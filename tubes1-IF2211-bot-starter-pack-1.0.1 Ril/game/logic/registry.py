@@ -0,0 +1,101 @@
+"""
+Logic controllers by name, imported only when one is picked.
+
+A controller can be named three ways: by a name registered in CONTROLLERS,
+as "package.module:ClassName" like an entry point, or by the name of a
+BaseLogic subclass defined in a module of game.logic. The last is found by
+reading the sources of the package, so only the module of the controller
+that is picked gets imported.
+"""
+import ast
+import importlib
+import os
+from typing import Dict, List, Type
+
+from game.logic.base import BaseLogic
+
+CONTROLLERS: Dict[str, str] = {
+    "Random": "game.logic.random:RandomLogic",
+    "Kece": "game.logic.kece:GreedyDiamondBot",
+    "Route": "game.logic.route:RoutePlannerBot",
+    "MCTS": "game.logic.mcts:MonteCarloBot",
+    "Policy": "game.logic.policy:PolicyBot",
+}
+PACKAGE = "game.logic"
+
+
+def names() -> List[str]:
+    """
+    Every registered name
+    """
+    return list(CONTROLLERS)
+
+
+def discover() -> Dict[str, str]:
+    """
+    Specs of the BaseLogic subclasses defined in the modules of game.logic,
+    by class name, found without importing them
+    :return: dict of class name -> "package.module:ClassName"
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    found = {}
+    for filename in sorted(os.listdir(directory)):
+        module, extension = os.path.splitext(filename)
+        if extension != ".py" or module.startswith("_"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), "rb") as f:
+                tree = ast.parse(f.read(), filename)
+        except (OSError, SyntaxError):
+            continue
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and any(
+                _base_name(base) == "BaseLogic" for base in node.bases
+            ):
+                found.setdefault(
+                    node.name, "{}.{}:{}".format(PACKAGE, module, node.name)
+                )
+    return found
+
+
+def _base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return ""
+
+
+def resolve(name: str) -> str:
+    """
+    Spec of a controller
+    :param name: registered name, "package.module:ClassName" or class name
+    :return: "package.module:ClassName"
+    """
+    if name in CONTROLLERS:
+        return CONTROLLERS[name]
+    if ":" in name:
+        return name
+    spec = discover().get(name)
+    if spec is None:
+        raise ValueError(
+            "Unknown logic controller {}. Valid options are: {}".format(
+                name, ", ".join(names())
+            )
+        )
+    return spec
+
+
+def load(name: str) -> Type[BaseLogic]:
+    """
+    Import a controller class
+    :param name: registered name, "package.module:ClassName" or class name
+    :return: the BaseLogic subclass
+    """
+    module_name, _, class_name = resolve(name).partition(":")
+    controller = getattr(importlib.import_module(module_name), class_name, None)
+    if not (isinstance(controller, type) and issubclass(controller, BaseLogic)):
+        raise ValueError(
+            "{} is not a logic controller (a BaseLogic subclass)".format(name)
+        )
+    return controller
@@ -0,0 +1,363 @@
+"""
+Route planning over several diamonds per trip.
+
+Instead of chasing one diamond at a time, RoutePlannerBot searches for the
+sequence of diamonds that fits in the inventory and, ending at our base,
+delivers the most points per move. The search is a beam search over the
+nearest diamonds, widened step by step until the time budget of the tick
+runs out, so it always has a plan to return. Routes that cannot reach the
+base before milliseconds_left runs out are never chosen.
+
+The chosen route is kept between ticks. While no diamond appears or
+disappears it is followed as is; otherwise it is repaired (collected
+diamonds dropped) and used as the starting point of a new search.
+"""
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from game.board_state import BoardState
+from game.geometry import DistanceMatrix
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.params import Param
+from game.pathfinding import PathFinder
+from game.util import get_direction
+
+DEFAULT_TIME_BUDGET = 0.005
+DEFAULT_CANDIDATES = 12
+DEFAULT_MAX_BEAM = 256
+DEFAULT_INVENTORY_SIZE = 5
+
+Route = Tuple[int, ...]
+
+
+class RoutePlannerBot(BaseLogic):
+    # Constants tune.py may search, passed as keyword arguments. The time
+    # budget is left out: it trades speed for score and is set per machine
+    PARAMS = (
+        Param("candidates", DEFAULT_CANDIDATES, 4, 20, "Diamonds per search"),
+        Param("avoid_radius", 2, 0, 4, "Bots this close are walked around"),
+    )
+
+    def __init__(
+        self,
+        time_budget: float = DEFAULT_TIME_BUDGET,
+        candidates: int = DEFAULT_CANDIDATES,
+        max_beam: int = DEFAULT_MAX_BEAM,
+        avoid_radius: int = 2,
+    ):
+        """
+        :param time_budget: seconds the search may take per tick
+        :param candidates: diamonds considered per search
+        :param max_beam: widest beam tried once narrower ones finish in time
+        :param avoid_radius: bots this close to ours are walked around
+        """
+        self.time_budget = time_budget
+        self.candidates = candidates
+        self.max_beam = max_beam
+        self.avoid_radius = avoid_radius
+        self.board_state = BoardState()
+        self.pathfinder = PathFinder()
+        # Ids of the diamonds still to collect, in order, before going home
+        self.route: List[int] = []
+        self.carried = 0
+        self.searches = 0
+        self.repairs = 0
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        changes = self.board_state.update(board)
+        props = board_bot.properties
+        base = props.base
+        carried = props.diamonds or 0
+        capacity = props.inventory_size or DEFAULT_INVENTORY_SIZE
+
+        route = self._repair(board, carried, capacity)
+        if route != self.route:
+            self.repairs += 1
+        if (
+            changes.reset
+            or changes.spawned
+            or changes.collected
+            or route != self.route
+            or carried != self.carried
+            or not (route or carried)
+            or not self._in_time(board, board_bot, route)
+        ):
+            route = self.plan(board, board_bot, route)
+        self.route = route
+        self.carried = carried
+
+        self.pathfinder.update(board, board_bot, avoid_radius=self.avoid_radius)
+        if route:
+            target = board.get_object(route[0]).position
+        elif carried and base is not None:
+            target = base
+        else:
+            target = self._idle_target(board)
+        return self._step(board, board_bot, target)
+
+    ###########################################################################
+    #
+    # Planning
+    #
+    ###########################################################################
+    def plan(
+        self, board: Board, board_bot: GameObject, seed: Sequence[int] = ()
+    ) -> List[int]:
+        """
+        Best route for this tick, found within the time budget
+        :param seed: route to improve on, e.g. last tick's route repaired
+        :return: ids of the diamonds to collect, in order
+        """
+        props = board_bot.properties
+        if props.base is None:
+            return []
+        deadline = perf_counter() + self.time_budget
+        self.searches += 1
+
+        matrix = DistanceMatrix(board, board_bot)
+        distances = matrix.matrix
+        if matrix.backend == "numpy":
+            distances = distances.tolist()
+        home = self._base_index(matrix, props.base)
+        if home is None:
+            return []
+        diamonds = matrix.slice("diamonds")
+        rows = list(range(diamonds.start, diamonds.stop))
+        points = {row: _points(matrix.objects[row]) for row in rows}
+        carried = props.diamonds or 0
+        capacity = props.inventory_size or DEFAULT_INVENTORY_SIZE
+        moves_left = self._moves_left(board, board_bot)
+
+        candidates = self._candidates(distances, rows, home)
+        by_id = {matrix.objects[row].id: row for row in rows}
+        seeded = tuple(by_id[i] for i in seed if i in by_id)
+        for row in seeded:
+            if row not in candidates:
+                candidates.append(row)
+
+        best = _evaluate(distances, points, home, carried, capacity, moves_left, seeded)
+        if best is None:
+            best = _evaluate(distances, points, home, carried, capacity, moves_left, ())
+        width = 4
+        while True:
+            found, exhaustive = _beam(
+                distances,
+                points,
+                home,
+                candidates,
+                carried,
+                capacity,
+                moves_left,
+                width,
+                deadline,
+            )
+            if found is not None and (best is None or found[0] > best[0]):
+                best = found
+            if exhaustive or width >= self.max_beam or perf_counter() >= deadline:
+                break
+            width *= 2
+        if best is None:
+            return []
+        return [matrix.objects[row].id for row in best[1]]
+
+    def _repair(self, board: Board, carried: int, capacity: int) -> List[int]:
+        """
+        Last route without the diamonds that are gone or no longer fit
+        """
+        route = []
+        load = carried
+        for diamond_id in self.route:
+            diamond = board.get_object(diamond_id)
+            if diamond is None:
+                continue
+            load += _points(diamond)
+            if load > capacity:
+                break
+            route.append(diamond_id)
+        return route
+
+    def _candidates(
+        self, distances: List[List[int]], rows: List[int], home: int
+    ) -> List[int]:
+        """
+        The diamonds nearest to us and the ones that cost the least detour on
+        the way home
+        """
+        half = max(1, self.candidates // 2)
+        near = sorted(rows, key=lambda row: distances[0][row])[:half]
+        on_the_way = sorted(
+            rows, key=lambda row: distances[0][row] + distances[row][home]
+        )
+        candidates = list(near)
+        for row in on_the_way:
+            if len(candidates) >= self.candidates:
+                break
+            if row not in candidates:
+                candidates.append(row)
+        return candidates
+
+    def _in_time(self, board: Board, board_bot: GameObject, route: List[int]) -> bool:
+        """
+        Whether following a route still gets us home before the game ends
+        """
+        moves_left = self._moves_left(board, board_bot)
+        base = board_bot.properties.base
+        if moves_left is None or base is None:
+            return True
+        moves = 0
+        position = board_bot.position
+        for diamond_id in route:
+            target = board.get_object(diamond_id).position
+            moves += abs(position.x - target.x) + abs(position.y - target.y)
+            position = target
+        moves += abs(position.x - base.x) + abs(position.y - base.y)
+        # Manhattan distance overestimates only when a teleporter helps,
+        # which plan() then finds
+        return moves <= moves_left
+
+    @staticmethod
+    def _base_index(matrix: DistanceMatrix, base: Position) -> Optional[int]:
+        bases = matrix.slice("bases")
+        for row in range(bases.start, bases.stop):
+            position = matrix.objects[row].position
+            if position.x == base.x and position.y == base.y:
+                return row
+        return None
+
+    @staticmethod
+    def _moves_left(board: Board, board_bot: GameObject) -> Optional[int]:
+        left = board_bot.properties.milliseconds_left
+        delay = board.minimum_delay_between_moves
+        if left is None or not delay:
+            return None
+        # The move in flight is already spent
+        return max(0, left // delay - 1)
+
+    ###########################################################################
+    #
+    # Moving
+    #
+    ###########################################################################
+    def _step(
+        self, board: Board, board_bot: GameObject, target: Position
+    ) -> Tuple[int, int]:
+        position = board_bot.position
+        steps = self.pathfinder.next_steps(position, target)
+        if len(steps) > 1:
+            # Of the equally short ways, take the one furthest from tackles
+            threat = board.threat
+            return min(
+                steps,
+                key=lambda step: threat.at(
+                    Position(x=position.x + step[0], y=position.y + step[1]),
+                    board_bot,
+                ),
+            )
+        if steps:
+            return steps[0]
+        delta = get_direction(position.x, position.y, target.x, target.y)
+        if delta == (0, 0):
+            # Already there, e.g. waiting for diamonds: step aside and back
+            return (1, 0) if position.x == 0 else (-1, 0)
+        return delta
+
+    @staticmethod
+    def _idle_target(board: Board) -> Position:
+        """
+        Where to go with nothing to collect: the diamond button if there is
+        one, the centre of the board otherwise
+        """
+        buttons = board.diamond_buttons
+        if buttons:
+            return buttons[0].position
+        return Position(y=board.height // 2, x=board.width // 2)
+
+
+###############################################################################
+#
+# Search
+#
+###############################################################################
+def _points(diamond: GameObject) -> int:
+    props = diamond.properties
+    return (props.points or 1) if props else 1
+
+
+def _evaluate(
+    distances: List[List[int]],
+    points: Dict[int, int],
+    home: int,
+    carried: int,
+    capacity: int,
+    moves_left: Optional[int],
+    route: Route,
+) -> Optional[Tuple[float, Route]]:
+    """
+    (points per move, route) of following a route and going home, None when
+    there is nothing to deliver or no time to do it
+    """
+    load = carried
+    moves = 0
+    last = 0
+    for row in route:
+        load += points[row]
+        if load > capacity:
+            return None
+        moves += distances[last][row]
+        last = row
+    moves += distances[last][home]
+    if not load or (moves_left is not None and moves > moves_left):
+        return None
+    return load / max(moves, 1), route
+
+
+def _beam(
+    distances: List[List[int]],
+    points: Dict[int, int],
+    home: int,
+    candidates: List[int],
+    carried: int,
+    capacity: int,
+    moves_left: Optional[int],
+    width: int,
+    deadline: float,
+) -> Tuple[Optional[Tuple[float, Route]], bool]:
+    """
+    One beam search over routes, ranking partial routes by the points per
+    move they would deliver by going home right away
+    :return: (best (rate, route) or None, whether no route was cut off)
+    """
+    best: Optional[Tuple[float, Route]] = None
+    exhaustive = True
+    to_home = [row[home] for row in distances]
+    # (moves so far, load, last row, route)
+    beam: List[Tuple[int, int, int, Route]] = [(0, carried, 0, ())]
+    while beam:
+        expanded = []
+        for moves, load, last, route in beam:
+            if perf_counter() >= deadline:
+                return best, False
+            from_last = distances[last]
+            for row in candidates:
+                load_after = load + points[row]
+                if load_after > capacity or row in route:
+                    continue
+                moves_after = moves + from_last[row]
+                total = moves_after + to_home[row]
+                if moves_left is not None and total > moves_left:
+                    continue
+                rate = load_after / max(total, 1)
+                extended = route + (row,)
+                if best is None or rate > best[0]:
+                    best = (rate, extended)
+                expanded.append((rate, -total, moves_after, load_after, row, extended))
+        if len(expanded) > width:
+            exhaustive = False
+            expanded.sort(reverse=True)
+            del expanded[width:]
+        beam = [
+            (moves_after, load_after, row, extended)
+            for _, _, moves_after, load_after, row, extended in expanded
+        ]
+    return best, exhaustive
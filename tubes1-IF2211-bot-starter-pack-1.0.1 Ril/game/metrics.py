@@ -0,0 +1,148 @@
+"""
+Low overhead timing of every phase of a tick.
+
+Call sites check metrics.enabled before reading the clock, so with metrics
+off (the default) a tick pays one attribute lookup per phase and nothing
+else. Samples go into fixed bucket histograms, which can be written as
+Prometheus text or JSON at game over.
+"""
+import json
+from bisect import bisect_left
+from typing import Dict, List
+
+PHASES = (
+    "prepare",
+    "next_move",
+    "is_valid_move",
+    "http",
+    "decode",
+    "construct",
+    "sleep",
+)
+
+# Upper bounds in seconds, from 1us to 10s in 1-2-5 steps
+BUCKETS: List[float] = [
+    m * 10 ** e / 1e6 for e in range(0, 7) for m in (1, 2, 5)
+] + [10.0]
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket holding the given fraction of samples
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+
+    def observe(self, phase: str, seconds: float) -> None:
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram()
+        histogram.observe(seconds)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            phase: self.histograms[phase].summary()
+            for phase in sorted(self.histograms, key=_phase_order)
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "diamonds_tick") -> str:
+        lines = [
+            "# HELP {}_seconds Time spent in each phase of a tick".format(prefix),
+            "# TYPE {}_seconds histogram".format(prefix),
+        ]
+        for phase in sorted(self.histograms, key=_phase_order):
+            histogram = self.histograms[phase]
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(
+                    '{}_seconds_bucket{{phase="{}",le="{}"}} {}'.format(
+                        prefix, phase, repr(bound), cumulative
+                    )
+                )
+            lines.append(
+                '{}_seconds_bucket{{phase="{}",le="+Inf"}} {}'.format(
+                    prefix, phase, histogram.count
+                )
+            )
+            lines.append(
+                '{}_seconds_sum{{phase="{}"}} {}'.format(
+                    prefix, phase, repr(histogram.total)
+                )
+            )
+            lines.append(
+                '{}_seconds_count{{phase="{}"}} {}'.format(
+                    prefix, phase, histogram.count
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write Prometheus text for .prom/.txt files and JSON otherwise
+        """
+        text = (
+            self.to_prometheus()
+            if path.endswith((".prom", ".txt"))
+            else self.to_json() + "\n"
+        )
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def _phase_order(phase: str):
+    return (PHASES.index(phase) if phase in PHASES else len(PHASES), phase)
+
+
+# Shared by the whole process and disabled until a runner turns it on
+metrics = Metrics()
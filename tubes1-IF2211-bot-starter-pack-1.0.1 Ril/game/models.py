@@ -1,6 +1,17 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-from colorama import Fore, Style
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from game.log import log
+
+if TYPE_CHECKING:
+    from game.spatial import SpatialIndex
+    from game.threat import ThreatField
+
+BOT = "BotGameObject"
+DIAMOND = "DiamondGameObject"
+BASE = "BaseGameObject"
+TELEPORTER = "TeleportGameObject"
+DIAMOND_BUTTON = "DiamondButtonGameObject"
 
 
 @dataclass
@@ -10,17 +21,17 @@ class Bot:
     id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     y: int
     x: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(Position): ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +45,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -59,7 +70,7 @@ class Feature:
     config: Optional[Config] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Board:
     id: int
     width: int
@@ -67,50 +78,133 @@ class Board:
     features: List[Feature]
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
+    # Indexes are built once per snapshot, on first use
+    _by_type: Optional[Dict[str, List[GameObject]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _by_id: Optional[Dict[int, GameObject]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _bots_by_name: Optional[Dict[str, GameObject]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # A game.spatial.SpatialIndex and a game.threat.ThreatField. Typed as
+    # object since dacite resolves every annotation of the class, and both
+    # modules import this one
+    _spatial: Optional[object] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _threat: Optional[object] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _index(self) -> Dict[str, List[GameObject]]:
+        by_type = self._by_type
+        if by_type is None:
+            by_type = {}
+            by_id = {}
+            for obj in self.game_objects or ():
+                by_id[obj.id] = obj
+                objects = by_type.get(obj.type)
+                if objects is None:
+                    by_type[obj.type] = [obj]
+                else:
+                    objects.append(obj)
+            bots_by_name = {}
+            for b in by_type.get(BOT, ()):
+                if b.properties:
+                    bots_by_name.setdefault(b.properties.name, b)
+            self._by_id = by_id
+            self._bots_by_name = bots_by_name
+            self._by_type = by_type
+        return by_type
+
+    def reindex(self) -> None:
+        """
+        Drop the cached views, needed only after game_objects is modified
+        """
+        self._by_type = None
+        self._by_id = None
+        self._bots_by_name = None
+        self._spatial = None
+        self._threat = None
+
+    def objects_of_type(self, type: str) -> List[GameObject]:
+        return self._index().get(type, [])
 
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.objects_of_type(BOT)
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.objects_of_type(DIAMOND)
+
+    @property
+    def bases(self) -> List[GameObject]:
+        return self.objects_of_type(BASE)
+
+    @property
+    def teleporters(self) -> List[GameObject]:
+        return self.objects_of_type(TELEPORTER)
+
+    @property
+    def diamond_buttons(self) -> List[GameObject]:
+        return self.objects_of_type(DIAMOND_BUTTON)
+
+    @property
+    def spatial(self) -> "SpatialIndex":
+        """
+        Spatial index of the game objects, built on first use
+        """
+        if self._spatial is None:
+            from game.spatial import SpatialIndex
+
+            self._spatial = SpatialIndex(
+                self.width, self.height, self.game_objects or ()
+            )
+        return self._spatial
+
+    @property
+    def threat(self) -> "ThreatField":
+        """
+        Threat of every cell from the bots that can tackle, built on first use
+        """
+        if self._threat is None:
+            from game.threat import ThreatField
+
+            self._threat = ThreatField(
+                self.width, self.height, self.game_objects or ()
+            )
+        return self._threat
+
+    def get_object(self, object_id: int) -> Optional[GameObject]:
+        self._index()
+        return self._by_id.get(object_id)
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        self._index()
+        return self._bots_by_name.get(bot.name)
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
         if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
+            log.warning(
+                "invalid_move", reason="Delta values must be between -1 and 1 inclusive"
             )
             return False
 
         if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
+            log.warning("invalid_move", reason="Delta_x and delta_y cannot be equal")
             return False
 
         if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
+            log.warning("invalid_move", reason="X-coordinate out of bounds")
             return False
 
         if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
+            log.warning("invalid_move", reason="Y-coordinate out of bounds")
             return False
 
         return True
@@ -0,0 +1,123 @@
+"""
+Tunable constants of the logic controllers.
+
+A controller declares what can be tuned in a PARAMS class attribute: one
+Param per keyword argument of its constructor, with its default and the
+range tune.py searches. Integer parameters are the ones with an integer
+default.
+
+A parameter file, as written by tune.py and read by main.py --params, is a
+JSON object: {"logic": "Kece", "params": {"safe_distance": 3, ...}}. The
+"logic" entry is optional, and any other entries (tune.py adds how the
+parameters did) are ignored.
+"""
+import itertools
+import json
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+Number = Union[int, float]
+
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    default: Number
+    low: Number
+    high: Number
+    help: str = ""
+
+    @property
+    def integer(self) -> bool:
+        return isinstance(self.default, int)
+
+    def sample(self, rng: random.Random) -> Number:
+        """
+        A value drawn uniformly from the range
+        """
+        if self.integer:
+            return rng.randint(self.low, self.high)
+        return round(rng.uniform(self.low, self.high), 3)
+
+    def check(self, value) -> Number:
+        """
+        :return: value as an int or float
+        :raises ValueError: if it is not a number within the range
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("{} must be a number, not {!r}".format(self.name, value))
+        if self.integer:
+            if value != int(value):
+                raise ValueError("{} must be an integer".format(self.name))
+            value = int(value)
+        if not self.low <= value <= self.high:
+            raise ValueError(
+                "{} must be between {} and {}".format(self.name, self.low, self.high)
+            )
+        return value
+
+
+def declared(controller: type) -> Dict[str, Param]:
+    """
+    The parameters a controller class declares, by name
+    """
+    return {param.name: param for param in getattr(controller, "PARAMS", ())}
+
+
+def defaults(controller: type) -> Dict[str, Number]:
+    return {name: param.default for name, param in declared(controller).items()}
+
+
+def sample(controller: type, rng: random.Random) -> Dict[str, Number]:
+    return {name: param.sample(rng) for name, param in declared(controller).items()}
+
+
+def grid(controller: type) -> Optional[List[Dict[str, Number]]]:
+    """
+    Every parameter set of a controller, or None if some parameter is a float
+    """
+    params = list(declared(controller).values())
+    if not all(param.integer for param in params):
+        return None
+    names = [param.name for param in params]
+    ranges = [range(param.low, param.high + 1) for param in params]
+    return [dict(zip(names, values)) for values in itertools.product(*ranges)]
+
+
+def check(controller: type, values: dict) -> Dict[str, Number]:
+    """
+    Validate parameters for a controller
+    :return: the values, converted to their types
+    :raises ValueError: on an unknown parameter or a bad value
+    """
+    params = declared(controller)
+    checked = {}
+    for name, value in values.items():
+        param = params.get(name)
+        if param is None:
+            raise ValueError(
+                "{} has no parameter {}. Valid options are: {}".format(
+                    controller.__name__, name, ", ".join(params) or "none"
+                )
+            )
+        checked[name] = param.check(value)
+    return checked
+
+
+def read(path: str) -> Tuple[Optional[str], Dict[str, Number]]:
+    """
+    Read a parameter file
+    :return: (logic controller it was written for or None, parameters)
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("params"), dict):
+        raise ValueError('{} has no "params" object'.format(path))
+    return data.get("logic"), data["params"]
+
+
+def write(path: str, logic: str, values: Dict[str, Number], **extra) -> None:
+    with open(path, "w") as f:
+        json.dump({"logic": logic, "params": values, **extra}, f, indent=2)
+        f.write("\n")
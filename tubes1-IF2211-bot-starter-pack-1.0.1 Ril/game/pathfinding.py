@@ -0,0 +1,217 @@
+"""
+Shortest paths on the board grid.
+
+A bot moves one cell along x or y per move. Entering a teleporter lands it
+on the paired teleporter within the same move, and obstacle cells (usually
+the other bots) cannot be entered. A distance field holds the number of
+moves from every cell to one target. Fields are computed by a breadth-first
+search backwards from the target and kept in an LRU cache keyed by the
+target and the layout (board size, teleporters and obstacles), so fields
+towards bases and diamonds are shared between ticks while nothing moves.
+"""
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from game.geometry import teleporter_pairs
+from game.models import BOT, Board, GameObject, Position
+
+DEFAULT_CACHE_SIZE = 256
+UNREACHABLE = -1
+# Tried in this order by next_step when several moves are equally short
+MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+Cell = Tuple[int, int]
+
+
+class _Layout:
+    """
+    The move graph of one board size and teleporter placement
+    """
+
+    __slots__ = ("width", "height", "successors", "predecessors")
+
+    def __init__(self, width: int, height: int, teleporters: Dict[int, int]):
+        self.width = width
+        self.height = height
+        size = width * height
+        # successors[cell]: (dx, dy, cell entered, cell landed on)
+        self.successors: List[List[Tuple[int, int, int, int]]] = [
+            [] for _ in range(size)
+        ]
+        # predecessors[cell]: (cell moved from, cell entered) of every move
+        # landing on cell
+        self.predecessors: List[List[Tuple[int, int]]] = [[] for _ in range(size)]
+        for y in range(height):
+            for x in range(width):
+                cell = y * width + x
+                for dx, dy in MOVES:
+                    nx, ny = x + dx, y + dy
+                    if not (0 <= nx < width and 0 <= ny < height):
+                        continue
+                    entered = ny * width + nx
+                    landed = teleporters.get(entered, entered)
+                    self.successors[cell].append((dx, dy, entered, landed))
+                    self.predecessors[landed].append((cell, entered))
+
+
+class PathFinder:
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._layouts: Dict[tuple, _Layout] = {}
+        self._layout: Optional[_Layout] = None
+        self._obstacles: FrozenSet[int] = frozenset()
+        self._key: tuple = ()
+        self._fields: "OrderedDict[tuple, List[int]]" = OrderedDict()
+
+    def update(
+        self,
+        board: Board,
+        bot: Optional[GameObject] = None,
+        avoid_bots: bool = True,
+        avoid_radius: Optional[int] = None,
+    ) -> None:
+        """
+        Take the layout from a board
+        :param board: latest board
+        :param bot: our bot, which is never an obstacle to itself
+        :param avoid_bots: treat the cells of the other bots as obstacles
+        :param avoid_radius: only avoid bots this close to our bot. Far bots
+            will have moved on before we get there, and leaving them out
+            lets fields be reused while they move
+        """
+        teleporters = [((p.x, p.y), (q.x, q.y)) for p, q in teleporter_pairs(board)]
+        obstacles = ()
+        if avoid_bots:
+            if avoid_radius is not None and bot is not None:
+                others = board.spatial.within(bot.position, avoid_radius, BOT)
+            else:
+                others = board.bots
+            obstacles = [
+                (other.position.x, other.position.y)
+                for other in others
+                if bot is None or other.id != bot.id
+            ]
+        self.set_layout(board.width, board.height, teleporters, obstacles)
+
+    def set_layout(
+        self,
+        width: int,
+        height: int,
+        teleporters: Iterable[Tuple[Cell, Cell]] = (),
+        obstacles: Iterable[Cell] = (),
+    ) -> None:
+        """
+        :param teleporters: ((x, y), (x, y)) of every teleporter pair
+        :param obstacles: (x, y) of every cell that cannot be entered
+        """
+        cells = tuple(
+            sorted(
+                tuple(sorted((ay * width + ax, by * width + bx)))
+                for (ax, ay), (bx, by) in teleporters
+            )
+        )
+        layout_key = (width, height, cells)
+        layout = self._layouts.get(layout_key)
+        if layout is None:
+            jumps = {}
+            for a, b in cells:
+                jumps[a] = b
+                jumps[b] = a
+            layout = self._layouts[layout_key] = _Layout(width, height, jumps)
+        self._layout = layout
+        self._obstacles = frozenset(
+            y * width + x for x, y in obstacles if 0 <= x < width and 0 <= y < height
+        )
+        self._key = (width, height, cells, self._obstacles)
+
+    def field(self, target: Position) -> List[int]:
+        """
+        Moves from every cell to the target, UNREACHABLE where it cannot be
+        reached, indexed by y * width + x
+        :param target: position to reach
+        :return: list of int
+        """
+        layout = self._layout
+        target_cell = target.y * layout.width + target.x
+        key = (target_cell, self._key)
+        fields = self._fields
+        found = fields.get(key)
+        if found is not None:
+            self.hits += 1
+            fields.move_to_end(key)
+            return found
+
+        self.misses += 1
+        found = _search(layout, target_cell, self._obstacles)
+        fields[key] = found
+        if len(fields) > self.cache_size:
+            fields.popitem(last=False)
+        return found
+
+    def distance(self, a: Position, b: Position) -> Optional[int]:
+        """
+        Number of moves from a to b, None if b cannot be reached
+        """
+        moves = self.field(b)[a.y * self._layout.width + a.x]
+        return None if moves == UNREACHABLE else moves
+
+    def next_step(self, a: Position, b: Position) -> Optional[Tuple[int, int]]:
+        """
+        First move of a shortest path from a to b, None if a is at b or b
+        cannot be reached
+        :return: (delta_x, delta_y)
+        """
+        field = self.field(b)
+        layout = self._layout
+        moves = field[a.y * layout.width + a.x]
+        if moves <= 0:
+            return None
+        obstacles = self._obstacles
+        for dx, dy, entered, landed in layout.successors[a.y * layout.width + a.x]:
+            if field[landed] == moves - 1 and (
+                entered == landed or entered not in obstacles
+            ):
+                return dx, dy
+        return None
+
+    def next_steps(self, a: Position, b: Position) -> List[Tuple[int, int]]:
+        """
+        First moves of every shortest path from a to b, in MOVES order,
+        empty if a is at b or b cannot be reached
+        :return: list of (delta_x, delta_y)
+        """
+        field = self.field(b)
+        layout = self._layout
+        moves = field[a.y * layout.width + a.x]
+        if moves <= 0:
+            return []
+        obstacles = self._obstacles
+        return [
+            (dx, dy)
+            for dx, dy, entered, landed in layout.successors[a.y * layout.width + a.x]
+            if field[landed] == moves - 1
+            and (entered == landed or entered not in obstacles)
+        ]
+
+
+def _search(layout: _Layout, target: int, obstacles: FrozenSet[int]) -> List[int]:
+    predecessors = layout.predecessors
+    field = [UNREACHABLE] * (layout.width * layout.height)
+    field[target] = 0
+    queue = deque((target,))
+    pop = queue.popleft
+    push = queue.append
+    while queue:
+        cell = pop()
+        moves = field[cell] + 1
+        for source, entered in predecessors[cell]:
+            if (
+                field[source] == UNREACHABLE
+                and source not in obstacles
+                and (entered == cell or entered not in obstacles)
+            ):
+                field[source] = moves
+                push(source)
+    return field
@@ -0,0 +1,387 @@
+"""
+Recording of games and offline replay through any logic controller.
+
+A recording is one or more sessions written back to back, so the same
+file can be appended to game after game. A session is SESSION_MARKER
+followed by a zlib stream of newline separated JSON frames:
+
+    {"v": 1, "bot": name, "logic": name, "seed": seed}   session header
+    {"m": [dx, dy], "t": microseconds, ...}              one per decision
+
+A decision frame carries the move chosen, the microseconds next_move took
+and what changed on the board since the previous frame, keyed by object id:
+"h" the board fields, "o" new objects, "u" patches of changed objects (only
+the keys that changed, a null property meaning it was unset), "r" removed
+ids and "i" the full id order when it is not the previous order with new
+objects at the end.
+
+A session cut short by a crash has no end of stream. Reading keeps the
+frames it got to and carries on at the marker of the next session.
+"""
+import random
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from operator import attrgetter
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game import codec
+from game.board_state import BoardState
+from game.logic.base import BaseLogic
+from game.models import Board, Bot, GameObject
+
+FORMAT_VERSION = 1
+DEFAULT_FLUSH_EVERY = 32
+# Written uncompressed at the start of every session
+SESSION_MARKER = b"\x00DIAMONDS-REPLAY\x00"
+# Compressed bytes fed to zlib at a time when reading
+_READ_CHUNK = 1 << 16
+
+
+class Recorder:
+    """
+    Streams every board a controller saw and the move it chose to a file
+    """
+
+    def __init__(
+        self,
+        path: str,
+        bot_name: str,
+        logic: Optional[str] = None,
+        seed: Optional[int] = None,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        level: int = 6,
+    ):
+        """
+        :param bot_name: name of the recorded bot on the board
+        :param logic: name of the controller, for the replay defaults
+        :param seed: seed of the random module the controller played with
+        :param flush_every: frames between two flushes to disk
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.ticks = 0
+        self._file = open(path, "ab")
+        self._zip = zlib.compressobj(level)
+        self._pending: List[bytes] = []
+        self._header: Optional[tuple] = None
+        self._features = None
+        self._objects: Dict[int, GameObject] = {}
+        self._order: List[int] = []
+        self._file.write(SESSION_MARKER)
+        self._write(
+            {"v": FORMAT_VERSION, "bot": bot_name, "logic": logic, "seed": seed}
+        )
+        self.flush()
+
+    def record(
+        self, board: Board, move: Tuple[int, int], seconds: Optional[float] = None
+    ) -> None:
+        """
+        Append one decision
+        :param board: board the move was chosen on
+        :param move: (delta_x, delta_y)
+        :param seconds: time next_move took
+        """
+        frame = {"m": [move[0], move[1]]}
+        if seconds is not None:
+            frame["t"] = round(seconds * 1e6)
+
+        header = (
+            board.id,
+            board.width,
+            board.height,
+            board.minimum_delay_between_moves,
+        )
+        if header != self._header or (
+            board.features is not self._features and board.features != self._features
+        ):
+            raw = codec.board_to_dict(board)
+            del raw["gameObjects"]
+            frame["h"] = raw
+            self._header = header
+            self._features = board.features
+
+        board._index()
+        current = board._by_id
+        previous = self._objects
+        get = previous.get
+        # Identity first: with a BoardState most objects are last tick's
+        changed = [obj for obj_id, obj in current.items() if get(obj_id) is not obj]
+        added = 0
+        if changed:
+            new = []
+            patches = []
+            for obj in changed:
+                old = get(obj.id)
+                if old is None:
+                    new.append(codec.game_object_to_dict(obj))
+                else:
+                    patch = _patch(old, obj)
+                    # An equal object decoded again has nothing to patch
+                    if len(patch) > 1:
+                        patches.append(patch)
+            added = len(new)
+            if new:
+                frame["o"] = new
+            if patches:
+                frame["u"] = patches
+
+        expected = self._order
+        if len(current) - added != len(previous):
+            removed = [obj_id for obj_id in previous if obj_id not in current]
+            frame["r"] = removed
+            gone = set(removed)
+            expected = [obj_id for obj_id in expected if obj_id not in gone]
+        order = list(current)
+        if added:
+            expected = expected + [obj_id for obj_id in order if obj_id not in previous]
+        if order != expected:
+            frame["i"] = order
+        self._objects = current
+        self._order = order
+
+        self._write(frame)
+        self.ticks += 1
+
+    def _write(self, frame: dict) -> None:
+        # Frames are compressed in batches, one zlib call per flush
+        pending = self._pending
+        pending.append(codec.dumps(frame))
+        if len(pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Make everything recorded so far readable from the file
+        """
+        pending = self._pending
+        if pending:
+            pending.append(b"")
+            self._file.write(self._zip.compress(b"\n".join(pending)))
+            pending.clear()
+        self._file.write(self._zip.flush(zlib.Z_SYNC_FLUSH))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.write(self._zip.flush(zlib.Z_FINISH))
+        self._file.close()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_PROPERTY_NAMES = [key for _, key in codec.PROPERTY_KEYS]
+_property_values = attrgetter(*(field for field, _ in codec.PROPERTY_KEYS))
+
+
+def _patch(old: GameObject, new: GameObject) -> dict:
+    patch = {"id": new.id}
+    if new.position != old.position:
+        patch["position"] = {"x": new.position.x, "y": new.position.y}
+    if new.type != old.type:
+        patch["type"] = new.type
+    props = new.properties
+    old_props = old.properties
+    if props != old_props:
+        if props is None or old_props is None:
+            patch["properties"] = (
+                codec.game_object_to_dict(new).get("properties")
+                if props is not None
+                else None
+            )
+        else:
+            changes = {
+                key: value
+                for key, value, old_value in zip(
+                    _PROPERTY_NAMES,
+                    _property_values(props),
+                    _property_values(old_props),
+                )
+                if value != old_value
+            }
+            if props.base != old_props.base:
+                changes["base"] = (
+                    {"x": props.base.x, "y": props.base.y} if props.base else None
+                )
+            patch["properties"] = changes
+    return patch
+
+
+def _apply(old: dict, patch: dict) -> dict:
+    raw = {**old, **patch}
+    if "properties" in patch:
+        changes = patch["properties"]
+        old_props = old.get("properties")
+        if changes is not None and old_props is not None:
+            props = {**old_props, **changes}
+            for key, value in changes.items():
+                if value is None:
+                    del props[key]
+            raw["properties"] = props
+    return raw
+
+
+###############################################################################
+#
+# Reading recordings
+#
+###############################################################################
+@dataclass
+class Tick:
+    board: Board
+    move: Tuple[int, int]
+    # Time next_move took when the game was recorded
+    seconds: Optional[float] = None
+
+
+@dataclass
+class Recording:
+    bot: str
+    logic: Optional[str] = None
+    seed: Optional[int] = None
+    ticks: List[Tick] = field(default_factory=list)
+
+
+def _sessions(data: bytes) -> Iterator[bytes]:
+    """
+    Decompressed text of every session, as much as could be read of those
+    that were cut short
+    """
+    position = 0
+    while position < len(data):
+        if data.startswith(SESSION_MARKER, position):
+            position += len(SESSION_MARKER)
+        # Files written before sessions had markers are plain streams
+        next_marker = data.find(SESSION_MARKER, position)
+        end = next_marker if next_marker >= 0 else len(data)
+        unzip = zlib.decompressobj()
+        parts = []
+        try:
+            for start in range(position, end, _READ_CHUNK):
+                stop = min(start + _READ_CHUNK, end)
+                parts.append(unzip.decompress(data[start:stop]))
+                if unzip.eof:
+                    break
+        except zlib.error:
+            # Garbage after the last flush of a crashed session
+            pass
+        yield b"".join(parts)
+        if unzip.eof and unzip.unused_data:
+            # Another stream right after this one, without a marker
+            position = stop - len(unzip.unused_data)
+        else:
+            position = end
+
+
+def _frames(path: str) -> Iterator[dict]:
+    with open(path, "rb") as f:
+        data = f.read()
+    for text in _sessions(data):
+        for line in text.split(b"\n"):
+            if not line:
+                continue
+            try:
+                yield codec.loads(line)
+            except ValueError:
+                # The last frame of an unfinished session
+                break
+
+
+def read(path: str) -> List[Recording]:
+    """
+    Load every session of a recording, rebuilding each board
+    :param path: recording file
+    :return: one Recording per session
+    """
+    recordings = []
+    recording = None
+    for frame in _frames(path):
+        if "v" in frame:
+            if frame["v"] > FORMAT_VERSION:
+                raise ValueError(
+                    "Recording format {} is newer than {}".format(
+                        frame["v"], FORMAT_VERSION
+                    )
+                )
+            recording = Recording(
+                bot=frame["bot"], logic=frame.get("logic"), seed=frame.get("seed")
+            )
+            recordings.append(recording)
+            header: Optional[dict] = None
+            objects: Dict[int, dict] = {}
+            # Unchanged objects stay the same model instances, as in a live game
+            state = BoardState()
+            continue
+        if recording is None:
+            raise ValueError("{} does not start with a session header".format(path))
+
+        if "h" in frame:
+            header = frame["h"]
+        for obj_id in frame.get("r", ()):
+            del objects[obj_id]
+        for raw in frame.get("o", ()):
+            objects[raw["id"]] = raw
+        for patch in frame.get("u", ()):
+            objects[patch["id"]] = _apply(objects[patch["id"]], patch)
+        if "i" in frame:
+            objects = {obj_id: objects[obj_id] for obj_id in frame["i"]}
+        board = state.board_from_dict({**header, "gameObjects": list(objects.values())})
+        move = frame["m"]
+        seconds = frame["t"] / 1e6 if "t" in frame else None
+        recording.ticks.append(Tick(board, (move[0], move[1]), seconds))
+    return recordings
+
+
+###############################################################################
+#
+# Replay
+#
+###############################################################################
+@dataclass
+class ReplayResult:
+    ticks: int = 0
+    # (tick, recorded move, replayed move) wherever the two differ
+    mismatches: List[Tuple[int, Tuple[int, int], Tuple[int, int]]] = field(
+        default_factory=list
+    )
+    # Seconds per next_move, replayed and as recorded
+    latencies: array = field(default_factory=lambda: array("d"))
+    recorded: array = field(default_factory=lambda: array("d"))
+    elapsed: float = 0.0
+
+
+def replay(recording: Recording, logic: BaseLogic) -> ReplayResult:
+    """
+    Feed a recorded game through a controller as fast as it can decide
+    :param recording: one session of a recording
+    :param logic: a fresh controller
+    :return: ReplayResult
+    """
+    if recording.seed is not None:
+        # Controllers that use the random module then decide as they did live
+        random.seed(recording.seed)
+    bot = Bot(name=recording.bot, email="", id="")
+    result = ReplayResult()
+    latencies = result.latencies
+    started = perf_counter()
+    for i, tick in enumerate(recording.ticks):
+        board = tick.board
+        board_bot = board.get_bot(bot)
+        start = perf_counter()
+        delta_x, delta_y = logic.next_move(board_bot, board)
+        latencies.append(perf_counter() - start)
+        if (delta_x, delta_y) != tick.move:
+            result.mismatches.append((i, tick.move, (delta_x, delta_y)))
+        if tick.seconds is not None:
+            result.recorded.append(tick.seconds)
+    result.elapsed = perf_counter() - started
+    result.ticks = len(recording.ticks)
+    return result
@@ -0,0 +1,138 @@
+from time import perf_counter, sleep
+from typing import Optional
+
+from game.metrics import metrics
+from game.models import Board, GameObject
+
+DEFAULT_MARGIN = 0.002
+
+
+class MoveScheduler:
+    """
+    Paces the play loop so each move is sent as soon as the server's
+    minimum delay between moves allows.
+
+    The loop computes its next move right after a board comes back, while the
+    delay window of the previous move is still running, and only then waits
+    for whatever is left of the window. Near the end of the game the wait is
+    cut short so the final moves are still sent before time runs out.
+    """
+
+    def __init__(
+        self,
+        minimum_delay_between_moves: int,
+        time_factor: float = 1,
+        margin: float = DEFAULT_MARGIN,
+    ):
+        self.time_factor = time_factor
+        self.margin = margin
+        self.delay = minimum_delay_between_moves / 1000 * time_factor
+        self.next_send = 0.0
+        self.deadline: Optional[float] = None
+        self.round_trip = 0.0
+        self.moves = 0
+        self.skipped = 0
+        self.started: Optional[float] = None
+        self.last_sent: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def observe(self, board: Board, board_bot: GameObject) -> None:
+        """
+        Refresh the delay and the game deadline from a new board
+        :param board: latest board
+        :param board_bot: our bot on that board
+        """
+        self.delay = board.minimum_delay_between_moves / 1000 * self.time_factor
+        props = board_bot.properties
+        if props and props.milliseconds_left is not None:
+            self.deadline = perf_counter() + props.milliseconds_left / 1000
+
+    def wait_time(self) -> float:
+        """
+        Seconds left before the next move may be sent
+        :return: float
+        """
+        now = perf_counter()
+        wait = self.next_send - now
+        if self.deadline is not None:
+            # Never wait past the point where the move could still arrive in time
+            wait = min(wait, self.deadline - now - self.round_trip)
+        return max(0.0, wait)
+
+    def wait(self) -> None:
+        wait = self.wait_time()
+        if wait > 0:
+            if metrics.enabled:
+                start = perf_counter()
+                sleep(wait)
+                metrics.observe("sleep", perf_counter() - start)
+            else:
+                sleep(wait)
+
+    def sent(self) -> None:
+        """
+        Mark that a move request is being sent now
+        """
+        now = perf_counter()
+        if self.started is None:
+            self.started = now
+        self.last_sent = now
+        # The margin only guards the server's delay check, so skip it without one
+        self.next_send = now + self.delay + self.margin if self.delay > 0 else now
+        self.moves += 1
+
+    def received(self) -> None:
+        """
+        Mark that the response to the last move arrived
+        """
+        now = perf_counter()
+        self.finished = now
+        if self.last_sent is not None:
+            sample = now - self.last_sent
+            # Exponentially weighted, so a single slow response does not stall us
+            self.round_trip = (
+                sample if self.moves == 1 else 0.8 * self.round_trip + 0.2 * sample
+            )
+
+    def skip(self) -> None:
+        """
+        Give up the current move slot, e.g. after an invalid move
+        """
+        self.skipped += 1
+        self.next_send = max(self.next_send, perf_counter() + self.delay)
+
+    def report(self) -> dict:
+        """
+        Achieved move rate against the theoretical maximum
+        :return: dict
+        """
+        elapsed = (
+            (self.finished - self.started)
+            if self.started is not None and self.finished is not None
+            else 0.0
+        )
+        achieved = self.moves / elapsed if elapsed > 0 else 0.0
+        maximum = 1 / self.delay if self.delay > 0 else float("inf")
+        return {
+            "moves": self.moves,
+            "skipped": self.skipped,
+            "elapsed": elapsed,
+            "moves_per_second": achieved,
+            "max_moves_per_second": maximum,
+            "efficiency": achieved / maximum if self.delay > 0 else 1.0,
+            "round_trip": self.round_trip,
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        if self.delay <= 0:
+            return "{} moves in {:.1f}s: {:.2f} moves/s (no move delay)".format(
+                report["moves"], report["elapsed"], report["moves_per_second"]
+            )
+        return "{} moves in {:.1f}s: {:.2f} moves/s of {:.2f} possible ({:.0%})".format(
+            report["moves"],
+            report["elapsed"],
+            report["moves_per_second"],
+            report["max_moves_per_second"],
+            report["efficiency"],
+        )
@@ -0,0 +1,167 @@
+"""
+GreedyDiamondBot's diamond score for every diamond of a board at once.
+
+The score of a diamond is its distance divided by its points, multiplied
+by unsafe_factor (2 by default) when an enemy is within the safe distance of
+it and by high_value_factor (0.7) for diamonds worth 2 or more; the lowest
+score wins. DiamondBatch packs the
+positions and points of the diamonds into arrays once per board, and
+best() scores all of them in one pass and returns the same diamond as
+GreedyDiamondBot.score_diamond over the diamonds in board order, ties going
+to the earliest. With NumPy installed large boards are scored with array
+operations; small boards, and installs without NumPy, use plain lists,
+which are faster below NUMPY_MIN_DIAMONDS diamonds.
+"""
+from typing import List, Optional, Sequence
+
+from game.models import GameObject, Position
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this many diamonds the list backend packs and scores faster than
+# NumPy (benchmarks/bench_scoring.py puts the crossover near 90)
+NUMPY_MIN_DIAMONDS = 90
+UNSAFE_FACTOR = 2
+HIGH_VALUE_POINTS = 2
+HIGH_VALUE_FACTOR = 0.7
+
+
+class DiamondBatch:
+    def __init__(
+        self,
+        diamonds: Sequence[GameObject],
+        backend: Optional[str] = None,
+        unsafe_factor: float = UNSAFE_FACTOR,
+        high_value_factor: float = HIGH_VALUE_FACTOR,
+    ):
+        """
+        :param diamonds: diamonds in board order
+        :param backend: "numpy" or "python", by default picked by count
+        :param unsafe_factor: score factor of diamonds near an enemy
+        :param high_value_factor: score factor of diamonds worth 2 or more
+        """
+        self.unsafe_factor = unsafe_factor
+        self.high_value_factor = high_value_factor
+        # Diamonds whose points are unknown are never chosen, like
+        # score_diamond returning None for them
+        self.diamonds = [
+            diamond
+            for diamond in diamonds
+            if diamond.properties is None or diamond.properties.points is not None
+        ]
+        if backend is None:
+            backend = (
+                "numpy"
+                if np is not None and len(self.diamonds) >= NUMPY_MIN_DIAMONDS
+                else "python"
+            )
+        elif backend == "numpy" and np is None:
+            raise ImportError("The numpy backend needs NumPy installed")
+        self.backend = backend
+
+        xs = [diamond.position.x for diamond in self.diamonds]
+        ys = [diamond.position.y for diamond in self.diamonds]
+        points = [
+            diamond.properties.points if diamond.properties else 1
+            for diamond in self.diamonds
+        ]
+        # The distance is divided by the points only when they are positive.
+        # The factors are applied one after the other, as score_diamond does,
+        # so the scores round the same way
+        divisors = [p if p > 0 else 1 for p in points]
+        high_value = [p >= HIGH_VALUE_POINTS for p in points]
+        if backend == "numpy":
+            self.xs = np.array(xs, dtype=np.int64)
+            self.ys = np.array(ys, dtype=np.int64)
+            self.points = np.array(points, dtype=np.int64)
+            self.divisors = np.array(divisors, dtype=np.float64)
+            self.high_value = np.array(high_value, dtype=bool)
+        else:
+            self.xs = xs
+            self.ys = ys
+            self.points = points
+            self.divisors = divisors
+            self.high_value = high_value
+
+    def __len__(self) -> int:
+        return len(self.diamonds)
+
+    def best(
+        self,
+        position: Position,
+        enemies: Sequence[GameObject],
+        safe_distance: int,
+        room: Optional[int] = None,
+    ) -> Optional[GameObject]:
+        """
+        The diamond with the lowest score seen from position
+        :param enemies: bots that make the diamonds near them unsafe
+        :param safe_distance: diamonds this close to an enemy are unsafe
+        :param room: diamonds worth more points are skipped
+        """
+        if not self.diamonds:
+            return None
+        enemy_xs = [enemy.position.x for enemy in enemies]
+        enemy_ys = [enemy.position.y for enemy in enemies]
+        if self.backend == "numpy":
+            i = _numpy_best(self, position, enemy_xs, enemy_ys, safe_distance, room)
+        else:
+            i = _python_best(self, position, enemy_xs, enemy_ys, safe_distance, room)
+        return self.diamonds[i] if i is not None else None
+
+
+def _python_best(
+    batch: DiamondBatch,
+    position: Position,
+    enemy_xs: List[int],
+    enemy_ys: List[int],
+    safe_distance: int,
+    room: Optional[int],
+) -> Optional[int]:
+    x, y = position.x, position.y
+    enemies = list(zip(enemy_xs, enemy_ys))
+    unsafe_factor, high_value_factor = batch.unsafe_factor, batch.high_value_factor
+    best = None
+    best_score = float("inf")
+    for i, (dx, dy, points, divisor, high_value) in enumerate(
+        zip(batch.xs, batch.ys, batch.points, batch.divisors, batch.high_value)
+    ):
+        if room is not None and points > room:
+            continue
+        score = (abs(dx - x) + abs(dy - y)) / divisor
+        for ex, ey in enemies:
+            if abs(ex - dx) + abs(ey - dy) <= safe_distance:
+                score *= unsafe_factor
+                break
+        if high_value:
+            score *= high_value_factor
+        if score < best_score:
+            best, best_score = i, score
+    return best
+
+
+def _numpy_best(
+    batch: DiamondBatch,
+    position: Position,
+    enemy_xs: List[int],
+    enemy_ys: List[int],
+    safe_distance: int,
+    room: Optional[int],
+) -> Optional[int]:
+    xs, ys = batch.xs, batch.ys
+    scores = (np.abs(xs - position.x) + np.abs(ys - position.y)) / batch.divisors
+    if enemy_xs:
+        ex = np.array(enemy_xs, dtype=np.int64)
+        ey = np.array(enemy_ys, dtype=np.int64)
+        near = np.abs(xs[:, None] - ex[None, :]) + np.abs(ys[:, None] - ey[None, :])
+        unsafe = (near <= safe_distance).any(axis=1)
+        scores[unsafe] *= batch.unsafe_factor
+    scores[batch.high_value] *= batch.high_value_factor
+    if room is not None:
+        scores[batch.points > room] = np.inf
+    # argmin returns the first of equal scores, the earliest in board order
+    i = int(scores.argmin())
+    return i if scores[i] != np.inf else None
@@ -0,0 +1,472 @@
+"""
+Headless in-process implementation of the Diamonds game rules.
+
+The simulator keeps the game state as game.models objects and never mutates
+one in place: every change replaces the object, so a snapshot is just the
+current list and objects that did not change stay the same instances across
+snapshots. Time is logical. Each move costs the moving bot
+minimum_delay_between_moves milliseconds of its session, so games run as
+fast as the controllers can decide.
+
+SimulatorApi exposes the same methods as game.api.Api, so the play loop of
+main.py can run against it with no server.
+"""
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import (
+    BASE,
+    BOT,
+    DIAMOND,
+    DIAMOND_BUTTON,
+    TELEPORTER,
+    Base,
+    Board,
+    Bot,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+DIRECTION_DELTAS = {
+    "NORTH": (0, -1),
+    "SOUTH": (0, 1),
+    "EAST": (1, 0),
+    "WEST": (-1, 0),
+}
+
+
+@dataclass
+class SimulatorConfig:
+    width: int = 15
+    height: int = 15
+    minimum_delay_between_moves: int = 100
+    seconds: int = 60
+    inventory_size: int = 5
+    can_tackle: bool = True
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.01
+    red_ratio: float = 0.2
+    teleporter_pairs: int = 1
+    diamond_button: bool = True
+
+
+def _with_properties(obj: GameObject, **changes) -> GameObject:
+    props = obj.properties
+    return GameObject(
+        id=obj.id,
+        position=obj.position,
+        type=obj.type,
+        properties=Properties(
+            points=changes.get("points", props.points),
+            pair_id=changes.get("pair_id", props.pair_id),
+            diamonds=changes.get("diamonds", props.diamonds),
+            score=changes.get("score", props.score),
+            name=changes.get("name", props.name),
+            inventory_size=changes.get("inventory_size", props.inventory_size),
+            can_tackle=changes.get("can_tackle", props.can_tackle),
+            milliseconds_left=changes.get("milliseconds_left", props.milliseconds_left),
+            time_joined=changes.get("time_joined", props.time_joined),
+            base=changes.get("base", props.base),
+        ),
+    )
+
+
+def _at(obj: GameObject, x: int, y: int, **changes) -> GameObject:
+    moved = _with_properties(obj, **changes) if changes else obj
+    return GameObject(
+        id=moved.id, position=Position(y=y, x=x), type=moved.type, properties=moved.properties
+    )
+
+
+class Simulator:
+    def __init__(
+        self,
+        config: Optional[SimulatorConfig] = None,
+        seed: Optional[int] = None,
+        board_id: int = 1,
+    ):
+        self.config = config or SimulatorConfig()
+        self.rng = random.Random(seed)
+        self.board_id = board_id
+        self.now = 0
+        self.moves = 0
+        self._next_id = 1
+        self._objects: Dict[int, GameObject] = {}
+        self._bots: Dict[str, int] = {}
+        self._bases: Dict[str, int] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self.final_scores: Dict[str, int] = {}
+        self._board: Optional[Board] = None
+
+        c = self.config
+        self.features = [
+            Feature(
+                name="DiamondsFeature",
+                config=Config(
+                    generation_ratio=c.generation_ratio,
+                    min_ratio_for_generation=c.min_ratio_for_generation,
+                    red_ratio=c.red_ratio,
+                ),
+            ),
+            Feature(
+                name="BotsFeature",
+                config=Config(
+                    seconds=c.seconds,
+                    inventory_size=c.inventory_size,
+                    can_tackle=c.can_tackle,
+                ),
+            ),
+            Feature(name="TeleportFeature", config=Config(pairs=c.teleporter_pairs)),
+        ]
+        if c.diamond_button:
+            self.features.append(Feature(name="DiamondButtonFeature"))
+
+        for i in range(c.teleporter_pairs):
+            pair_id = str(i + 1)
+            for _ in range(2):
+                self._spawn(TELEPORTER, Properties(pair_id=pair_id))
+        if c.diamond_button:
+            self._spawn(DIAMOND_BUTTON, Properties())
+        self._generate_diamonds()
+
+    ###########################################################################
+    #
+    # Object bookkeeping
+    #
+    ###########################################################################
+    def _free_cell(self) -> Tuple[int, int]:
+        c = self.config
+        if len(self._cells) >= c.width * c.height:
+            raise RuntimeError("Board is full")
+        while True:
+            cell = (self.rng.randrange(c.width), self.rng.randrange(c.height))
+            if cell not in self._cells:
+                return cell
+
+    def _put(self, obj: GameObject) -> None:
+        self._objects[obj.id] = obj
+        self._cells.setdefault((obj.position.x, obj.position.y), []).append(obj.id)
+        self._board = None
+
+    def _take(self, obj: GameObject) -> None:
+        del self._objects[obj.id]
+        cell = (obj.position.x, obj.position.y)
+        ids = self._cells[cell]
+        ids.remove(obj.id)
+        if not ids:
+            del self._cells[cell]
+        self._board = None
+
+    def _replace(self, obj: GameObject) -> None:
+        old = self._objects[obj.id]
+        if old.position.x != obj.position.x or old.position.y != obj.position.y:
+            self._take(old)
+            self._put(obj)
+        else:
+            self._objects[obj.id] = obj
+            self._board = None
+
+    def _spawn(
+        self, type: str, properties: Properties, cell: Optional[Tuple[int, int]] = None
+    ) -> GameObject:
+        x, y = cell or self._free_cell()
+        obj = GameObject(
+            id=self._next_id, position=Position(y=y, x=x), type=type, properties=properties
+        )
+        self._next_id += 1
+        self._put(obj)
+        return obj
+
+    def _objects_at(self, x: int, y: int) -> List[GameObject]:
+        return [self._objects[i] for i in self._cells.get((x, y), ())]
+
+    def _diamond_count(self) -> int:
+        return sum(1 for obj in self._objects.values() if obj.type == DIAMOND)
+
+    def _generate_diamonds(self) -> None:
+        c = self.config
+        cells = c.width * c.height
+        target = max(1, int(cells * c.generation_ratio))
+        free = cells - len(self._cells)
+        for _ in range(min(target - self._diamond_count(), free)):
+            points = 2 if self.rng.random() < c.red_ratio else 1
+            self._spawn(DIAMOND, Properties(points=points))
+
+    def _maybe_generate_diamonds(self) -> None:
+        c = self.config
+        minimum = c.width * c.height * c.min_ratio_for_generation
+        if self._diamond_count() <= minimum:
+            self._generate_diamonds()
+
+    def _press_button(self, button: GameObject) -> None:
+        for obj in list(self._objects.values()):
+            if obj.type == DIAMOND:
+                self._take(obj)
+        self._take(button)
+        self._generate_diamonds()
+        x, y = self._free_cell()
+        self._put(_at(button, x, y))
+
+    ###########################################################################
+    #
+    # Bots
+    #
+    ###########################################################################
+    def add_bot(self, name: str) -> GameObject:
+        """
+        Put a new bot and its base on a random free cell
+        :param name: unique bot name
+        :return: the bot's GameObject
+        """
+        if name in self._bots:
+            raise ValueError("Bot {} already joined".format(name))
+        c = self.config
+        x, y = self._free_cell()
+        base = self._spawn(BASE, Properties(name=name), (x, y))
+        bot = self._spawn(
+            BOT,
+            Properties(
+                diamonds=0,
+                score=0,
+                name=name,
+                inventory_size=c.inventory_size,
+                can_tackle=c.can_tackle,
+                milliseconds_left=c.seconds * 1000,
+                time_joined=str(self.now),
+                base=Base(y=y, x=x),
+            ),
+            (x, y),
+        )
+        self._bases[name] = base.id
+        self._bots[name] = bot.id
+        return bot
+
+    def bot(self, name: str) -> Optional[GameObject]:
+        bot_id = self._bots.get(name)
+        return self._objects[bot_id] if bot_id is not None else None
+
+    @property
+    def bot_names(self) -> List[str]:
+        return list(self._bots)
+
+    @property
+    def finished(self) -> bool:
+        return not self._bots
+
+    def scores(self) -> Dict[str, int]:
+        scores = dict(self.final_scores)
+        for name in self._bots:
+            scores[name] = self.bot(name).properties.score
+        return scores
+
+    def _send_home(self, bot: GameObject) -> GameObject:
+        base = bot.properties.base
+        return _at(bot, base.x, base.y, diamonds=0)
+
+    def move(self, name: str, delta_x: int, delta_y: int) -> bool:
+        """
+        Apply one move of a bot and the effects of the cell it enters
+        :return: False if the move is not allowed
+        """
+        bot = self.bot(name)
+        if bot is None or abs(delta_x) + abs(delta_y) != 1:
+            return False
+        c = self.config
+        x, y = bot.position.x + delta_x, bot.position.y + delta_y
+        if not (0 <= x < c.width and 0 <= y < c.height):
+            return False
+
+        props = bot.properties
+        diamonds = props.diamonds
+        score = props.score
+        for other in self._objects_at(x, y):
+            if other.type == BOT:
+                if not props.can_tackle:
+                    return False
+                # Tackle: the other bot goes home and drops its diamonds on us
+                stolen = min(other.properties.diamonds, c.inventory_size - diamonds)
+                diamonds += stolen
+                self._replace(self._send_home(other))
+            elif other.type == TELEPORTER:
+                pair = next(
+                    obj
+                    for obj in self._objects.values()
+                    if obj.type == TELEPORTER
+                    and obj.properties.pair_id == other.properties.pair_id
+                    and obj.id != other.id
+                )
+                x, y = pair.position.x, pair.position.y
+            elif other.type == DIAMOND:
+                points = other.properties.points
+                if diamonds + points <= c.inventory_size:
+                    diamonds += points
+                    self._take(other)
+            elif other.type == DIAMOND_BUTTON:
+                self._press_button(other)
+
+        base = props.base
+        if base.x == x and base.y == y:
+            score += diamonds
+            diamonds = 0
+
+        self._replace(_at(bot, x, y, diamonds=diamonds, score=score))
+        self._maybe_generate_diamonds()
+        self.moves += 1
+        return True
+
+    def spend(self, name: str, milliseconds: int) -> None:
+        """
+        Count down the session of a bot, removing it when it runs out
+        """
+        bot = self.bot(name)
+        if bot is None:
+            return
+        left = bot.properties.milliseconds_left - milliseconds
+        if left > 0:
+            self._replace(_with_properties(bot, milliseconds_left=left))
+            return
+        self.final_scores[name] = bot.properties.score
+        self._take(bot)
+        self._take(self._objects[self._bases.pop(name)])
+        del self._bots[name]
+
+    ###########################################################################
+    #
+    # Snapshots and whole games
+    #
+    ###########################################################################
+    def board(self) -> Board:
+        """
+        Snapshot of the current state, shaped like a server response
+        """
+        if self._board is None:
+            self._board = Board(
+                id=self.board_id,
+                width=self.config.width,
+                height=self.config.height,
+                features=self.features,
+                minimum_delay_between_moves=self.config.minimum_delay_between_moves,
+                game_objects=list(self._objects.values()),
+            )
+        return self._board
+
+    def step(self, moves: Dict[str, Tuple[int, int]]) -> None:
+        """
+        One round: apply every bot's move in random order, then spend one
+        move delay of every bot's session
+        """
+        names = list(moves)
+        self.rng.shuffle(names)
+        for name in names:
+            self.move(name, *moves[name])
+        delay = self.config.minimum_delay_between_moves
+        self.now += delay
+        for name in list(self._bots):
+            self.spend(name, delay)
+
+    def play(
+        self,
+        controllers: Dict[str, BaseLogic],
+        on_decision: Optional[Callable[[str, float], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Play a whole game with one controller per bot name
+        :param on_decision: called with (name, seconds) for every next_move
+        :return: final score per bot
+        """
+        from time import perf_counter
+
+        for name in controllers:
+            if self.bot(name) is None:
+                self.add_bot(name)
+        while not self.finished:
+            board = self.board()
+            moves = {}
+            for name, controller in controllers.items():
+                bot = self.bot(name)
+                if bot is None:
+                    continue
+                start = perf_counter()
+                try:
+                    moves[name] = controller.next_move(bot, board)
+                except Exception:
+                    moves[name] = (0, 0)
+                if on_decision is not None:
+                    on_decision(name, perf_counter() - start)
+            self.step(moves)
+        return self.scores()
+
+
+class SimulatorApi:
+    """
+    Drop-in replacement for game.api.Api backed by a Simulator
+    """
+
+    def __init__(self, simulator: Optional[Simulator] = None):
+        self.simulator = simulator or Simulator()
+        self._accounts: Dict[str, Bot] = {}
+        self._passwords: Dict[str, str] = {}
+
+    def bots_get(self, bot_token: str) -> Optional[Bot]:
+        return self._accounts.get(bot_token)
+
+    def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        if any(bot.email == email or bot.name == name for bot in self._accounts.values()):
+            return None
+        bot = Bot(name=name, email=email, id="sim-{}".format(len(self._accounts) + 1))
+        self._accounts[bot.id] = bot
+        self._passwords[bot.id] = password
+        return bot
+
+    def bots_recover(self, email: str, password: str) -> Optional[str]:
+        for token, bot in self._accounts.items():
+            if bot.email == email and self._passwords[token] == password:
+                return token
+        return None
+
+    def boards_list(self) -> Optional[List[Board]]:
+        return [self.simulator.board()]
+
+    def bots_join(self, bot_token: str, board_id: int) -> bool:
+        bot = self._accounts.get(bot_token)
+        if bot is None or int(board_id) != self.simulator.board_id:
+            return False
+        if self.simulator.bot(bot.name) is None:
+            self.simulator.add_bot(bot.name)
+        return True
+
+    def boards_get(self, board_id: str) -> Optional[Board]:
+        if int(board_id) != self.simulator.board_id:
+            return None
+        return self.simulator.board()
+
+    def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        bot = self._accounts.get(bot_token)
+        delta = DIRECTION_DELTAS.get(direction)
+        if bot is None:
+            return None
+        moved = delta is not None and self.simulator.move(bot.name, *delta)
+        # A refused move uses up its slot too, so the session always runs out
+        self.skip(bot_token)
+        return self.simulator.board() if moved else None
+
+    def skip(self, bot_token: str) -> None:
+        """
+        Let the delay between two moves pass without moving, as it does on a
+        server while a bot gives up a move
+        """
+        bot = self._accounts.get(bot_token)
+        if bot is not None:
+            self.simulator.spend(
+                bot.name, self.simulator.config.minimum_delay_between_moves
+            )
+
+    def close(self) -> None:
+        pass
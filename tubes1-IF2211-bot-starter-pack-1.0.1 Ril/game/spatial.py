@@ -0,0 +1,248 @@
+"""
+Spatial index over the objects of a board: an occupancy map of exact cells
+plus a coarse grid of square buckets per object type. Radius and nearest
+queries only visit the buckets that can hold an answer, so their cost grows
+with the size of the neighbourhood instead of the number of objects.
+"""
+import heapq
+import math
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from game.models import DIAMOND, GameObject, Position
+
+Bucket = Tuple[int, int]
+# A score of None means the object is not a candidate
+ScoreFunction = Callable[[GameObject, int], Optional[float]]
+
+# Slack so float rounding in a lower bound never prunes an equal score
+_EPSILON = 1e-9
+
+
+def _points(obj: GameObject) -> int:
+    props = obj.properties
+    points = props.points if props is not None else None
+    return points if isinstance(points, (int, float)) else 1
+
+
+class SpatialIndex:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        objects: Iterable[GameObject] = (),
+        cell_size: Optional[int] = None,
+    ):
+        objects = list(objects)
+        if cell_size is None:
+            # Aim for about one object per bucket
+            cell_size = int(math.sqrt(width * height / max(len(objects), 1)))
+        self.width = width
+        self.height = height
+        self.cell_size = max(2, cell_size)
+        self._columns = (width - 1) // self.cell_size + 1
+        self._rows = (height - 1) // self.cell_size + 1
+        self._cells: Dict[Tuple[int, int], List[GameObject]] = {}
+        self._buckets: Dict[str, Dict[Bucket, List[GameObject]]] = {}
+        self._rank: Dict[int, int] = {}
+        self._next_rank = 0
+        self._max_points: Dict[str, Optional[int]] = {}
+        for obj in objects:
+            self.add(obj)
+
+    ###########################################################################
+    #
+    # Maintenance
+    #
+    ###########################################################################
+    def _bucket(self, x: int, y: int) -> Bucket:
+        return x // self.cell_size, y // self.cell_size
+
+    def add(self, obj: GameObject) -> None:
+        x, y = obj.position.x, obj.position.y
+        self._cells.setdefault((x, y), []).append(obj)
+        buckets = self._buckets.get(obj.type)
+        if buckets is None:
+            buckets = self._buckets[obj.type] = {}
+        buckets.setdefault(self._bucket(x, y), []).append(obj)
+        if obj.id not in self._rank:
+            # Ranks keep results in board order when scores tie
+            self._rank[obj.id] = self._next_rank
+            self._next_rank += 1
+        best = self._max_points.get(obj.type)
+        if best is not None:
+            self._max_points[obj.type] = max(best, _points(obj))
+
+    def remove(self, obj: GameObject, position: Optional[Position] = None) -> None:
+        """
+        Remove an object
+        :param position: where the object was indexed, if it has moved since
+        """
+        position = position or obj.position
+        x, y = position.x, position.y
+        self._discard(self._cells, (x, y), obj)
+        self._discard(self._buckets.get(obj.type, {}), self._bucket(x, y), obj)
+        if self._max_points.get(obj.type) == _points(obj):
+            self._max_points[obj.type] = None
+
+    def move(self, obj: GameObject, old_position: Position) -> None:
+        self.remove(obj, old_position)
+        self.add(obj)
+
+    @staticmethod
+    def _discard(table: dict, key, obj: GameObject) -> None:
+        objects = table.get(key)
+        if not objects:
+            return
+        for i, other in enumerate(objects):
+            if other is obj or other.id == obj.id:
+                del objects[i]
+                break
+        if not objects:
+            del table[key]
+
+    ###########################################################################
+    #
+    # Queries
+    #
+    ###########################################################################
+    def at(self, x: int, y: int) -> List[GameObject]:
+        """
+        Objects on cell (x, y)
+        """
+        return self._cells.get((x, y), [])
+
+    def rank(self, obj: GameObject) -> int:
+        """
+        Order in which an object was first indexed, which breaks ties
+        """
+        return self._rank[obj.id]
+
+    def max_points(self, type: str = DIAMOND) -> int:
+        best = self._max_points.get(type)
+        if best is None:
+            best = max(
+                (
+                    _points(obj)
+                    for objects in self._buckets.get(type, {}).values()
+                    for obj in objects
+                ),
+                default=1,
+            )
+            self._max_points[type] = best
+        return best
+
+    def within(
+        self, position: Position, radius: int, type: Optional[str] = None
+    ) -> List[GameObject]:
+        """
+        All objects within Manhattan distance radius of position, in board order
+        :param type: only objects of this type, or every type if None
+        """
+        x, y = position.x, position.y
+        x0, y0 = self._bucket(max(0, x - radius), max(0, y - radius))
+        x1, y1 = self._bucket(
+            min(self.width - 1, x + radius), min(self.height - 1, y + radius)
+        )
+        tables = (
+            [self._buckets.get(type, {})]
+            if type is not None
+            else list(self._buckets.values())
+        )
+        found = []
+        for buckets in tables:
+            for bx in range(x0, x1 + 1):
+                for by in range(y0, y1 + 1):
+                    for obj in buckets.get((bx, by), ()):
+                        p = obj.position
+                        if abs(p.x - x) + abs(p.y - y) <= radius:
+                            found.append(obj)
+        found.sort(key=lambda obj: self._rank[obj.id])
+        return found
+
+    def _rings(self, position: Position) -> Iterator[Tuple[int, List[Bucket]]]:
+        """
+        Buckets in rings of growing Chebyshev distance around position, each
+        with a lower bound on the Manhattan distance to anything inside it
+        """
+        cx, cy = self._bucket(position.x, position.y)
+        last = max(cx, self._columns - 1 - cx, cy, self._rows - 1 - cy)
+        for r in range(last + 1):
+            if r == 0:
+                ring = [(cx, cy)]
+            else:
+                ring = []
+                for bx in range(cx - r, cx + r + 1):
+                    ring.append((bx, cy - r))
+                    ring.append((bx, cy + r))
+                for by in range(cy - r + 1, cy + r):
+                    ring.append((cx - r, by))
+                    ring.append((cx + r, by))
+            yield max(0, (r - 1) * self.cell_size + 1), ring
+
+    def best(
+        self,
+        position: Position,
+        type: str,
+        score: ScoreFunction,
+        min_factor: float,
+    ) -> Optional[GameObject]:
+        """
+        The object with the lowest score, ties going to the earliest in board
+        order, exactly like a linear scan over the board
+        :param score: score(obj, distance), lower is better
+        :param min_factor: a lower bound of score(obj, d) / d over all objects
+        """
+        buckets = self._buckets.get(type)
+        if not buckets:
+            return None
+        x, y = position.x, position.y
+        best = None
+        best_score = math.inf
+        best_rank = math.inf
+        for bound, ring in self._rings(position):
+            if best is not None and bound * min_factor > best_score + _EPSILON:
+                break
+            for bucket in ring:
+                for obj in buckets.get(bucket, ()):
+                    p = obj.position
+                    value = score(obj, abs(p.x - x) + abs(p.y - y))
+                    if value is None:
+                        continue
+                    rank = self._rank[obj.id]
+                    if value < best_score or (value == best_score and rank < best_rank):
+                        best, best_score, best_rank = obj, value, rank
+        return best
+
+    def nearest(
+        self,
+        position: Position,
+        k: int,
+        type: str = DIAMOND,
+        weighted: bool = False,
+    ) -> List[GameObject]:
+        """
+        The k objects closest to position
+        :param weighted: rank by distance / points instead of distance
+        """
+        buckets = self._buckets.get(type)
+        if not buckets or k <= 0:
+            return []
+        x, y = position.x, position.y
+        min_factor = 1 / self.max_points(type) if weighted else 1
+        # Max-heap of the best k as (-score, -rank, obj)
+        heap: List[Tuple[float, int, GameObject]] = []
+        for bound, ring in self._rings(position):
+            if len(heap) == k and bound * min_factor > -heap[0][0] + _EPSILON:
+                break
+            for bucket in ring:
+                for obj in buckets.get(bucket, ()):
+                    p = obj.position
+                    value = abs(p.x - x) + abs(p.y - y)
+                    if weighted:
+                        value /= max(_points(obj), 1)
+                    entry = (-value, -self._rank[obj.id], obj)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry[:2] > heap[0][:2]:
+                        heapq.heapreplace(heap, entry)
+        return [obj for _, _, obj in sorted(heap, key=lambda e: (-e[0], -e[1]))]
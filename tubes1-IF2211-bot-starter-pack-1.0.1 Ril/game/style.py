@@ -0,0 +1,39 @@
+"""
+Colours for console output.
+
+colorama is imported only when stdout is a terminal. Headless runs (output
+redirected to a file or a pipe, or NO_COLOR set) get an empty string for
+every colour, so they neither load colorama nor write escape codes to
+their logs.
+"""
+import os
+import sys
+
+
+class _Plain:
+    """
+    Stands in for colorama's Fore, Back and Style: every colour is ""
+    """
+
+    def __getattr__(self, name: str) -> str:
+        return ""
+
+
+def headless() -> bool:
+    stream = sys.stdout
+    return (
+        bool(os.environ.get("NO_COLOR"))
+        or stream is None
+        or not hasattr(stream, "isatty")
+        or not stream.isatty()
+    )
+
+
+if headless():
+    Fore = Back = Style = _Plain()
+
+    def init(*args, **kwargs) -> None:
+        pass
+
+else:
+    from colorama import Back, Fore, Style, init
@@ -0,0 +1,335 @@
+"""
+Bots of one team dividing the diamonds between them.
+
+Bots started for the same team and board, one process each as run-bots.sh
+does or all in one, share a small segment of shared memory named after the
+team and the board. Every bot owns one slot of it, where it publishes its
+position, inventory and the diamond it is after (or none when it is fleeing
+or heading home). Reading the slots of the teammates costs microseconds and
+no request.
+
+Each tick, a bot about to pick a diamond solves the assignment of the
+teammates not heading home to the diamonds near them, with
+GreedyDiamondBot's score as the cost (Hungarian algorithm), and goes for
+its own share. Every bot solves the same problem, ordered by bot and
+diamond id, so they agree without anyone deciding for the others. Only
+who is on the team comes from the slots: positions and inventories are
+taken from the board, which every bot sees alike, where the targets of
+teammates that already moved this tick would not be.
+
+A slot is written by its owner only, under a sequence counter that is odd
+while a write is under way (a seqlock): readers retry until they read the
+same even counter before and after, so no lock is ever taken. Slots not
+written for STALE_AFTER seconds belong to bots that are gone and are taken
+over by newcomers.
+"""
+import os
+import re
+import struct
+from time import time
+from typing import Dict, List, NamedTuple, Optional
+
+from multiprocessing import shared_memory
+
+from game.models import BOT, DIAMOND, Board, GameObject, Position
+
+DEFAULT_SLOTS = 16
+# Seconds after which a slot that was not written is free again
+STALE_AFTER = 3.0
+# Diamonds considered per bot, nearest first by distance over points
+CANDIDATES = 4
+DEFAULT_INVENTORY_SIZE = 5
+MAGIC = b"DTEAM1\0\0"
+HEADER = struct.Struct("<8sI4x")
+SEQUENCE = struct.Struct("<I4x")
+# Bot id, time written, x, y, diamonds, target x, target y (-1 if none)
+BODY = struct.Struct("<qd5i4x")
+SLOT_SIZE = SEQUENCE.size + BODY.size
+READ_RETRIES = 100
+# Cost of a diamond a bot cannot take, finite so the assignment stays exact
+_INFEASIBLE = 1e9
+
+
+class Member(NamedTuple):
+    bot_id: int
+    written: float
+    x: int
+    y: int
+    diamonds: int
+    target_x: int
+    target_y: int
+
+
+def segment_name(team: str, board_id: int) -> str:
+    """
+    Name of the shared memory segment of a team on a board
+    """
+    return "diamonds-{}-{}".format(re.sub(r"[^A-Za-z0-9_]", "_", team), board_id)
+
+
+def assign(costs: List[List[float]]) -> List[int]:
+    """
+    Column of every row such that no column is used twice and the total
+    cost is the lowest (Hungarian algorithm, O(rows^2 * columns))
+    :param costs: rows of costs, at most as many rows as columns
+    :return: column of every row
+    """
+    n = len(costs)
+    if not n:
+        return []
+    m = len(costs[0])
+    inf = float("inf")
+    # Potentials of rows and columns, and the row matched to every column,
+    # all 1-based with column 0 as the row being added
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    match = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        slack = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = costs[i0 - 1]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cost = row[j - 1] - u[i0] - v[j]
+                    if cost < slack[j]:
+                        slack[j] = cost
+                        way[j] = j0
+                    if slack[j] < delta:
+                        delta = slack[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    slack[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    columns = [0] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            columns[match[j] - 1] = j - 1
+    return columns
+
+
+def _track(memory: shared_memory.SharedMemory, tracked: bool) -> None:
+    """
+    Have Python remove a segment at exit or not, where it does (POSIX)
+    """
+    if os.name != "posix":
+        return
+    from multiprocessing import resource_tracker
+
+    if tracked:
+        resource_tracker.register(memory._name, "shared_memory")
+    else:
+        resource_tracker.unregister(memory._name, "shared_memory")
+
+
+class Team:
+    def __init__(self, team: str, board_id: int, slots: int = DEFAULT_SLOTS):
+        """
+        Attach to the segment of a team on a board, creating it if needed
+        :param slots: most bots the team can have, if creating it
+        """
+        self.name = segment_name(team, board_id)
+        size = HEADER.size + slots * SLOT_SIZE
+        try:
+            self._memory = shared_memory.SharedMemory(self.name, create=True, size=size)
+            HEADER.pack_into(self._memory.buf, 0, MAGIC, slots)
+        except FileExistsError:
+            self._memory = shared_memory.SharedMemory(self.name)
+        # Python would remove the segment when any bot using it exits; the
+        # last bot to leave does instead
+        _track(self._memory, False)
+        self._buf = self._memory.buf
+        magic, count = HEADER.unpack_from(self._buf, 0)
+        # A segment being created by another bot reads as zeros for a moment
+        self.slots = count if magic == MAGIC else slots
+        self.slots = min(self.slots, (len(self._buf) - HEADER.size) // SLOT_SIZE)
+        self._slot: Optional[int] = None
+        self._bot_id = 0
+        self.target: Optional[Position] = None
+
+    ###########################################################################
+    #
+    # Slots
+    #
+    ###########################################################################
+    def _offset(self, slot: int) -> int:
+        return HEADER.size + slot * SLOT_SIZE
+
+    def _read(self, slot: int) -> Optional[Member]:
+        buf = self._buf
+        offset = self._offset(slot)
+        for _ in range(READ_RETRIES):
+            (sequence,) = SEQUENCE.unpack_from(buf, offset)
+            if sequence & 1:
+                continue
+            body = BODY.unpack_from(buf, offset + SEQUENCE.size)
+            if SEQUENCE.unpack_from(buf, offset)[0] == sequence:
+                return Member(*body)
+        # The owner is writing all the time, which never happens; skip it
+        return None
+
+    def _write(self, slot: int, *body) -> None:
+        buf = self._buf
+        offset = self._offset(slot)
+        (sequence,) = SEQUENCE.unpack_from(buf, offset)
+        SEQUENCE.pack_into(buf, offset, (sequence + 1) & 0xFFFFFFFF)
+        BODY.pack_into(buf, offset + SEQUENCE.size, *body)
+        SEQUENCE.pack_into(buf, offset, (sequence + 2) & 0xFFFFFFFF)
+
+    def _claim(self, bot_id: int, now: float) -> Optional[int]:
+        """
+        Our slot: the one holding our id, else the first free or stale one
+        """
+        free = None
+        for slot in range(self.slots):
+            member = self._read(slot)
+            if member is None:
+                continue
+            if member.bot_id == bot_id:
+                return slot
+            if free is None and (
+                member.bot_id == 0 or now - member.written > STALE_AFTER
+            ):
+                free = slot
+        return free
+
+    def publish(self, bot: GameObject, target: Optional[Position] = None) -> None:
+        """
+        Write where our bot is, what it carries and the diamond it is after
+        """
+        now = time()
+        slot = self._slot
+        owner = self._read(slot) if slot is not None else None
+        # Another bot may have taken a slot we left stale; look again then
+        if owner is None or owner.bot_id != bot.id:
+            slot = self._slot = self._claim(bot.id, now)
+            if slot is None:
+                return
+        self._bot_id = bot.id
+        self.target = target
+        self._write(
+            slot,
+            bot.id,
+            now,
+            bot.position.x,
+            bot.position.y,
+            bot.properties.diamonds or 0,
+            target.x if target is not None else -1,
+            target.y if target is not None else -1,
+        )
+
+    def members(self) -> Dict[int, Member]:
+        """
+        The live slots of the other bots of the team, by bot id
+        """
+        now = time()
+        members = {}
+        for slot in range(self.slots):
+            if slot == self._slot:
+                continue
+            member = self._read(slot)
+            if (
+                member is not None
+                and member.bot_id
+                and member.bot_id != self._bot_id
+                and now - member.written <= STALE_AFTER
+            ):
+                members[member.bot_id] = member
+        return members
+
+    def close(self) -> None:
+        """
+        Free our slot, and remove the segment if no teammate is left
+        """
+        if self._slot is not None:
+            self._write(self._slot, 0, 0.0, 0, 0, 0, -1, -1)
+            self._slot = None
+        alone = not self.members()
+        self._buf = None
+        self._memory.close()
+        if alone:
+            # unlink stops the tracking again
+            _track(self._memory, True)
+            try:
+                self._memory.unlink()
+            except FileNotFoundError:
+                pass
+
+    ###########################################################################
+    #
+    # Assignment
+    #
+    ###########################################################################
+    def choose(self, logic, bot: GameObject, board: Board) -> Optional[GameObject]:
+        """
+        Our share of the diamonds, published as our target
+        :param logic: the GreedyDiamondBot, whose score is the cost
+        :return: the diamond to go for, or None to choose alone, when no
+            teammate is after diamonds or nothing is left for us
+        """
+        members = self.members()
+        teammates = [
+            other
+            for other in board.bots
+            if other.id in members
+            and (other.properties.diamonds or 0) < logic.return_at
+        ]
+        if not teammates:
+            return None
+        team = sorted(teammates + [bot], key=lambda member: member.id)
+        ids = {member.id for member in team}
+        index = board.spatial
+
+        candidates = {}
+        for member in team:
+            for diamond in index.nearest(
+                member.position, CANDIDATES + len(team), DIAMOND, weighted=True
+            ):
+                candidates[diamond.id] = diamond
+        diamonds = [candidates[key] for key in sorted(candidates)]
+        if not diamonds:
+            return None
+
+        costs = []
+        for member in team:
+            props = member.properties
+            room = (props.inventory_size or DEFAULT_INVENTORY_SIZE) - (
+                props.diamonds or 0
+            )
+            # Teammates do not make diamonds unsafe
+            enemies = [
+                other
+                for other in index.within(member.position, logic.danger_radius, BOT)
+                if other.id not in ids
+            ]
+            row = []
+            for diamond in diamonds:
+                p = diamond.position
+                distance = abs(p.x - member.position.x) + abs(p.y - member.position.y)
+                score = logic.score_diamond(diamond, distance, enemies, room)
+                row.append(_INFEASIBLE if score is None else score)
+            # One column per bot for taking no diamond, so everybody fits
+            row += [_INFEASIBLE] * len(team)
+            costs.append(row)
+
+        mine = assign(costs)[team.index(bot)]
+        if mine >= len(diamonds) or costs[team.index(bot)][mine] >= _INFEASIBLE:
+            return None
+        return diamonds[mine]
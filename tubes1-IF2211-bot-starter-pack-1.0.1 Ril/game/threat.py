@@ -0,0 +1,135 @@
+"""
+How dangerous every cell of the board is, because of the bots around it.
+
+A bot that can tackle sends the bot it runs into home, and the diamonds
+that bot carried are lost to it. Every bot that can tackle stamps the cells
+it can reach within radius moves with its weight times decay ** moves, and
+the threat of a cell is the sum of the stamps on it. A bot's weight grows
+with the room left in its inventory, since a tackle pays it only what it can
+carry, but a full bot still counts: it sends us home on its way to its base.
+Distances are Manhattan, so teleporters are not seen.
+
+The field is built once per board and carried to the next board by
+BoardState, which re-stamps only the bots that moved or changed. Reading
+the threat of a cell is a list lookup.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game.models import BOT, GameObject, Position
+
+DEFAULT_RADIUS = 4
+DEFAULT_DECAY = 0.5
+# Weight of a bot with a full inventory, a bot with an empty one weighs 1
+FULL_WEIGHT = 0.25
+DEFAULT_INVENTORY_SIZE = 5
+
+
+def weight(bot: GameObject) -> float:
+    """
+    How much a bot threatens the bots around it, 0 if it cannot tackle
+    """
+    props = bot.properties
+    if props is None:
+        return 1.0
+    if props.can_tackle is False:
+        return 0.0
+    size = props.inventory_size or DEFAULT_INVENTORY_SIZE
+    room = max(0, size - (props.diamonds or 0)) / size
+    return FULL_WEIGHT + (1 - FULL_WEIGHT) * room
+
+
+class ThreatField:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        objects: Iterable[GameObject] = (),
+        radius: int = DEFAULT_RADIUS,
+        decay: float = DEFAULT_DECAY,
+    ):
+        """
+        :param objects: game objects, only the bots are stamped
+        :param radius: moves beyond which a bot adds no threat
+        :param decay: threat kept per move away from a bot
+        """
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.decay = decay
+        self._falloff = [decay**moves for moves in range(radius + 1)]
+        self._values = [0.0] * (width * height)
+        # Number of stamps on every cell, so cells that lose their last one
+        # go back to exactly 0
+        self._counts = [0] * (width * height)
+        # Bot id -> (x, y, weight) of its stamp
+        self._stamps: Dict[int, Tuple[int, int, float]] = {}
+        for obj in objects:
+            if obj.type == BOT:
+                self.add(obj)
+
+    def add(self, bot: GameObject) -> None:
+        """
+        Stamp a bot, replacing its previous stamp
+        """
+        self.remove(bot)
+        w = weight(bot)
+        if w <= 0:
+            return
+        x, y = bot.position.x, bot.position.y
+        self._stamps[bot.id] = (x, y, w)
+        self._stamp(x, y, w, 1)
+
+    def remove(self, bot: GameObject) -> None:
+        stamp = self._stamps.pop(bot.id, None)
+        if stamp is not None:
+            x, y, w = stamp
+            self._stamp(x, y, -w, -1)
+
+    def _stamp(self, x: int, y: int, w: float, count: int) -> None:
+        width, height = self.width, self.height
+        values, counts, falloff = self._values, self._counts, self._falloff
+        radius = self.radius
+        for cy in range(max(0, y - radius), min(height, y + radius + 1)):
+            reach = radius - abs(cy - y)
+            row = cy * width
+            for cx in range(max(0, x - reach), min(width, x + reach + 1)):
+                cell = row + cx
+                counts[cell] += count
+                if counts[cell]:
+                    values[cell] += w * falloff[abs(cx - x) + abs(cy - y)]
+                else:
+                    values[cell] = 0.0
+
+    def at(self, position: Position, exclude: Optional[GameObject] = None) -> float:
+        """
+        Threat of a cell, 0 outside the board
+        :param exclude: a bot whose own stamp is left out, usually ours
+        """
+        x, y = position.x, position.y
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0.0
+        cell = y * self.width + x
+        value = self._values[cell]
+        if exclude is not None and value:
+            stamp = self._stamps.get(exclude.id)
+            if stamp is not None:
+                moves = abs(stamp[0] - x) + abs(stamp[1] - y)
+                if moves <= self.radius:
+                    if self._counts[cell] == 1:
+                        return 0.0
+                    value = max(0.0, value - stamp[2] * self._falloff[moves])
+        return value
+
+    def along(
+        self, path: Iterable[Position], exclude: Optional[GameObject] = None
+    ) -> float:
+        """
+        Highest threat of the cells of a path
+        """
+        return max((self.at(position, exclude) for position in path), default=0.0)
+
+    def values(self) -> List[float]:
+        """
+        Threat of every cell, indexed by y * width + x
+        """
+        return self._values
@@ -0,0 +1,207 @@
+import http.client
+import json
+import socket
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Optional, Type
+from urllib.parse import urlsplit
+
+DEFAULT_CONNECT_TIMEOUT = 3.0
+DEFAULT_READ_TIMEOUT = 5.0
+DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 4
+
+JSON_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Connection": "keep-alive",
+}
+
+
+@dataclass
+class HttpResponse:
+    """
+    Minimal response object shared by every transport backend
+    """
+
+    status_code: int
+    content: bytes
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """
+    A persistent HTTP client used by Api. Implementations keep their
+    connections open between calls so a move costs a request, not a handshake.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.pool_size = pool_size
+
+    @abstractmethod
+    def request(
+        self, method: str, url: str, body: Optional[bytes] = None
+    ) -> HttpResponse:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    requests.Session backed transport with a pooled keep-alive adapter.
+    Connection errors are retried for every method, read errors and
+    gateway statuses only for idempotent ones.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=0.05,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.headers.update(JSON_HEADERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self, method: str, url: str, body: Optional[bytes] = None
+    ) -> HttpResponse:
+        res = self.session.request(
+            method.upper(),
+            url,
+            data=body,
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
+        return HttpResponse(res.status_code, res.content)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpClientTransport(Transport):
+    """
+    Lightweight stdlib transport: one persistent http.client connection per
+    thread and host, with no third party dependencies on the hot path.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._local = threading.local()
+
+    def _connections(self) -> Dict[str, http.client.HTTPConnection]:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        return conns
+
+    def _connect(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        cls = (
+            http.client.HTTPSConnection
+            if scheme == "https"
+            else http.client.HTTPConnection
+        )
+        conn = cls(netloc, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sock.settimeout(self.read_timeout)
+        return conn
+
+    def request(
+        self, method: str, url: str, body: Optional[bytes] = None
+    ) -> HttpResponse:
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        key = parts.scheme + "://" + parts.netloc
+        conns = self._connections()
+        method = method.upper()
+
+        attempt = 0
+        while True:
+            conn = conns.get(key)
+            reused = conn is not None
+            sent = False
+            try:
+                if conn is None:
+                    conn = conns[key] = self._connect(parts.scheme, parts.netloc)
+                conn.request(method, path, body=body, headers=JSON_HEADERS)
+                sent = True
+                res = conn.getresponse()
+                content = res.read()
+                if res.will_close:
+                    conn.close()
+                    conns.pop(key, None)
+                return HttpResponse(res.status, content)
+            except (http.client.HTTPException, OSError) as e:
+                if conn is not None:
+                    conn.close()
+                conns.pop(key, None)
+                # A keep-alive socket the server already closed fails before
+                # the request is processed, so it is safe to resend even a POST
+                stale = reused and isinstance(
+                    e, (http.client.RemoteDisconnected, ConnectionError)
+                )
+                if attempt >= self.retries or not (
+                    not sent or method == "GET" or stale
+                ):
+                    raise
+                attempt += 1
+
+    def close(self) -> None:
+        for conn in self._connections().values():
+            conn.close()
+        self._connections().clear()
+
+
+TRANSPORTS: Dict[str, Type[Transport]] = {
+    "requests": RequestsTransport,
+    "http.client": HttpClientTransport,
+}
+
+
+def make_transport(name: str = "requests", **options) -> Transport:
+    """
+    Create a transport backend by name
+    :param name: one of TRANSPORTS
+    :return: Transport
+    """
+    if name not in TRANSPORTS:
+        raise ValueError(
+            "Unknown transport {}. Valid options are: {}".format(
+                name, ", ".join(TRANSPORTS)
+            )
+        )
+    return TRANSPORTS[name](**options)
@@ -1,27 +1,30 @@
 import argparse
-from time import sleep
+import random
+from time import perf_counter
 
-from colorama import Back, Fore, Style, init
 from game.api import Api
+from game.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    TRANSPORTS,
+    make_transport,
+)
 from game.board_handler import BoardHandler
+from game.board_state import BoardState
 from game.bot_handler import BotHandler
-from game.logic.random import RandomLogic
-from game.logic.nearest import GreedyNearestBot
-from game.logic.value import GreedyValueBot
-from game.logic.density import GreedyDensityBot
-from game.logic.safe import GreedySafeBot
-from game.logic.coba import HighestDensity
-from game.logic.kece import GreedyDiamondBot
-from game.logic.efisien import GreedyByEfficiency
+from game import params
+from game.logic import registry
 from game.util import *
 from game.logic.base import BaseLogic
+from game.log import LEVELS, log
+from game.metrics import metrics
+from game.scheduler import MoveScheduler
+from game.style import Fore, Style, init
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": RandomLogic, "Nearest": GreedyNearestBot, "Value": GreedyValueBot, "Density": GreedyDensityBot, "Safe": GreedySafeBot, "Coba": HighestDensity, "Kece": GreedyDiamondBot, "Efisien": GreedyByEfficiency
-}
 
 ###############################################################################
 #
@@ -41,6 +44,12 @@ parser.add_argument(
     "--password", help="The password of the bot to register", action="store"
 )
 parser.add_argument("--team", help="The team of the bot to register", action="store")
+parser.add_argument(
+    "--coordinate",
+    action="store_true",
+    help="Share the diamonds with the other bots of --team on the board,"
+    " through shared memory, so no two go for the same one",
+)
 parser.add_argument(
     "--board", help="Id of the board to join", default=DEFAULT_BOARD_ID, action="store"
 )
@@ -52,19 +61,130 @@ parser.add_argument(
 )
 parser.add_argument(
     "--logic",
-    help="The logic controller to use. Valid options are: {}".format(
-        ", ".join(list(CONTROLLERS.keys()))
+    help="The logic controller to use. Valid options are: {}, the name of any"
+    " logic class in game/logic, or package.module:ClassName".format(
+        ", ".join(registry.names())
     ),
     action="store",
 )
+parser.add_argument(
+    "--params",
+    help="JSON file of parameters for the logic controller, as written by tune.py",
+    action="store",
+)
 group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--transport",
+    action="store",
+    default="requests",
+    help="HTTP backend to use. Valid options are: {}".format(", ".join(TRANSPORTS)),
+)
+group.add_argument(
+    "--connect-timeout",
+    action="store",
+    type=float,
+    default=DEFAULT_CONNECT_TIMEOUT,
+    help="Seconds to wait for a connection. Default: {}".format(
+        DEFAULT_CONNECT_TIMEOUT
+    ),
+)
+group.add_argument(
+    "--read-timeout",
+    action="store",
+    type=float,
+    default=DEFAULT_READ_TIMEOUT,
+    help="Seconds to wait for a response. Default: {}".format(DEFAULT_READ_TIMEOUT),
+)
+group.add_argument(
+    "--retries",
+    action="store",
+    type=int,
+    default=DEFAULT_RETRIES,
+    help="Retries for failed connections. Default: {}".format(DEFAULT_RETRIES),
+)
+group = parser.add_argument_group("Offline play")
+group.add_argument(
+    "--simulate",
+    action="store_true",
+    help="Play against the built-in simulator instead of a game server",
+)
+group.add_argument(
+    "--seed", action="store", type=int, default=None, help="Seed of the simulator"
+)
+parser.add_argument(
+    "--metrics",
+    action="store",
+    help="Time every phase of a tick and write the histograms to this file at"
+    " game over: Prometheus text for .prom/.txt, JSON otherwise",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    choices=list(LEVELS),
+    default="info",
+    help="Lowest level written to the console. Requests are logged at debug."
+    " Default: info",
+)
+group.add_argument(
+    "--log-format", choices=("text", "json"), default="text", action="store"
+)
+group.add_argument(
+    "--trace",
+    action="store",
+    help="Also write every record, down to debug, to this binary trace file",
+)
+parser.add_argument(
+    "--record",
+    action="store",
+    help="Append every board and chosen move to this file, to replay with replay.py",
+)
 args = parser.parse_args()
+metrics.enabled = bool(args.metrics)
+log.configure(LEVELS[args.log_level], args.log_format, trace=args.trace)
+logic_controller = args.logic
+try:
+    # Only the module of the chosen controller is imported
+    logic_class = registry.load(logic_controller or "")
+    logic_params = {}
+    if args.params:
+        written_for, values = params.read(args.params)
+        if written_for and registry.resolve(written_for) != registry.resolve(
+            logic_controller
+        ):
+            raise ValueError(
+                "{} holds parameters for {}, not {}".format(
+                    args.params, written_for, logic_controller
+                )
+            )
+        logic_params = params.check(logic_class, values)
+    if args.coordinate and (not args.team or args.simulate):
+        # The simulator plays a single bot
+        raise ValueError("--coordinate needs --team and a game server")
+except (OSError, ValueError, ImportError) as e:
+    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + str(e))
+    exit(1)
 
 time_factor = int(args.time_factor)
-api = Api(args.host)
+if args.simulate:
+    from game.simulator import Simulator, SimulatorApi
+
+    # Simulated time is logical, so there is nothing to wait for
+    api = SimulatorApi(Simulator(seed=args.seed))
+    time_factor = 0
+else:
+    api = Api(
+        args.host,
+        make_transport(
+            args.transport,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            retries=args.retries,
+        ),
+        board_state=BoardState(),
+    )
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
@@ -102,25 +222,31 @@ if not args.token:
 #
 ###############################################################################
 bot = bot_handler.get_my_info(args.token)
-logic_controller = args.logic
-if logic_controller not in CONTROLLERS:
+
+if not bot.name:
+    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot does not exist")
+    exit(1)
+print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+
+# Setup variables
+bot_logic: BaseLogic = logic_class(**logic_params)
+if args.coordinate and not hasattr(bot_logic, "team"):
     print(
         Fore.RED
         + Style.BRIGHT
         + "Error: "
         + Style.RESET_ALL
-        + "Invalid logic controller"
+        + "{} does not play in a team".format(logic_controller)
     )
     exit(1)
+recorder = None
+if args.record:
+    from game.replay import Recorder
 
-if not bot.name:
-    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot does not exist")
-    exit(1)
-print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
-
-# Setup variables
-logic_class = CONTROLLERS[logic_controller]
-bot_logic: BaseLogic = logic_class()
+    # Seed the random module so a replay makes the same random choices
+    seed = random.randrange(1 << 32)
+    random.seed(seed)
+    recorder = Recorder(args.record, bot.name, logic_controller, seed)
 
 ###############################################################################
 #
@@ -166,51 +292,103 @@ if not current_board_id:
 #
 ###############################################################################
 board = board_handler.get_board(current_board_id)
-move_delay = board.minimum_delay_between_moves / 1000
+scheduler = MoveScheduler(board.minimum_delay_between_moves, time_factor)
+if args.coordinate:
+    from game.team import Team
+
+    bot_logic.team = Team(args.team, current_board_id)
+# Work a controller can do on a board before its move is asked for, and
+# the move it has ready for when no board comes back
+prepare = getattr(bot_logic, "prepare", None)
+fallback_move = getattr(bot_logic, "fallback_move", None)
 
 ###############################################################################
 #
 # Game play loop
 #
 ###############################################################################
-while True:
-    # Find our info among the bots on the board
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over
-        break
-
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
-    # delta_x, delta_y = (1, 0)
-    if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
-        )
-        sleep(1)
-        continue
-
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
-
-    if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
-
-    # Get new state
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over after move
-        break
-
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
+try:
+    while board:
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+        scheduler.observe(board, board_bot)
+
+        # Calculate next move while the delay window of the last move runs out
+        timing = metrics.enabled
+        if timing or recorder:
+            start = perf_counter()
+        delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        # delta_x, delta_y = (1, 0)
+        if timing or recorder:
+            checked = perf_counter()
+        valid = board.is_valid_move(board_bot.position, delta_x, delta_y)
+        if timing:
+            metrics.observe("next_move", checked - start)
+            metrics.observe("is_valid_move", perf_counter() - checked)
+        if recorder:
+            recorder.record(board, (delta_x, delta_y), checked - start)
+        if not valid:
+            log.warning(
+                "move_ignored",
+                move=(delta_x, delta_y),
+                position=(board_bot.position.x, board_bot.position.y),
+            )
+            # Give up this move slot and look at a fresh board instead
+            scheduler.skip()
+            scheduler.wait()
+            if args.simulate:
+                # Simulated time only runs on requests
+                api.skip(bot.id)
+            board = board_handler.get_board(current_board_id)
+            continue
+
+        # Don't spam the board more than it allows!
+        scheduler.wait()
+        try:
+            # Try to perform move
+            scheduler.sent()
+            board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+            scheduler.received()
+        except Exception as e:
+            if fallback_move is None:
+                break
+            # Timed out; the fallback move tells whether the server is gone
+            board = None
+
+        if not board and fallback_move is not None:
+            # Nothing to decide on: play the move ready for the cell the last
+            # one leads to, without waiting for a board
+            delta_x, delta_y = fallback_move()
+            scheduler.wait()
+            try:
+                scheduler.sent()
+                board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+                scheduler.received()
+            except Exception as e:
+                break
+
+        if not board:
+            # Read new board state
+            board = board_handler.get_board(current_board_id)
+        board_bot = board.get_bot(bot) if board and prepare else None
+        if board_bot:
+            # Still within the delay of the move just sent, leaving next_move
+            # less to do once the move may go out
+            if timing:
+                start = perf_counter()
+            prepare(board_bot, board)
+            if timing:
+                metrics.observe("prepare", perf_counter() - start)
+finally:
+    # Whatever ended the game, Ctrl-C included, the recording is kept and
+    # the team segment is not left behind
+    if recorder:
+        recorder.close()
+    if args.coordinate:
+        bot_logic.team.close()
 
 
 ###############################################################################
@@ -218,4 +396,13 @@ while True:
 # Game over!
 #
 ###############################################################################
+log.flush()
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+print(scheduler.summary())
+if hasattr(bot_logic, "summary"):
+    print(bot_logic.summary())
+if recorder:
+    print("{} moves recorded to {}".format(recorder.ticks, args.record))
+if args.metrics:
+    metrics.write(args.metrics)
+    print("Metrics written to {}".format(args.metrics))
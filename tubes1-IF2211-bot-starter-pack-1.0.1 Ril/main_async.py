@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from game.async_api import DEFAULT_ASYNC_POOL_SIZE, AsyncApi, AsyncHttpTransport
+from game.board_cache import AsyncBoardCache
+from game.bot_handler import BotHandler
+from game.log import DEBUG, LEVELS, log
+from game.logic import registry
+from game.logic.base import BaseLogic
+from game.scheduler import MoveScheduler
+from game.style import Fore, Style, init
+
+init()
+BASE_URL = "http://localhost:3000/api"
+DEFAULT_BOARD_ID = 1
+
+
+@dataclass
+class BotSpec:
+    name: str
+    email: str
+    password: str
+    team: str
+    logic: str
+    token: Optional[str] = None
+
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Run many Diamonds bots from a single asyncio event loop"
+)
+group = parser.add_mutually_exclusive_group(required=True)
+group.add_argument(
+    "--bots",
+    help="JSON file with a list of bots, each with name, email, password, team"
+    " and logic (and optionally token)",
+    action="store",
+)
+group.add_argument(
+    "--count", help="Number of bots to generate", type=int, action="store"
+)
+parser.add_argument(
+    "--name", help="Name prefix of generated bots", default="stima", action="store"
+)
+parser.add_argument(
+    "--email-domain",
+    help="Email domain of generated bots",
+    default="email.com",
+    action="store",
+)
+parser.add_argument(
+    "--password", help="Password of generated bots", default="123456", action="store"
+)
+parser.add_argument(
+    "--team", help="Team of generated bots", default="etimo", action="store"
+)
+parser.add_argument(
+    "--logic",
+    help="The logic controller of generated bots. Valid options are: {}, the"
+    " name of any logic class in game/logic, or package.module:ClassName".format(
+        ", ".join(registry.names())
+    ),
+    default="Kece",
+    action="store",
+)
+parser.add_argument(
+    "--board", help="Id of the board to join", default=DEFAULT_BOARD_ID, action="store"
+)
+parser.add_argument(
+    "--time-factor",
+    help="A factor to multiply each move delay with",
+    default=1,
+    action="store",
+)
+parser.add_argument(
+    "--coordinate",
+    action="store_true",
+    help="Share the diamonds between the bots of each team, so no two go for"
+    " the same one",
+)
+group = parser.add_argument_group("API connection")
+group.add_argument(
+    "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
+)
+group.add_argument(
+    "--max-connections",
+    action="store",
+    type=int,
+    default=DEFAULT_ASYNC_POOL_SIZE,
+    help="Maximum open connections shared by all bots. Default: {}".format(
+        DEFAULT_ASYNC_POOL_SIZE
+    ),
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    choices=list(LEVELS),
+    default="info",
+    help="Lowest level written to the console. Default: info",
+)
+group.add_argument(
+    "--log-format", choices=("text", "json"), default="text", action="store"
+)
+group.add_argument(
+    "--trace-dir",
+    action="store",
+    help="Write every record of each bot, down to debug, to <name>.trace here",
+)
+
+
+def load_specs(args) -> List[BotSpec]:
+    if args.bots:
+        with open(args.bots) as f:
+            return [BotSpec(**spec) for spec in json.load(f)]
+    return [
+        BotSpec(
+            name="{}{}".format(args.name, i),
+            email="{}{}@{}".format(args.name, i, args.email_domain),
+            password=args.password,
+            team=args.team,
+            logic=args.logic,
+        )
+        for i in range(args.count)
+    ]
+
+
+def error(name: str, message: str) -> None:
+    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + f"[{name}] {message}")
+
+
+###############################################################################
+#
+# A single bot: register, join and play until game over
+#
+###############################################################################
+async def run_bot(
+    api: AsyncApi,
+    boards: AsyncBoardCache,
+    spec: BotSpec,
+    board_id: int,
+    time_factor: int,
+    coordinate: bool = False,
+) -> None:
+    try:
+        bot_logic: BaseLogic = registry.load(spec.logic)()
+    except (ValueError, ImportError) as e:
+        error(spec.name, str(e))
+        return
+    if coordinate and not hasattr(bot_logic, "team"):
+        error(spec.name, "{} does not play in a team".format(spec.logic))
+        return
+
+    if not spec.token:
+        spec.token = await api.bots_recover(spec.email, spec.password)
+        if not spec.token:
+            bot = await api.bots_register(
+                spec.name, spec.email, spec.password, spec.team
+            )
+            if not bot:
+                error(spec.name, "Unable to register bot")
+                return
+            spec.token = bot.id
+
+    bot = await api.bots_get(spec.token)
+    if not bot or not bot.name:
+        error(spec.name, "Bot does not exist")
+        return
+    if not await api.bots_join(bot.id, board_id):
+        error(spec.name, "Unable to join board {}".format(board_id))
+        return
+
+    # Bots on the same board share one fetch of it
+    board = await boards.get(board_id)
+    scheduler = MoveScheduler(board.minimum_delay_between_moves, time_factor)
+    if coordinate:
+        from game.team import Team
+
+        bot_logic.team = Team(spec.team, board_id)
+    prepare = getattr(bot_logic, "prepare", None)
+    fallback_move = getattr(bot_logic, "fallback_move", None)
+
+    try:
+        while board:
+            board_bot = board.get_bot(bot)
+            if not board_bot:
+                break
+            scheduler.observe(board, board_bot)
+
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+            if log.level <= DEBUG:
+                log.debug("move", bot=spec.name, move=(delta_x, delta_y))
+            if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+                log.warning(
+                    "move_ignored",
+                    bot=spec.name,
+                    move=(delta_x, delta_y),
+                    position=(board_bot.position.x, board_bot.position.y),
+                )
+                scheduler.skip()
+                await asyncio.sleep(scheduler.wait_time())
+                board = await boards.get(board_id)
+                continue
+
+            # Yield to the other bots while the move delay runs out
+            await asyncio.sleep(scheduler.wait_time())
+            try:
+                scheduler.sent()
+                new_board = await api.bots_move(
+                    bot.id, BotHandler._get_direction(delta_x, delta_y)
+                )
+                scheduler.received()
+            except Exception:
+                if fallback_move is None:
+                    break
+                # Timed out; the fallback move tells whether the server is gone
+                new_board = None
+            if new_board is None and fallback_move is not None:
+                # Play the move ready for the cell the last one leads to
+                # rather than wait for a board
+                delta_x, delta_y = fallback_move()
+                await asyncio.sleep(scheduler.wait_time())
+                try:
+                    scheduler.sent()
+                    new_board = await api.bots_move(
+                        bot.id, BotHandler._get_direction(delta_x, delta_y)
+                    )
+                    scheduler.received()
+                except Exception:
+                    break
+            if new_board is not None:
+                # Stamped with the send time, so it never replaces a newer board
+                boards.offer(board_id, new_board, scheduler.last_sent)
+            board = new_board or await boards.get(board_id)
+            board_bot = board.get_bot(bot) if board and prepare else None
+            if board_bot:
+                # Within the delay of the move just sent
+                prepare(board_bot, board)
+    finally:
+        # Also when cancelled, so the segment is not left behind
+        if coordinate:
+            bot_logic.team.close()
+
+    print(
+        Fore.BLUE + Style.BRIGHT + "Game over! " + Style.RESET_ALL + bot.name,
+        scheduler.summary(),
+    )
+
+
+async def run_all(args) -> None:
+    specs = load_specs(args)
+    log.configure(LEVELS[args.log_level], args.log_format)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+        for spec in specs:
+            log.add_trace(
+                os.path.join(args.trace_dir, spec.name + ".trace"), bot=spec.name
+            )
+    api = AsyncApi(
+        args.host, AsyncHttpTransport(pool_size=args.max_connections)
+    )
+    boards = AsyncBoardCache(api.boards_get)
+    try:
+        results = await asyncio.gather(
+            *(
+                run_bot(
+                    api,
+                    boards,
+                    spec,
+                    int(args.board),
+                    int(args.time_factor),
+                    args.coordinate,
+                )
+                for spec in specs
+            ),
+            return_exceptions=True,
+        )
+        for spec, result in zip(specs, results):
+            if isinstance(result, Exception):
+                error(spec.name, repr(result))
+    finally:
+        await api.close()
+        log.flush()
+    print(boards.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(run_all(parser.parse_args()))
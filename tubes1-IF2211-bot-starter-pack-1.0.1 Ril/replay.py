@@ -0,0 +1,94 @@
+import argparse
+import sys
+
+from game.logic.registry import load
+from game.replay import read, replay
+
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+###############################################################################
+#
+# Command line
+#
+###############################################################################
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded games through a logic controller"
+    )
+    parser.add_argument("recording", help="File written with main.py --record")
+    parser.add_argument(
+        "--logic",
+        nargs="+",
+        help="Controllers to replay with, by name or as package.module:ClassName."
+        " Default: the recorded controller",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Replays of every game per controller"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with an error when a replayed move differs from the recording",
+    )
+    args = parser.parse_args()
+
+    recordings = read(args.recording)
+    if not recordings:
+        print("No games in {}".format(args.recording), file=sys.stderr)
+        sys.exit(1)
+
+    mismatched = False
+    for number, recording in enumerate(recordings, 1):
+        recorded = sorted(tick.seconds for tick in recording.ticks if tick.seconds)
+        print(
+            "Game {}: {} ({}), {} moves, recorded next_move p50 {:.0f}us"
+            "  p99 {:.0f}us".format(
+                number,
+                recording.bot,
+                recording.logic,
+                len(recording.ticks),
+                percentile(recorded, 0.50) * 1e6,
+                percentile(recorded, 0.99) * 1e6,
+            )
+        )
+        for spec in args.logic or [recording.logic]:
+            logic_class = load(spec)
+            latencies = []
+            mismatches = []
+            elapsed = 0.0
+            for _ in range(args.repeat):
+                result = replay(recording, logic_class())
+                latencies.extend(result.latencies)
+                mismatches = result.mismatches
+                elapsed += result.elapsed
+            latencies.sort()
+            print(
+                "    {:<32} {:6.0f} moves/s  p50 {:6.0f}us  p95 {:6.0f}us"
+                "  p99 {:6.0f}us  mismatches {}".format(
+                    spec,
+                    len(latencies) / elapsed if elapsed else 0.0,
+                    percentile(latencies, 0.50) * 1e6,
+                    percentile(latencies, 0.95) * 1e6,
+                    percentile(latencies, 0.99) * 1e6,
+                    len(mismatches),
+                )
+            )
+            for tick, expected, got in mismatches[:5]:
+                print(
+                    "        move {}: recorded {}, replayed {}".format(
+                        tick, expected, got
+                    )
+                )
+            mismatched = mismatched or bool(mismatches)
+
+    if args.check and mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
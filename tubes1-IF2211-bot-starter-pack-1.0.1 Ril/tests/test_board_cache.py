@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from time import perf_counter
+
+from game.board_cache import AsyncBoardCache, BoardCache
+from game.models import Board
+
+
+def board(tag):
+    return Board(
+        id=1,
+        width=tag,
+        height=tag,
+        features=[],
+        minimum_delay_between_moves=100,
+        game_objects=[],
+    )
+
+
+def test_late_answer_keeps_newer_offer():
+    older, newer = board(1), board(2)
+    cache = BoardCache(None, max_age=60)
+
+    def fetch(board_id):
+        # The answer to a move sent after this request arrives first
+        cache.offer(board_id, newer, perf_counter())
+        return older
+
+    cache.fetch = fetch
+    assert cache.get(1) is older
+    assert cache.get(1) is newer
+
+    cache.offer(1, older, perf_counter() - 1)
+    assert cache.get(1) is newer
+    assert (cache.fetches, cache.hits) == (1, 2)
+
+
+def test_concurrent_gets_share_one_fetch():
+    started, release = threading.Event(), threading.Event()
+    answer = board(1)
+    calls = []
+
+    def fetch(board_id):
+        calls.append(board_id)
+        started.set()
+        release.wait(5)
+        return answer
+
+    cache = BoardCache(fetch, max_age=60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(1))) for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = perf_counter() + 5
+    while cache.shared < 3 and perf_counter() < deadline:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == [answer] * 4
+    assert (cache.fetches, cache.shared) == (1, 3)
+
+
+def test_async_late_answer_keeps_newer_offer():
+    older, newer = board(1), board(2)
+
+    async def fetch(board_id):
+        cache.offer(board_id, newer, perf_counter())
+        return older
+
+    cache = AsyncBoardCache(fetch, max_age=60)
+
+    async def play():
+        return await cache.get(1), await cache.get(1)
+
+    assert asyncio.run(play()) == (older, newer)
@@ -0,0 +1,44 @@
+from game import codec
+from game.board_state import BoardState
+from game.simulator import Simulator
+
+
+def copy(board):
+    # A fresh decode, as every response is
+    return codec.board_from_dict(codec.board_to_dict(board))
+
+
+def test_diff_of_a_move():
+    simulator = Simulator(seed=3)
+    simulator.add_bot("a")
+    simulator.add_bot("b")
+    state = BoardState()
+    assert state.update(copy(simulator.board())).reset
+
+    before = state.board
+    bot = simulator.bot("a")
+    x = bot.position.x
+    simulator.move("a", 1 if x == 0 else -1, 0)
+    board = copy(simulator.board())
+    changes = state.update(board)
+
+    assert not changes.reset
+    assert [(obj.id, old) for obj, old in changes.bots_moved] == [
+        (bot.id, bot.position)
+    ]
+    assert not changes.added
+    # Everything else is the instance of the previous board
+    unchanged = [obj for obj in board.game_objects if obj.id != bot.id]
+    assert unchanged and all(obj is before.get_object(obj.id) for obj in unchanged)
+    assert changes.collected == [
+        obj for obj in before.diamonds if obj.position == simulator.bot("a").position
+    ]
+
+    assert state.update(copy(simulator.board())).empty
+
+
+def test_another_board_resets():
+    state = BoardState()
+    state.update(copy(Simulator(seed=1).board()))
+    changes = state.update(copy(Simulator(seed=1, board_id=2).board()))
+    assert changes.reset
@@ -0,0 +1,42 @@
+from dataclasses import fields
+
+from game import codec
+from game.models import Board, Bot, Properties
+from game.simulator import Simulator
+
+
+def raw_board(seed):
+    simulator = Simulator(seed=seed)
+    for name in ("a", "b"):
+        simulator.add_bot(name)
+    simulator.move("a", 1, 0)
+    return codec.loads(codec.dumps({"data": codec.board_to_dict(simulator.board())}))
+
+
+def test_fast_path_matches_generic_path():
+    for seed in range(5):
+        raw = codec.unwrap(raw_board(seed))
+        assert codec.board_from_dict(raw) == codec._generic(Board, raw)
+
+    raw = {"name": "a", "email": "a@x", "id": "7"}
+    assert codec.bot_from_dict(raw) == codec._generic(Bot, raw)
+
+
+def test_unexpected_shape_falls_back():
+    raw = codec.unwrap(raw_board(1))
+    expected = codec.board_from_dict(raw)
+    # Already snake_case, which only the generic path reads
+    raw["minimum_delay_between_moves"] = raw.pop("minimumDelayBetweenMoves")
+    raw["game_objects"] = raw.pop("gameObjects")
+    assert codec.board_from_dict(raw) == expected
+
+
+def test_round_trip():
+    raw = raw_board(2)
+    board = codec.parse_board(codec.dumps(raw))
+    assert codec.board_to_dict(board) == raw["data"]
+
+
+def test_property_keys_cover_properties():
+    keys = {field for field, _ in codec.PROPERTY_KEYS} | {"base"}
+    assert keys == {field.name for field in fields(Properties)}
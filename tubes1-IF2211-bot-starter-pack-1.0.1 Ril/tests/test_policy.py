@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from game.logic.kece import GreedyDiamondBot
+from game.logic.policy import PolicyBot, np
+from game.simulator import Simulator, SimulatorConfig
+
+BACKENDS = ["python"] + (["numpy"] if np is not None else [])
+
+
+class CheckedPolicy(PolicyBot):
+    """
+    PolicyBot that also asks GreedyDiamondBot every tick, drawing the same
+    random numbers for both
+    """
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.reference = GreedyDiamondBot()
+        self.reference.board_state = self.board_state
+        self.moves = []
+
+    def next_move(self, board_bot, board):
+        state = random.getstate()
+        move = super().next_move(board_bot, board)
+        random.setstate(state)
+        expected = self.reference.next_move(board_bot, board)
+        self.moves.append((tuple(move), tuple(expected)))
+        return move
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("size", [7, 15, 25])
+def test_table_plays_kece_priorities(backend, size):
+    random.seed(size)
+    simulator = Simulator(
+        SimulatorConfig(width=size, height=size, seconds=15), seed=size
+    )
+    policy = CheckedPolicy(backend)
+    controllers = {"policy": policy}
+    for i in range(3):
+        controllers["kece{}".format(i)] = GreedyDiamondBot()
+    simulator.play(controllers)
+
+    assert policy.moves
+    assert [pair for pair in policy.moves if pair[0] != pair[1]] == []
+    assert policy.table.patches > 0
+
+
+def test_prepared_alone():
+    # Alone on the board, only collecting diamonds changes the table
+    random.seed(1)
+    simulator = Simulator(SimulatorConfig(seconds=30), seed=1)
+    simulator.add_bot("policy")
+    policy = CheckedPolicy(None)
+    while not simulator.finished:
+        board = simulator.board()
+        bot = simulator.bot("policy")
+        policy.prepare(bot, board)
+        updates = policy.table.builds + policy.table.patches + policy.table.kept
+        simulator.step({"policy": policy.next_move(bot, board)})
+        # next_move only looked its move up
+        assert policy.table.builds + policy.table.patches + policy.table.kept == updates
+
+    assert [pair for pair in policy.moves if pair[0] != pair[1]] == []
+    assert policy.table.patches > policy.table.builds
@@ -0,0 +1,38 @@
+from game import replay
+from game.simulator import Simulator
+
+
+def record_session(path, name, ticks, finish=True):
+    simulator = Simulator(seed=1)
+    simulator.add_bot(name)
+    recorder = replay.Recorder(path, name, "Kece", seed=1, flush_every=1)
+    for _ in range(ticks):
+        recorder.record(simulator.board(), (1, 0))
+        simulator.step({name: (1, 0)})
+    if finish:
+        recorder.close()
+    else:
+        # Killed: everything flushed is on disk, the stream never ends
+        recorder.flush()
+        recorder._file.close()
+
+
+def test_crashed_session_then_appended_session(tmp_path):
+    path = str(tmp_path / "games.rec")
+    record_session(path, "crashed", 5, finish=False)
+    record_session(path, "clean", 3)
+
+    recordings = replay.read(path)
+    assert [(r.bot, len(r.ticks)) for r in recordings] == [("crashed", 5), ("clean", 3)]
+
+
+def test_garbage_after_crashed_session(tmp_path):
+    path = str(tmp_path / "games.rec")
+    record_session(path, "crashed", 4, finish=False)
+    with open(path, "ab") as f:
+        # Half a compressed block, written as the process died
+        f.write(b"\x8a\x91\xff\x00\x13")
+    record_session(path, "clean", 2)
+
+    recordings = replay.read(path)
+    assert [(r.bot, len(r.ticks)) for r in recordings] == [("crashed", 4), ("clean", 2)]
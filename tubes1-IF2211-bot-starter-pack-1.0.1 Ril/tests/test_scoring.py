@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from game.logic.kece import GreedyDiamondBot
+from game.models import BOT, DIAMOND, Board, GameObject, Position, Properties
+from game.scoring import DiamondBatch, np
+
+BACKENDS = ["python"] + (["numpy"] if np is not None else [])
+
+
+def random_board(rng, width, height, diamonds, bots):
+    cells = rng.sample(
+        [(x, y) for x in range(width) for y in range(height)], diamonds + bots
+    )
+    objects = []
+    for i, (x, y) in enumerate(cells):
+        if i < diamonds:
+            kind, props = DIAMOND, Properties(points=rng.choice([1, 1, 1, 2]))
+        else:
+            kind, props = BOT, Properties(diamonds=0)
+        objects.append(
+            GameObject(
+                id=i + 1, position=Position(y=y, x=x), type=kind, properties=props
+            )
+        )
+    return Board(
+        id=1,
+        width=width,
+        height=height,
+        features=[],
+        minimum_delay_between_moves=100,
+        game_objects=objects,
+    )
+
+
+def linear_best(logic, position, diamonds, enemies, room):
+    """
+    score_diamond over the diamonds in board order, ties to the earliest
+    """
+    best, best_score = None, None
+    for diamond in diamonds:
+        distance = abs(diamond.position.x - position.x) + abs(
+            diamond.position.y - position.y
+        )
+        score = logic.score_diamond(diamond, distance, enemies, room)
+        if score is not None and (best_score is None or score < best_score):
+            best, best_score = diamond, score
+    return best
+
+
+def cases(seed, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        width, height = rng.randint(3, 30), rng.randint(3, 30)
+        diamonds = rng.randint(1, min(120, width * height // 2))
+        board = random_board(rng, width, height, diamonds, rng.randint(0, 6))
+        position = Position(y=rng.randrange(height), x=rng.randrange(width))
+        yield board, position, board.bots, rng.choice([None, 1, 2, 5])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_matches_score_diamond(backend):
+    logic = GreedyDiamondBot()
+    for board, position, enemies, room in cases(1, 300):
+        batch = DiamondBatch(
+            board.diamonds,
+            backend,
+            unsafe_factor=logic.unsafe_factor,
+            high_value_factor=logic.high_value_factor,
+        )
+        expected = linear_best(logic, position, board.diamonds, enemies, room)
+        assert batch.best(position, enemies, logic.safe_distance, room) is expected
+
+
+def test_index_matches_score_diamond():
+    logic = GreedyDiamondBot()
+    for board, position, enemies, room in cases(2, 300):
+        expected = linear_best(logic, position, board.diamonds, enemies, room)
+        found = logic.find_best_diamond(
+            position, board.diamonds, enemies, board.spatial, room
+        )
+        assert found is expected
@@ -0,0 +1,82 @@
+import itertools
+import os
+import random
+from multiprocessing import shared_memory
+
+import pytest
+
+from game import team
+from game.models import BOT, GameObject, Position, Properties
+
+
+def test_assign_is_optimal():
+    rng = random.Random(1)
+    for _ in range(300):
+        rows = rng.randint(1, 4)
+        columns = rng.randint(rows, 6)
+        costs = [
+            [
+                rng.choice([rng.randint(0, 9), 0.5, team._INFEASIBLE])
+                for _ in range(columns)
+            ]
+            for _ in range(rows)
+        ]
+        chosen = team.assign(costs)
+
+        assert len(set(chosen)) == rows
+        best = min(
+            sum(costs[row][column] for row, column in enumerate(columns_of))
+            for columns_of in itertools.permutations(range(columns), rows)
+        )
+        assert sum(costs[row][column] for row, column in enumerate(chosen)) == best
+
+
+def bot(bot_id, x, y, diamonds):
+    return GameObject(
+        id=bot_id,
+        position=Position(y=y, x=x),
+        type=BOT,
+        properties=Properties(diamonds=diamonds),
+    )
+
+
+@pytest.fixture
+def board_id():
+    # A segment of this test only, apart from any running team
+    return os.getpid()
+
+
+def test_teammates_read_each_other(board_id):
+    first = team.Team("test", board_id, slots=4)
+    second = team.Team("test", board_id)
+    try:
+        first.publish(bot(1, 2, 3, 1), Position(y=5, x=4))
+        second.publish(bot(2, 0, 0, 0))
+
+        member = second.members()[1]
+        assert (member.x, member.y, member.diamonds) == (2, 3, 1)
+        assert (member.target_x, member.target_y) == (4, 5)
+        assert list(first.members()) == [2]
+    finally:
+        second.close()
+        first.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(team.segment_name("test", board_id))
+
+
+def test_read_skips_a_slot_being_written(board_id):
+    members = team.Team("test", board_id, slots=2)
+    try:
+        members._write(0, 7, 1.0, 1, 2, 3, -1, -1)
+        assert members._read(0) == team.Member(7, 1.0, 1, 2, 3, -1, -1)
+
+        # Half way through a write the counter is odd
+        offset = members._offset(0)
+        (sequence,) = team.SEQUENCE.unpack_from(members._buf, offset)
+        team.SEQUENCE.pack_into(members._buf, offset, sequence + 1)
+        assert members._read(0) is None
+
+        team.SEQUENCE.pack_into(members._buf, offset, sequence + 2)
+        assert members._read(0).bot_id == 7
+    finally:
+        members.close()
@@ -0,0 +1,86 @@
+import http.client
+import socket
+import threading
+
+import pytest
+
+from game.transport import HttpClientTransport
+
+ANSWER = (
+    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: application/json\r\n\r\n{}"
+)
+
+
+class Server:
+    """
+    Reads one request per connection, then answers it and hangs up without
+    saying so (a keep-alive timeout), or hangs up without answering
+    """
+
+    def __init__(self, answer: bool):
+        self.answer = answer
+        self.requests = []
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = "http://127.0.0.1:{}/api/bots".format(self.sock.getsockname()[1])
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+                if data:
+                    self.requests.append(data.split(b" ", 1)[0].decode())
+                    if self.answer:
+                        conn.sendall(ANSWER)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def transport():
+    transport = HttpClientTransport(connect_timeout=2, read_timeout=2, retries=2)
+    yield transport
+    transport.close()
+
+
+def test_post_resent_on_closed_keep_alive(transport):
+    server = Server(answer=True)
+    try:
+        assert transport.request("POST", server.url, b"{}").status_code == 200
+        # The server hung up the connection kept for this one
+        assert transport.request("POST", server.url, b"{}").status_code == 200
+        assert server.requests == ["POST", "POST"]
+    finally:
+        server.close()
+
+
+def test_post_not_resent_once_delivered(transport):
+    server = Server(answer=False)
+    try:
+        with pytest.raises((http.client.HTTPException, OSError)):
+            transport.request("POST", server.url, b"{}")
+        assert server.requests == ["POST"]
+    finally:
+        server.close()
+
+
+def test_get_retried(transport):
+    server = Server(answer=False)
+    try:
+        with pytest.raises((http.client.HTTPException, OSError)):
+            transport.request("GET", server.url)
+        assert server.requests == ["GET"] * 3
+    finally:
+        server.close()
@@ -0,0 +1,19 @@
+import random
+
+import tune
+
+CONFIG = {"width": 10, "height": 10, "seconds": 10}
+
+
+def test_candidate_plays_the_same_games_twice():
+    values = {"explore_chance": 0.5, "return_at": 3}
+    jobs = [
+        ("Kece", values, "Random", seed, second, CONFIG)
+        for seed in range(3)
+        for second in (False, True)
+    ]
+    first = [tune.play_game(job) for job in jobs]
+    # Whatever the random module did in between
+    random.seed(12345)
+    second = [tune.play_game(job) for job in reversed(jobs)][::-1]
+    assert first == second
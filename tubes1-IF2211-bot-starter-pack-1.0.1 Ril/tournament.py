@@ -0,0 +1,247 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from game.logic.registry import load, names
+from game.simulator import Simulator, SimulatorConfig
+
+
+###############################################################################
+#
+# One game, run inside a worker process
+#
+###############################################################################
+def play_game(job: Tuple[str, str, int, dict]) -> dict:
+    first, second, seed, config = job
+    simulator = Simulator(SimulatorConfig(**config), seed=seed)
+    # Controllers that use the random module then play the same game again
+    random.seed(seed)
+    # Seats are named so that self-play still gives each side its own bot
+    seats = {"A": first, "B": second}
+    controllers = {seat: load(spec)() for seat, spec in seats.items()}
+    latencies = {seat: array("d") for seat in seats}
+    scores = simulator.play(
+        controllers, lambda seat, seconds: latencies[seat].append(seconds)
+    )
+    return {
+        "seed": seed,
+        "controllers": seats,
+        "scores": scores,
+        "latencies": {seat: samples.tobytes() for seat, samples in latencies.items()},
+    }
+
+
+###############################################################################
+#
+# Aggregation
+#
+###############################################################################
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def aggregate(results: List[dict], controllers: List[str], config: dict) -> dict:
+    totals = {
+        name: {"games": 0, "wins": 0, "draws": 0, "losses": 0, "score": 0}
+        for name in controllers
+    }
+    latencies: Dict[str, array] = {name: array("d") for name in controllers}
+    pairings: Dict[Tuple[str, str], dict] = {}
+
+    for result in results:
+        seats = result["controllers"]
+        scores = result["scores"]
+        a, b = seats["A"], seats["B"]
+        for seat, name in seats.items():
+            samples = array("d")
+            samples.frombytes(result["latencies"][seat])
+            latencies[name].extend(samples)
+            totals[name]["games"] += 1
+            totals[name]["score"] += scores[seat]
+        key = tuple(sorted((a, b)))
+        pairing = pairings.setdefault(
+            key,
+            {
+                "controllers": list(key),
+                "games": 0,
+                "wins": {name: 0 for name in key},
+                "draws": 0,
+                "mean_score": {name: 0.0 for name in key},
+            },
+        )
+        pairing["games"] += 1
+        for seat, name in seats.items():
+            pairing["mean_score"][name] += scores[seat]
+        if scores["A"] == scores["B"]:
+            pairing["draws"] += 1
+            totals[a]["draws"] += 1
+            totals[b]["draws"] += 1
+        else:
+            winner, loser = ("A", "B") if scores["A"] > scores["B"] else ("B", "A")
+            pairing["wins"][seats[winner]] += 1
+            totals[seats[winner]]["wins"] += 1
+            totals[seats[loser]]["losses"] += 1
+
+    report_controllers = {}
+    for name, total in totals.items():
+        samples = sorted(latencies[name])
+        games = total["games"] or 1
+        report_controllers[name] = {
+            "games": total["games"],
+            "wins": total["wins"],
+            "draws": total["draws"],
+            "losses": total["losses"],
+            "win_rate": total["wins"] / games,
+            "mean_score": total["score"] / games,
+            "decisions": len(samples),
+            "latency_us": {
+                "mean": sum(samples) / len(samples) * 1e6 if samples else 0.0,
+                "p50": percentile(samples, 0.50) * 1e6,
+                "p95": percentile(samples, 0.95) * 1e6,
+                "p99": percentile(samples, 0.99) * 1e6,
+                "max": samples[-1] * 1e6 if samples else 0.0,
+            },
+        }
+    for pairing in pairings.values():
+        # A self-play pairing has both seats under one name
+        seats = 2 * pairing["games"] // len(set(pairing["controllers"]))
+        for name in pairing["mean_score"]:
+            pairing["mean_score"][name] /= seats
+
+    return {
+        "games": len(results),
+        "config": config,
+        "controllers": report_controllers,
+        "pairings": list(pairings.values()),
+    }
+
+
+def regressions(
+    report: dict, baseline: dict, max_slowdown: float, max_score_drop: float
+) -> List[str]:
+    """
+    Controllers that got slower or weaker than in a baseline report
+    """
+    found = []
+    for name, now in report["controllers"].items():
+        before = baseline.get("controllers", {}).get(name)
+        if not before:
+            continue
+        for key in ("p95", "p99"):
+            limit = before["latency_us"][key] * max_slowdown
+            if now["latency_us"][key] > limit:
+                found.append(
+                    "{}: {} latency {:.0f}us > {:.0f}us".format(
+                        name, key, now["latency_us"][key], limit
+                    )
+                )
+        floor = before["mean_score"] * (1 - max_score_drop)
+        if now["mean_score"] < floor:
+            found.append(
+                "{}: mean score {:.2f} < {:.2f}".format(name, now["mean_score"], floor)
+            )
+    return found
+
+
+###############################################################################
+#
+# Command line
+#
+###############################################################################
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play every pairing of logic controllers in the simulator"
+    )
+    parser.add_argument(
+        "--logic",
+        nargs="+",
+        default=names(),
+        help="Controllers to compare, by name or as package.module:ClassName."
+        " Default: {}".format(", ".join(names())),
+    )
+    parser.add_argument("--games", type=int, default=50, help="Seeds per pairing")
+    parser.add_argument("--seed", type=int, default=0, help="First seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seconds", type=int, default=60, help="Game length")
+    parser.add_argument("--width", type=int, default=15)
+    parser.add_argument("--height", type=int, default=15)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument(
+        "--baseline", help="Fail if slower or weaker than this earlier report"
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=1.25,
+        help="Allowed p95/p99 latency factor against the baseline. Default: 1.25",
+    )
+    parser.add_argument(
+        "--max-score-drop",
+        type=float,
+        default=0.05,
+        help="Allowed relative drop of mean score against the baseline."
+        " Default: 0.05",
+    )
+    args = parser.parse_args()
+
+    for spec in args.logic:
+        load(spec)
+    config = {"seconds": args.seconds, "width": args.width, "height": args.height}
+    pairs = (
+        list(itertools.combinations(args.logic, 2))
+        if len(args.logic) > 1
+        else [(args.logic[0], args.logic[0])]
+    )
+    # Every seed is played from both seats so neither side gets the better base
+    jobs = [
+        (first, second, seed, config)
+        for a, b in pairs
+        for seed in range(args.seed, args.seed + args.games)
+        for first, second in ((a, b), (b, a))
+    ]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(play_game, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    report = aggregate(results, args.logic, config)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, stats in report["controllers"].items():
+        print(
+            "{:<32} win {:6.1%}  score {:7.2f}  p50 {:7.0f}us  p95 {:7.0f}us"
+            "  p99 {:7.0f}us".format(
+                name,
+                stats["win_rate"],
+                stats["mean_score"],
+                stats["latency_us"]["p50"],
+                stats["latency_us"]["p95"],
+                stats["latency_us"]["p99"],
+            ),
+            file=sys.stderr,
+        )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(
+                report, json.load(f), args.max_slowdown, args.max_score_drop
+            )
+        for line in found:
+            print("Regression: " + line, file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
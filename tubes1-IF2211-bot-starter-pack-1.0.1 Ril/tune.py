@@ -0,0 +1,353 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from game import params
+from game.logic.registry import load, names
+from game.simulator import Simulator, SimulatorConfig
+
+Candidate = Dict[str, params.Number]
+# Draws per parameter set wanted before the space counts as exhausted
+SAMPLES_PER_CANDIDATE = 100
+
+
+###############################################################################
+#
+# One game, run inside a worker process
+#
+###############################################################################
+def play_game(job: Tuple[str, Candidate, str, int, bool, dict]) -> float:
+    """
+    :return: our score minus the opponent's
+    """
+    logic, values, opponent, seed, second, config = job
+    simulator = Simulator(SimulatorConfig(**config), seed=seed)
+    # Controllers that use the random module then play the same game again
+    random.seed(seed)
+    ours, theirs = load(logic)(**values), load(opponent)()
+    # Seats are named so that self-play still gives each side its own bot
+    seats = {"A": theirs, "B": ours} if second else {"A": ours, "B": theirs}
+    scores = simulator.play(seats)
+    mine, other = ("B", "A") if second else ("A", "B")
+    return scores[mine] - scores[other]
+
+
+###############################################################################
+#
+# Results on disk
+#
+###############################################################################
+class Results:
+    """
+    Margins of every candidate per block of seeds, appended to a JSON lines
+    file as soon as a block is played, so a run can be resumed
+    """
+
+    def __init__(self, path: Optional[str], setup: dict):
+        """
+        :param setup: what the margins depend on besides the parameters;
+            lines written under another setup are ignored
+        """
+        self.path = path
+        self.setup = setup
+        self.blocks: Dict[Tuple[str, int, int], Tuple[float, int]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Cut short by an interrupted run
+                        continue
+                    if record.get("setup") == setup:
+                        key = (_key(record["params"]), *record["seeds"])
+                        self.blocks[key] = (record["margin"], record["games"])
+
+    def get(self, values: Candidate, first: int, last: int):
+        return self.blocks.get((_key(values), first, last))
+
+    def add(self, values: Candidate, first: int, last: int, margins: List[float]):
+        self.blocks[(_key(values), first, last)] = (sum(margins), len(margins))
+        if self.path:
+            with open(self.path, "a") as f:
+                record = {
+                    "setup": self.setup,
+                    "params": values,
+                    "seeds": [first, last],
+                    "margin": sum(margins),
+                    "games": len(margins),
+                }
+                f.write(json.dumps(record) + "\n")
+
+
+def _key(values: Candidate) -> str:
+    return json.dumps(values, sort_keys=True)
+
+
+###############################################################################
+#
+# Search
+#
+###############################################################################
+class Tuner:
+    def __init__(self, pool, logic: str, opponents: List[str], config: dict, results):
+        self.pool = pool
+        self.logic = logic
+        self.opponents = opponents
+        self.config = config
+        self.results = results
+        self.played = 0
+
+    def evaluate(self, candidates: List[Candidate], first: int, last: int) -> None:
+        """
+        Play seeds first to last - 1 against every opponent from both seats
+        for every candidate that has not played them yet
+        """
+        todo = [c for c in candidates if self.results.get(c, first, last) is None]
+        jobs = [
+            (self.logic, values, opponent, seed, second, self.config)
+            for values in todo
+            for opponent in self.opponents
+            for seed in range(first, last)
+            for second in (False, True)
+        ]
+        if not jobs:
+            return
+        margins = list(
+            self.pool.map(play_game, jobs, chunksize=max(1, len(jobs) // 64))
+        )
+        self.played += len(jobs)
+        per_candidate = len(jobs) // len(todo)
+        for i, values in enumerate(todo):
+            self.results.add(
+                values,
+                first,
+                last,
+                margins[i * per_candidate : (i + 1) * per_candidate],
+            )
+
+    def margin(self, values: Candidate, blocks: List[Tuple[int, int]]) -> float:
+        """
+        Mean margin of a candidate over the blocks of seeds it played
+        """
+        total = games = 0
+        for first, last in blocks:
+            margin, count = self.results.get(values, first, last)
+            total += margin
+            games += count
+        return total / games
+
+
+def halving(
+    tuner: Tuner, candidates: List[Candidate], games: int, eta: int, min_games: int
+) -> Tuple[Candidate, List[Tuple[int, int]]]:
+    """
+    Successive halving: every candidate plays min_games seeds, the best
+    1 / eta of them eta times as many, and so on up to games seeds
+    :return: (best candidate, the blocks of seeds it played)
+    """
+    budgets = [games]
+    while budgets[0] // eta >= min_games:
+        budgets.insert(0, budgets[0] // eta)
+    blocks = []
+    first = 0
+    for rung, last in enumerate(budgets):
+        tuner.evaluate(candidates, first, last)
+        blocks.append((first, last))
+        first = last
+        ranked = sorted(candidates, key=lambda c: tuner.margin(c, blocks), reverse=True)
+        report(
+            "rung {}: {} candidates, {} seeds".format(rung, len(candidates), last),
+            ranked,
+            lambda c: tuner.margin(c, blocks),
+        )
+        if rung < len(budgets) - 1:
+            candidates = ranked[: max(1, math.ceil(len(ranked) / eta))]
+    return ranked[0], blocks
+
+
+def random_search(
+    tuner: Tuner, candidates: List[Candidate], games: int, patience: int
+) -> Tuple[Candidate, List[Tuple[int, int]]]:
+    """
+    Every candidate plays all the seeds, stopping once patience candidates in
+    a row did not beat the best so far
+    """
+    best, best_margin = None, -math.inf
+    worse = 0
+    for i, values in enumerate(candidates):
+        tuner.evaluate([values], 0, games)
+        margin = tuner.margin(values, [(0, games)])
+        if margin > best_margin:
+            best, best_margin = values, margin
+            worse = 0
+        else:
+            worse += 1
+        print(
+            "candidate {:>3}: margin {:+8.2f}  best {:+8.2f}".format(
+                i, margin, best_margin
+            ),
+            file=sys.stderr,
+        )
+        if patience and worse >= patience:
+            print(
+                "No better candidate in {} tries, stopping".format(worse),
+                file=sys.stderr,
+            )
+            break
+    return best, [(0, games)]
+
+
+def draw(logic_class: type, count: int, rng: random.Random) -> List[Candidate]:
+    """
+    count distinct parameter sets, the defaults first, or every set there is
+    when there are fewer
+    """
+    defaults = params.defaults(logic_class)
+    every = params.grid(logic_class)
+    if every is not None and len(every) <= count:
+        return [defaults] + [values for values in every if values != defaults]
+    candidates = [defaults]
+    # Many more draws than sets is a space too small to fill with samples
+    for _ in range(count * SAMPLES_PER_CANDIDATE):
+        if len(candidates) >= count:
+            break
+        values = params.sample(logic_class, rng)
+        if values not in candidates:
+            candidates.append(values)
+    return candidates
+
+
+def report(title: str, ranked: List[Candidate], margin, top: int = 3) -> None:
+    print(title, file=sys.stderr)
+    for values in ranked[:top]:
+        print("  {:+8.2f}  {}".format(margin(values), _key(values)), file=sys.stderr)
+
+
+###############################################################################
+#
+# Command line
+#
+###############################################################################
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search the parameters of a logic controller by playing"
+        " seeded games in the simulator"
+    )
+    parser.add_argument("--logic", default="Kece", help="Controller to tune")
+    parser.add_argument(
+        "--opponents",
+        nargs="+",
+        default=["Kece"],
+        help="Controllers to play against, with their defaults. Options: {}".format(
+            ", ".join(names())
+        ),
+    )
+    parser.add_argument(
+        "--method",
+        choices=("halving", "random"),
+        default="halving",
+        help="Successive halving, or random search with --patience. Default: halving",
+    )
+    parser.add_argument(
+        "--candidates", type=int, default=27, help="Parameter sets, the defaults first"
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=27,
+        help="Most seeds per opponent a candidate plays",
+    )
+    parser.add_argument(
+        "--eta", type=int, default=3, help="Halving: 1 / eta of the candidates go on"
+    )
+    parser.add_argument(
+        "--min-games", type=int, default=3, help="Halving: seeds of the first rung"
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=10,
+        help="Random: stop after this many candidates without improvement, 0 never",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the sampling")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seconds", type=int, default=60, help="Game length")
+    parser.add_argument("--width", type=int, default=15)
+    parser.add_argument("--height", type=int, default=15)
+    parser.add_argument(
+        "--results",
+        default="tune.jsonl",
+        help="Append every result to this file, and skip what it already holds",
+    )
+    parser.add_argument(
+        "--output", default="params.json", help="Write the best parameters here"
+    )
+    args = parser.parse_args()
+
+    logic_class = load(args.logic)
+    for spec in args.opponents:
+        load(spec)
+    if not params.declared(logic_class):
+        parser.error("{} declares no parameters (PARAMS)".format(args.logic))
+
+    candidates = draw(logic_class, args.candidates, random.Random(args.seed))
+    if len(candidates) < args.candidates:
+        print(
+            "{} has only {} parameter sets, tuning those".format(
+                args.logic, len(candidates)
+            ),
+            file=sys.stderr,
+        )
+
+    config = {"seconds": args.seconds, "width": args.width, "height": args.height}
+    setup = {"logic": args.logic, "opponents": args.opponents, "config": config}
+    results = Results(args.results, setup)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        tuner = Tuner(pool, args.logic, args.opponents, config, results)
+        if args.method == "halving":
+            best, blocks = halving(
+                tuner, candidates, args.games, args.eta, args.min_games
+            )
+        else:
+            best, blocks = random_search(tuner, candidates, args.games, args.patience)
+
+    margin = tuner.margin(best, blocks)
+    games = blocks[-1][1]
+    # The defaults are only comparable when they played as many seeds
+    default_margin = (
+        tuner.margin(candidates[0], blocks)
+        if all(results.get(candidates[0], *block) for block in blocks)
+        else None
+    )
+    params.write(
+        args.output,
+        args.logic,
+        best,
+        margin=margin,
+        seeds=games,
+        opponents=args.opponents,
+    )
+    print(
+        "Played {} games. Best margin {:+.2f} over {} seeds{}, written to {}".format(
+            tuner.played,
+            margin,
+            games,
+            (
+                ""
+                if default_margin is None
+                else " (defaults {:+.2f})".format(default_margin)
+            ),
+            args.output,
+        ),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()